@@ -1,4 +1,3 @@
-import requests
 import json
 import re
 import sys
@@ -8,6 +7,8 @@ from datetime import datetime, timedelta
 # Add parent directory to path to allow imports from any location
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api.proxy_pool import get_proxy_pool
+
 
 def normalize_view_count(view_count_str):
     """
@@ -133,8 +134,11 @@ def get_videos(channel_id, save_to_db=None):
     }
 
     try:
-        response = requests.post(
+        # Spread over the PROXY_URLS endpoints; a throttled endpoint is retried elsewhere
+        response = get_proxy_pool().request(
+            'POST',
             'https://www.youtube.com/youtubei/v1/browse',
+            sticky_key=channel_id,
             headers=headers,
             json=json_data,
         )
@@ -180,10 +184,16 @@ def get_videos(channel_id, save_to_db=None):
         # Save to database if requested
         if save_to_db and extracted_videos:
             try:
-                from database import VideoRepository
-                # Ensure video items include channel_id for DB upsert
-                stats = VideoRepository.upsert_videos_batch(extracted_videos)
-                print(f"Database save completed: {stats} videos processed")
+                from database import VideoRepository, get_write_behind, write_behind_enabled
+                if write_behind_enabled():
+                    # Returns immediately; the background flusher batches the upserts
+                    get_write_behind().enqueue_videos(extracted_videos)
+                    print(f"Queued {len(extracted_videos)} videos for database write")
+                else:
+                    # Ensure video items include channel_id for DB upsert
+                    stats = VideoRepository.upsert_videos_diff(extracted_videos)
+                    print(f"Database save completed: {stats['new']} new, {stats['changed']} changed, "
+                          f"{stats['unchanged']} unchanged")
             except Exception as db_error:
                 print(f"Error saving to database: {db_error}")
                 # Continue execution even if database save fails
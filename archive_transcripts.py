@@ -0,0 +1,60 @@
+"""
+Move old transcripts from the transcripts table into cold-storage shards.
+
+Transcripts fetched more than --older-than-days ago are written to compressed,
+append-only shards under TRANSCRIPT_ARCHIVE_DIR (or --archive-dir), and their
+hot rows are reduced to 'archived' stubs. TranscriptRepository.get_transcript
+reads archived transcripts from the shards transparently, so the shards must
+be available wherever transcripts are read. Run one archiver at a time.
+
+Usage examples:
+  python archive_transcripts.py --older-than-days 7
+  python archive_transcripts.py --older-than-days 30 --archive-dir /data/transcript_archive
+  python archive_transcripts.py --video-id <VIDEO_ID>
+  python archive_transcripts.py --purge-orphaned-payloads
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path so this script can run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import db_manager
+from database.transcript_archive import TranscriptArchive, archive_transcripts
+from database.transcript_payloads import purge_orphaned_payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tier old transcripts into compressed archive shards')
+    parser.add_argument('--older-than-days', type=int, default=7, help='Archive transcripts fetched more than this many days ago (default 7)')
+    parser.add_argument('--shard-records', type=int, default=10000, help='Transcripts per shard (default 10000)')
+    parser.add_argument('--archive-dir', default=os.getenv('TRANSCRIPT_ARCHIVE_DIR', 'transcript_archive'), help='Shard directory (default TRANSCRIPT_ARCHIVE_DIR)')
+    parser.add_argument('--video-id', default=None, help='Only look up this video in the archive and print it')
+    parser.add_argument('--purge-orphaned-payloads', action='store_true', help='Also delete deduplicated payloads no transcript references')
+
+    args = parser.parse_args()
+    archive = TranscriptArchive(args.archive_dir)
+
+    if args.video_id:
+        archive.refresh()
+        print(archive.get(args.video_id))
+        archive.close()
+        return
+
+    print('Initializing MySQL connection...')
+    db_manager.initialize()
+
+    try:
+        stats = archive_transcripts(args.older_than_days, shard_records=args.shard_records, archive=archive)
+        print(f"Archived {stats['archived']} transcripts into {stats['shards']} shards in {args.archive_dir}")
+        if args.purge_orphaned_payloads:
+            print(f"Purged {purge_orphaned_payloads()} orphaned transcript payloads")
+    finally:
+        archive.close()
+        db_manager.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,21 +4,74 @@ Database package initialization
 
 from .db_manager import (
     db_manager,
+    get_db_manager,
     init_database,
     close_database,
     get_db_connection,
-    get_db_cursor
+    get_db_cursor,
+    get_db_prepared_cursor,
+    retry_on_disconnect
 )
 
-from .video_repository import VideoRepository
-from .transcript_repository import TranscriptRepository
+from .storage import get_storage_backend, get_video_repository, get_transcript_repository
+
+# Repositories for the configured storage backend (DB_BACKEND=mysql|sqlite)
+VideoRepository = get_video_repository()
+TranscriptRepository = get_transcript_repository()
+
+from .cache import get_cache_stats
+
+from .instrumentation import get_query_stats
+
+from .channel_stats import ChannelStatsRepository, channel_stats_enabled
+
+from .change_log import ChangeLogRepository, ChangeLogConsumer, change_log_enabled
+
+from .migrations import apply_migrations, MigrationRunner
+
+from .video_stats import VideoStatsRepository, snapshots_enabled
+
+from .write_behind import WriteBehindBuffer, get_write_behind, write_behind_enabled
+
+from .async_db_manager import (
+    async_db_manager,
+    init_async_database,
+    close_async_database,
+    get_async_db_cursor
+)
+
+from .async_repositories import AsyncVideoRepository, AsyncTranscriptRepository
 
 __all__ = [
     'db_manager',
+    'get_db_manager',
     'init_database',
     'close_database',
     'get_db_connection',
     'get_db_cursor',
+    'get_db_prepared_cursor',
+    'retry_on_disconnect',
+    'get_storage_backend',
+    'get_cache_stats',
+    'get_query_stats',
     'VideoRepository',
-    'TranscriptRepository'
+    'TranscriptRepository',
+    'VideoStatsRepository',
+    'apply_migrations',
+    'ChannelStatsRepository',
+    'channel_stats_enabled',
+    'ChangeLogRepository',
+    'ChangeLogConsumer',
+    'change_log_enabled',
+    'MigrationRunner',
+    'snapshots_enabled',
+    'WriteBehindBuffer',
+    'get_write_behind',
+    'write_behind_enabled',
+    'async_db_manager',
+    'init_async_database',
+    'close_async_database',
+    'get_async_db_cursor',
+    'AsyncVideoRepository',
+    'AsyncTranscriptRepository'
 ]
@@ -0,0 +1,167 @@
+"""
+Asyncio database module for YouTube Crawler
+Async MySQL connection pool (aiomysql) over the same SSH tunnel configuration as DatabaseManager
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from database.db_manager import db_manager, DatabaseManager, logger
+
+try:
+    import aiomysql
+except ImportError:  # Optional dependency, only needed by the async layer
+    aiomysql = None
+
+
+class AsyncDatabaseManager:
+    """
+    Async counterpart of DatabaseManager.
+
+    Settings (credentials, pool size, max connection age) and the SSH tunnel are
+    taken from the shared DatabaseManager, so sync and async code in one process
+    use a single tunnel. Connections come from an aiomysql pool, so async
+    crawlers can write to the database without pushing work into threads.
+
+    When the tunnel supervisor reconnects, DatabaseManager.generation moves on;
+    the next checkout sees that and replaces the pool, whose connections went
+    through the old tunnel. Connections still in use close when released.
+    """
+
+    def __init__(self, manager: DatabaseManager = db_manager):
+        self._manager = manager
+        self._pool = None
+        self._generation = None
+        self._lock = asyncio.Lock()
+        # Replaced pools still draining their in-use connections
+        self._retiring = set()
+
+    async def initialize(self):
+        """Start the shared SSH tunnel if configured and create the async pool"""
+        if aiomysql is None:
+            raise ImportError("aiomysql is required for the async database layer: pip install aiomysql")
+
+        async with self._lock:
+            if self._pool is not None:
+                logger.info("Async connection pool already exists")
+                return
+
+            if self._manager.use_ssh:
+                # Starting the tunnel is a one-off blocking call
+                await asyncio.to_thread(self._manager.start_ssh_tunnel)
+                self._manager.start_tunnel_monitor()
+
+            await self._create_pool()
+
+    async def _create_pool(self):
+        """Open a pool to the current connection target; call with self._lock held"""
+        generation = self._manager.generation
+        db_host, db_port = self._manager.get_connection_target()
+        logger.info(f"Creating async connection pool to {db_host}:{db_port}")
+
+        self._pool = await aiomysql.create_pool(
+            host=db_host,
+            port=db_port,
+            user=self._manager.db_user,
+            password=self._manager.db_password,
+            db=self._manager.db_name,
+            minsize=1,
+            maxsize=self._manager.pool_size,
+            autocommit=False,
+            charset='utf8mb4',
+            pool_recycle=int(self._manager.pool_max_age) if self._manager.pool_max_age else -1
+        )
+        self._generation = generation
+        logger.info(f"Async connection pool created with up to {self._manager.pool_size} connections")
+
+    async def _current_pool(self):
+        """The pool for the current tunnel generation, rebuilt after a reconnect"""
+        if self._pool is None:
+            raise RuntimeError("Async database is not initialized: await init_async_database() first")
+        if self._generation != self._manager.generation:
+            async with self._lock:
+                if self._pool is not None and self._generation != self._manager.generation:
+                    old_pool = self._pool
+                    await self._create_pool()
+                    # Free connections close now, in-use ones when they are released
+                    old_pool.close()
+                    task = asyncio.ensure_future(old_pool.wait_closed())
+                    self._retiring.add(task)
+                    task.add_done_callback(self._retiring.discard)
+                    logger.info(f"Rebuilt async connection pool after reconnect (generation {self._generation})")
+        return self._pool
+
+    @asynccontextmanager
+    async def get_connection(self):
+        """
+        Async context manager for database connections.
+
+        Usage:
+            async with async_db_manager.get_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("SELECT * FROM videos")
+        """
+        pool = await self._current_pool()
+        async with pool.acquire() as connection:
+            try:
+                yield connection
+            except aiomysql.Error as e:
+                logger.error(f"Async database connection error: {e}")
+                await connection.rollback()
+                raise
+
+    @asynccontextmanager
+    async def get_cursor(self, dictionary=True):
+        """
+        Async context manager for a cursor; commits on success, rolls back on error.
+
+        Usage:
+            async with async_db_manager.get_cursor() as cursor:
+                await cursor.execute("SELECT * FROM videos")
+                results = await cursor.fetchall()
+        """
+        cursor_class = aiomysql.DictCursor if dictionary else aiomysql.Cursor
+        pool = await self._current_pool()
+        async with pool.acquire() as connection:
+            cursor = await connection.cursor(cursor_class)
+            try:
+                yield cursor
+                await connection.commit()
+            except aiomysql.Error as e:
+                logger.error(f"Async database cursor error: {e}")
+                await connection.rollback()
+                raise
+            finally:
+                await cursor.close()
+
+    async def cleanup(self):
+        """Close the async pool (the shared tunnel is left to DatabaseManager.cleanup)"""
+        if self._pool is not None:
+            logger.info("Closing async connection pool")
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+        if self._retiring:
+            await asyncio.gather(*self._retiring)
+
+
+# Global async database manager instance
+async_db_manager = AsyncDatabaseManager()
+
+
+async def init_async_database():
+    """Initialize async database connection"""
+    await async_db_manager.initialize()
+
+
+async def close_async_database():
+    """Close async database connection pool and the shared SSH tunnel"""
+    await async_db_manager.cleanup()
+    db_manager.cleanup()
+
+
+@asynccontextmanager
+async def get_async_db_cursor(dictionary=True):
+    """Get async database cursor (convenience wrapper)"""
+    async with async_db_manager.get_cursor(dictionary=dictionary) as cursor:
+        yield cursor
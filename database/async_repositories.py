@@ -0,0 +1,289 @@
+"""
+Async database operations for YouTube videos and transcripts
+
+Async variants of the VideoRepository and TranscriptRepository hot paths,
+sharing their SQL so both layers write identical rows. With DB_CHANNEL_STATS
+video writes go through the diff path and apply channel_stats deltas in the
+same transaction, like the sync repository. With DB_CHANGE_LOG video and
+transcript writes append change_events in the same transaction too, and
+transcripts are deduplicated (DB_TRANSCRIPT_DEDUP) and read back from
+transcript_payloads and the archive like the sync repository does. With
+DB_STATS_SNAPSHOTS every video write appends view-count snapshots, and with
+DB_KNOWN_VIDEO_INDEX batch writes skip unchanged videos and record what they
+wrote in the process-wide index shared with the sync repository. Writes
+invalidate the shared video/transcript caches once their transaction commits.
+"""
+
+from typing import List, Dict, Any, Optional
+
+from database.async_db_manager import get_async_db_cursor, aiomysql
+from database.cache import video_cache, transcript_cache
+from database.channel_stats import (
+    CHANNEL_STATS_DELTA_QUERY, channel_stats_enabled, channel_delta_rows, compute_channel_deltas
+)
+from database.change_log import (
+    CHANGE_EVENT_INSERT_QUERY, change_log_enabled, event_rows, transcript_event, video_events
+)
+from database.db_manager import logger
+from database.known_videos import known_videos_enabled, get_known_videos
+from database.video_stats import snapshots_enabled, async_append_snapshots
+from database.video_ids import encode_video_id, encode_video_params, decode_video_id, decode_video_row
+from database.video_repository import (
+    LOOKUP_BATCH_SIZE, UPSERT_BATCH_SIZE, VIDEO_UPSERT_QUERY, current_rows_query, diff_videos
+)
+from database.transcript_archive import load_archived
+from database.transcript_payloads import (
+    TRANSCRIPT_DEDUP_UPSERT_QUERY, transcript_dedup_enabled, async_dedup_transcript_rows, async_resolve_payloads
+)
+from database.transcript_repository import (
+    TRANSCRIPT_BATCH_SIZE,
+    TRANSCRIPT_UPSERT_QUERY,
+    VIDEOS_WITHOUT_TRANSCRIPTS_QUERY,
+    transcript_params,
+)
+
+
+async def _fetch_current(cursor, video_ids: List[str], for_update: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Read the tracked columns of stored videos keyed by video_id"""
+    current = {}
+    for start in range(0, len(video_ids), LOOKUP_BATCH_SIZE):
+        chunk = video_ids[start:start + LOOKUP_BATCH_SIZE]
+        await cursor.execute(current_rows_query(len(chunk), for_update),
+                             tuple(encode_video_id(video_id) for video_id in chunk))
+        current.update((row['video_id'], row) for row in map(decode_video_row, await cursor.fetchall()))
+    return current
+
+
+async def _append_events(cursor, events: List[tuple]):
+    """Insert change events with an open cursor, inside the caller's transaction"""
+    if events:
+        await cursor.executemany(CHANGE_EVENT_INSERT_QUERY, event_rows(events))
+
+
+class AsyncVideoRepository:
+    """Async repository for video database operations"""
+
+    @staticmethod
+    async def upsert_video(video_data: Dict[str, Any]) -> bool:
+        """Insert or update a single video"""
+        if channel_stats_enabled() or change_log_enabled():
+            # channel_stats and change events need the stored row, which the diff path reads
+            await AsyncVideoRepository.upsert_videos_diff([video_data])
+            return True
+
+        try:
+            async with get_async_db_cursor() as cursor:
+                await cursor.execute(VIDEO_UPSERT_QUERY, encode_video_params(video_data))
+                if snapshots_enabled():
+                    await async_append_snapshots(cursor, [video_data])
+                logger.info(f"Upserted video: {video_data['video_id']}")
+            video_cache.invalidate(video_data['video_id'])
+            return True
+        except aiomysql.Error as e:
+            logger.error(f"Error upserting video {video_data['video_id']}: {e}")
+            raise
+
+    @staticmethod
+    async def upsert_videos_batch(videos: List[Dict[str, Any]]) -> int:
+        """
+        Upsert multiple videos in a single transaction
+
+        Args:
+            videos: List of video dictionaries
+
+        Returns:
+            int: Number of videos processed
+        """
+        if not videos:
+            return 0
+        if channel_stats_enabled() or change_log_enabled():
+            await AsyncVideoRepository.upsert_videos_diff(videos)
+            return len(videos)
+
+        known_videos = get_known_videos() if known_videos_enabled() else None
+        to_write = videos
+        if known_videos is not None:
+            await known_videos.async_ensure_fresh()
+            to_write = known_videos.filter_changed(videos)
+
+        try:
+            async with get_async_db_cursor() as cursor:
+                # executemany rewrites this into multi-row INSERT statements
+                for start in range(0, len(to_write), UPSERT_BATCH_SIZE):
+                    chunk = to_write[start:start + UPSERT_BATCH_SIZE]
+                    await cursor.executemany(VIDEO_UPSERT_QUERY, [encode_video_params(video) for video in chunk])
+                # Unchanged videos are still snapshotted: the history records every crawl
+                if snapshots_enabled():
+                    await async_append_snapshots(cursor, videos)
+                skipped = len(videos) - len(to_write)
+                logger.info(f"Upserted {len(to_write)} videos" + (f", skipped {skipped} unchanged" if skipped else ""))
+            video_cache.invalidate_many(video['video_id'] for video in to_write)
+            if known_videos is not None:
+                known_videos.record(to_write)
+            return len(videos)
+        except aiomysql.Error as e:
+            logger.error(f"Error during batch upsert: {e}")
+            raise
+
+    @staticmethod
+    async def upsert_videos_diff(videos: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Upsert a batch, writing only new and changed rows (see VideoRepository.upsert_videos_diff)
+
+        Args:
+            videos: List of video dictionaries
+
+        Returns:
+            Dict with counts of 'new', 'changed' and 'unchanged' videos
+        """
+        all_ids = list(dict.fromkeys(video['video_id'] for video in videos))
+        maintain_stats = channel_stats_enabled()
+        log_changes = change_log_enabled()
+        known_videos = get_known_videos() if known_videos_enabled() else None
+
+        to_diff = videos
+        if known_videos is not None:
+            await known_videos.async_ensure_fresh()
+            to_diff = known_videos.filter_changed(videos)
+        video_ids = list(dict.fromkeys(video['video_id'] for video in to_diff))
+
+        try:
+            async with get_async_db_cursor() as cursor:
+                current = await _fetch_current(cursor, video_ids, for_update=maintain_stats or log_changes)
+                new, changed, unchanged = diff_videos(to_diff, current)
+                to_write = new + changed
+                for start in range(0, len(to_write), UPSERT_BATCH_SIZE):
+                    chunk = to_write[start:start + UPSERT_BATCH_SIZE]
+                    await cursor.executemany(VIDEO_UPSERT_QUERY, [encode_video_params(video) for video in chunk])
+                if maintain_stats:
+                    deltas = compute_channel_deltas(current, {video['video_id']: video for video in to_write})
+                    if deltas:
+                        await cursor.executemany(CHANNEL_STATS_DELTA_QUERY, channel_delta_rows(deltas))
+                if log_changes:
+                    await _append_events(cursor, video_events(current, to_write))
+                # Unchanged videos are still snapshotted: the history records every crawl
+                if snapshots_enabled():
+                    await async_append_snapshots(cursor, videos)
+
+            unchanged += len(all_ids) - len(video_ids)
+            counts = {'new': len(new), 'changed': len(changed), 'unchanged': unchanged}
+            logger.info(f"Diff upsert of {len(all_ids)} videos: {counts}")
+            video_cache.invalidate_many(video['video_id'] for video in to_write)
+            if known_videos is not None:
+                known_videos.record(to_write)
+            return counts
+        except aiomysql.Error as e:
+            logger.error(f"Error during diff upsert: {e}")
+            raise
+
+    @staticmethod
+    async def get_video(video_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single video by ID"""
+        try:
+            async with get_async_db_cursor() as cursor:
+                await cursor.execute("SELECT * FROM videos WHERE video_id = %s", (encode_video_id(video_id),))
+                return decode_video_row(await cursor.fetchone())
+        except aiomysql.Error as e:
+            logger.error(f"Error retrieving video {video_id}: {e}")
+            raise
+
+
+class AsyncTranscriptRepository:
+    """Async repository for transcripts table operations"""
+
+    @staticmethod
+    async def upsert_transcript(video_id: str, transcript_raw: Optional[Any] = None, status: str = 'fetched', error_message: Optional[str] = None) -> bool:
+        """Insert or update raw transcript data for a video."""
+        params = transcript_params(video_id, transcript_raw, status, error_message)
+
+        try:
+            async with get_async_db_cursor() as cursor:
+                if transcript_dedup_enabled():
+                    rows = await async_dedup_transcript_rows(cursor, [params])
+                    if not rows:
+                        logger.info(f"Transcript for video {video_id} unchanged, skipped")
+                        return True
+                    await cursor.execute(TRANSCRIPT_DEDUP_UPSERT_QUERY, rows[0])
+                else:
+                    await cursor.execute(TRANSCRIPT_UPSERT_QUERY, params)
+                if status == 'fetched' and change_log_enabled():
+                    await _append_events(cursor, [transcript_event(video_id, transcript_raw)])
+                logger.info(f"Upserted transcript for video: {video_id} (status={status})")
+            transcript_cache.invalidate(video_id)
+            return True
+        except aiomysql.Error as e:
+            logger.error(f"Error upserting transcript for {video_id}: {e}")
+            raise
+
+    @staticmethod
+    async def upsert_transcripts_batch(transcripts: List[Dict[str, Any]]) -> int:
+        """
+        Upsert multiple transcripts in a single transaction
+
+        Args:
+            transcripts: Dicts with video_id and optional transcript_raw, status, error_message
+
+        Returns:
+            int: Number of transcripts processed
+        """
+        if not transcripts:
+            return 0
+
+        rows = [
+            transcript_params(
+                t['video_id'],
+                t.get('transcript_raw'),
+                t.get('status', 'fetched'),
+                t.get('error_message'),
+            )
+            for t in transcripts
+        ]
+
+        dedup = transcript_dedup_enabled()
+        upsert_query = TRANSCRIPT_DEDUP_UPSERT_QUERY if dedup else TRANSCRIPT_UPSERT_QUERY
+
+        try:
+            async with get_async_db_cursor() as cursor:
+                to_write = await async_dedup_transcript_rows(cursor, rows) if dedup else rows
+                for start in range(0, len(to_write), TRANSCRIPT_BATCH_SIZE):
+                    await cursor.executemany(upsert_query, to_write[start:start + TRANSCRIPT_BATCH_SIZE])
+                written = {row['video_id'] for row in to_write} if dedup else None
+                if change_log_enabled():
+                    await _append_events(cursor, [
+                        transcript_event(t['video_id'], t.get('transcript_raw'))
+                        for t in transcripts
+                        if t.get('status', 'fetched') == 'fetched'
+                        and (written is None or encode_video_id(t['video_id']) in written)
+                    ])
+                skipped = len(rows) - len(to_write)
+                logger.info(f"Upserted {len(to_write)} transcripts" + (f", skipped {skipped} unchanged" if skipped else ""))
+            transcript_cache.invalidate_many(t['video_id'] for t in transcripts)
+            return len(rows)
+        except aiomysql.Error as e:
+            logger.error(f"Error during batch transcript upsert: {e}")
+            raise
+
+    @staticmethod
+    async def get_transcript(video_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            async with get_async_db_cursor() as cursor:
+                await cursor.execute("SELECT * FROM transcripts WHERE video_id = %s", (encode_video_id(video_id),))
+                result = decode_video_row(await cursor.fetchone())
+                await async_resolve_payloads(cursor, [result])
+            # Archived rows are stubs; the payload lives in the cold-storage shards
+            return load_archived(result)
+        except aiomysql.Error as e:
+            logger.error(f"Error retrieving transcript for {video_id}: {e}")
+            raise
+
+    @staticmethod
+    async def get_videos_without_transcripts(limit: int = 100, offset: int = 0) -> List[str]:
+        """Return a list of video_ids that don't yet have a transcript stored."""
+        try:
+            async with get_async_db_cursor() as cursor:
+                await cursor.execute(VIDEOS_WITHOUT_TRANSCRIPTS_QUERY, (limit, offset))
+                rows = await cursor.fetchall()
+                return [decode_video_id(r['video_id']) for r in rows]
+        except aiomysql.Error as e:
+            logger.error(f"Error fetching videos without transcripts: {e}")
+            raise
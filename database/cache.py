@@ -0,0 +1,111 @@
+"""
+In-process read-through cache for repository point lookups
+
+Size-bounded LRU with a per-entry TTL. Disabled unless DB_CACHE_SIZE > 0.
+Repository writes invalidate the affected IDs, so a process always reads
+its own writes; other writers become visible after at most DB_CACHE_TTL seconds.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable
+
+# Returned by LRUCache.get when the key is not cached (None is a cacheable value)
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with TTL expiry and hit/miss counters.
+
+    Args:
+        max_size: Maximum number of entries; 0 disables the cache
+        ttl: Seconds an entry stays valid; 0 means no expiry
+    """
+
+    def __init__(self, max_size: int = 0, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value, or MISSING if absent or expired"""
+        if not self.enabled:
+            return MISSING
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if not expires_at or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_many(self, keys: Iterable[Hashable]):
+        if not self.enabled:
+            return
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache_size = int(os.getenv('DB_CACHE_SIZE', 0))
+_cache_ttl = float(os.getenv('DB_CACHE_TTL', 300))
+
+# Caches for VideoRepository.get_video / get_videos_by_ids and TranscriptRepository.get_transcript
+video_cache = LRUCache(max_size=_cache_size, ttl=_cache_ttl)
+transcript_cache = LRUCache(max_size=_cache_size, ttl=_cache_ttl)
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters for the repository caches"""
+    return {
+        'videos': video_cache.get_stats(),
+        'transcripts': transcript_cache.get_stats(),
+    }
@@ -0,0 +1,297 @@
+"""
+Change-data-capture outbox for downstream consumers
+
+With DB_CHANGE_LOG=true the video and transcript repository write paths
+(sync and async) append events to change_events in the same transaction as the change
+itself, so an event exists exactly when its change committed:
+
+    video_inserted      payload: channel_id, published_time, view_count
+    view_count_changed  payload: old, new
+    video_deleted       payload: channel_id, view_count (as last stored)
+    transcript_fetched  payload: segments
+
+Consumers read events in seq order with ChangeLogConsumer and store their
+position in change_consumers. AUTO_INCREMENT values are handed out before
+commit, so a lower seq can become visible after a higher one; read_events()
+stops at a gap until it is older than gap_timeout seconds (after which it is
+a rolled-back insert or a purged/compacted event) and never skips one that
+may still commit.
+
+purge() drops events past the retention period and compact() keeps only the
+latest view_count_changed event per video among older events. A consumer
+that falls further behind than the retention period should resync from a
+full export. The async repositories write the same events; raw SQL does not.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from database.db_manager import get_db_cursor, logger, retry_on_disconnect
+from database.video_ids import video_id_column_type, encode_video_id, decode_video_row
+from mysql.connector import Error
+
+VIDEO_INSERTED = 'video_inserted'
+VIEW_COUNT_CHANGED = 'view_count_changed'
+VIDEO_DELETED = 'video_deleted'
+TRANSCRIPT_FETCHED = 'transcript_fetched'
+
+CHANGE_EVENTS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    seq BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    event_type VARCHAR(32) NOT NULL,
+    video_id {id_type} NOT NULL,
+    channel_id VARCHAR(64) NULL,
+    payload JSON NULL,
+    created_at TIMESTAMP(3) DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_created_at (created_at),
+    INDEX idx_type_video (event_type, video_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+CHANGE_CONSUMERS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS change_consumers (
+    consumer VARCHAR(100) PRIMARY KEY,
+    last_seq BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+CHANGE_EVENT_INSERT_QUERY = """
+INSERT INTO change_events (event_type, video_id, channel_id, payload)
+VALUES (%s, %s, %s, %s)
+"""
+
+
+def change_log_enabled() -> bool:
+    """True when DB_CHANGE_LOG=true: repository writes append to change_events"""
+    return os.getenv('DB_CHANGE_LOG', 'false').lower() == 'true'
+
+
+def video_events(before: Dict[str, Dict[str, Any]], written: Iterable[Dict[str, Any]]) -> List[tuple]:
+    """
+    Events for videos written over the stored rows
+
+    Args:
+        before: Stored rows keyed by video_id (absent = inserted)
+        written: Video dictionaries as written
+
+    Returns:
+        List of (event_type, video_id, channel_id, payload) tuples
+    """
+    events = []
+    for video in written:
+        stored = before.get(video['video_id'])
+        if stored is None:
+            events.append((VIDEO_INSERTED, video['video_id'], video.get('channel_id'), {
+                'channel_id': video.get('channel_id'),
+                'published_time': video.get('published_time'),
+                'view_count': video.get('view_count'),
+            }))
+        elif stored.get('view_count') != video.get('view_count'):
+            events.append((VIEW_COUNT_CHANGED, video['video_id'], video.get('channel_id'), {
+                'old': stored.get('view_count'),
+                'new': video.get('view_count'),
+            }))
+    return events
+
+
+def deleted_video_event(stored: Dict[str, Any]) -> tuple:
+    """Event for a stored row that was deleted"""
+    return (VIDEO_DELETED, stored['video_id'], stored.get('channel_id'), {
+        'channel_id': stored.get('channel_id'),
+        'view_count': stored.get('view_count'),
+    })
+
+
+def transcript_event(video_id: str, transcript_raw: Optional[Any]) -> tuple:
+    segments = len(transcript_raw) if isinstance(transcript_raw, list) else None
+    return (TRANSCRIPT_FETCHED, video_id, None, {'segments': segments})
+
+
+def event_rows(events: List[tuple]) -> List[tuple]:
+    """Parameters for CHANGE_EVENT_INSERT_QUERY"""
+    return [
+        (event_type, encode_video_id(video_id), channel_id, json.dumps(payload, default=str))
+        for event_type, video_id, channel_id, payload in events
+    ]
+
+
+def append_events(cursor, events: List[tuple]):
+    """Insert events with an open cursor, inside the caller's transaction"""
+    if events:
+        cursor.executemany(CHANGE_EVENT_INSERT_QUERY, event_rows(events))
+
+
+def contiguous_prefix(rows: List[Dict[str, Any]], after_seq: int) -> List[Dict[str, Any]]:
+    """Rows up to the first gap in seq that is not yet settled (may still commit)"""
+    expected = after_seq + 1
+    for index, row in enumerate(rows):
+        if row['seq'] != expected and not row['settled']:
+            return rows[:index]
+        expected = row['seq'] + 1
+    return rows
+
+
+class ChangeLogRepository:
+    """Repository for the change_events outbox and consumer positions"""
+
+    @staticmethod
+    @retry_on_disconnect
+    def create_tables():
+        """Create change_events and change_consumers tables if they don't exist"""
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(CHANGE_EVENTS_TABLE_DDL.format(table='change_events', id_type=video_id_column_type()))
+                cursor.execute(CHANGE_CONSUMERS_TABLE_DDL)
+                logger.info("Change log tables created or already exist")
+                return True
+        except Error as e:
+            logger.error(f"Error creating change log tables: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def read_events(after_seq: int, limit: int = 1000, gap_timeout: float = 30.0) -> List[Dict[str, Any]]:
+        """
+        Events with seq > after_seq in seq order
+
+        Args:
+            after_seq: Last seq already processed
+            limit: Maximum events returned
+            gap_timeout: Seconds after which a gap in seq is treated as permanent
+
+        Returns:
+            List of event dicts (seq, event_type, video_id, channel_id, payload, created_at)
+        """
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute("""
+                SELECT seq, event_type, video_id, channel_id, payload, created_at,
+                       created_at < NOW(3) - INTERVAL %s SECOND AS settled
+                FROM change_events
+                WHERE seq > %s
+                ORDER BY seq
+                LIMIT %s
+                """, (gap_timeout, after_seq, limit))
+                rows = contiguous_prefix(cursor.fetchall(), after_seq)
+            for row in rows:
+                decode_video_row(row)
+                row['payload'] = json.loads(row['payload']) if row['payload'] else None
+                del row['settled']
+            return rows
+        except Error as e:
+            logger.error(f"Error reading change events after {after_seq}: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def get_position(consumer: str) -> int:
+        """Last seq committed by a consumer (0 for a new consumer)"""
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute("SELECT last_seq FROM change_consumers WHERE consumer = %s", (consumer,))
+                row = cursor.fetchone()
+                return row['last_seq'] if row else 0
+        except Error as e:
+            logger.error(f"Error reading position of consumer {consumer}: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def commit_position(consumer: str, seq: int):
+        """Store a consumer's position; it never moves backwards"""
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute("""
+                INSERT INTO change_consumers (consumer, last_seq) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE last_seq = GREATEST(last_seq, VALUES(last_seq))
+                """, (consumer, seq))
+        except Error as e:
+            logger.error(f"Error committing position of consumer {consumer}: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def purge(retention_days: int, chunk_size: int = 10000) -> int:
+        """
+        Delete events older than retention_days, chunk_size rows per transaction
+
+        Returns:
+            int: Number of events deleted
+        """
+        deleted = 0
+        try:
+            while True:
+                with get_db_cursor() as cursor:
+                    cursor.execute(
+                        "DELETE FROM change_events WHERE created_at < NOW() - INTERVAL %s DAY ORDER BY seq LIMIT %s",
+                        (retention_days, chunk_size)
+                    )
+                    deleted += cursor.rowcount
+                    if cursor.rowcount < chunk_size:
+                        break
+            logger.info(f"Purged {deleted} change events older than {retention_days} days")
+            return deleted
+        except Error as e:
+            logger.error(f"Error purging change events: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def compact(older_than_minutes: int = 60) -> int:
+        """
+        Keep only the latest view_count_changed event per video among events
+        older than older_than_minutes; newer events are left for live consumers
+
+        Returns:
+            int: Number of events deleted
+        """
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute("""
+                DELETE e FROM change_events e
+                JOIN (
+                    SELECT video_id, MAX(seq) AS latest_seq
+                    FROM change_events
+                    WHERE event_type = %s AND created_at < NOW() - INTERVAL %s MINUTE
+                    GROUP BY video_id
+                ) latest ON e.video_id = latest.video_id
+                WHERE e.event_type = %s AND e.seq < latest.latest_seq
+                """, (VIEW_COUNT_CHANGED, older_than_minutes, VIEW_COUNT_CHANGED))
+                deleted = cursor.rowcount
+            logger.info(f"Compacted {deleted} superseded view count events")
+            return deleted
+        except Error as e:
+            logger.error(f"Error compacting change events: {e}")
+            raise
+
+
+class ChangeLogConsumer:
+    """
+    Named reader of change_events that resumes from its committed position
+
+    Usage:
+        consumer = ChangeLogConsumer('search-indexer')
+        while True:
+            events = consumer.poll()
+            handle(events)
+            consumer.commit()
+    """
+
+    def __init__(self, name: str, batch_size: int = 1000, gap_timeout: float = 30.0):
+        self.name = name
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout
+        self.position = ChangeLogRepository.get_position(name)
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Next batch of events after the current position (advances the in-memory position)"""
+        events = ChangeLogRepository.read_events(self.position, self.batch_size, self.gap_timeout)
+        if events:
+            self.position = events[-1]['seq']
+        return events
+
+    def commit(self):
+        """Persist the position reached by poll()"""
+        ChangeLogRepository.commit_position(self.name, self.position)
@@ -0,0 +1,184 @@
+"""
+Materialized per-channel aggregates
+
+channel_stats holds video count, total views and latest upload per channel,
+plus a row for all channels (ALL_CHANNELS) that answers get_video_count.
+With DB_CHANNEL_STATS=true the VideoRepository write paths lock the rows they
+touch, compute before/after deltas and apply them in the same transaction,
+so reads are single-row lookups instead of scans over videos.
+
+latest_published only moves forward; deleting a channel's newest video leaves
+it in place until rebuild() recomputes everything from videos.
+
+Writers lock videos rows before channel_stats rows, and rebuild() takes its
+locks in the same order. The async repositories apply the same deltas. The
+SQLite backend computes its stats by scanning its own videos table, and rows
+it syncs to MySQL go through the VideoRepository write paths.
+"""
+
+import os
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from database.db_manager import get_db_cursor, logger, retry_on_disconnect
+from mysql.connector import Error
+
+# channel_id of the row aggregating every video
+ALL_CHANNELS = '*'
+
+CHANNEL_STATS_DELTA_QUERY = """
+INSERT INTO channel_stats (channel_id, video_count, total_views, latest_published)
+VALUES (%s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    video_count = video_count + VALUES(video_count),
+    total_views = total_views + VALUES(total_views),
+    latest_published = GREATEST(
+        COALESCE(latest_published, VALUES(latest_published)),
+        COALESCE(VALUES(latest_published), latest_published)
+    )
+"""
+
+
+def channel_stats_enabled() -> bool:
+    """True when DB_CHANNEL_STATS=true: video writes maintain channel_stats"""
+    return os.getenv('DB_CHANNEL_STATS', 'false').lower() == 'true'
+
+
+def compute_channel_deltas(before: Dict[str, Optional[Dict[str, Any]]],
+                           after: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, list]:
+    """
+    Per-channel changes caused by replacing the before rows with the after rows
+
+    Args:
+        before: Stored rows (None if absent) keyed by video_id
+        after: Rows as written (None if deleted) keyed by video_id
+
+    Returns:
+        Dict of channel_id -> [video_count delta, total_views delta, latest published_time]
+    """
+    deltas = defaultdict(lambda: [0, 0, None])
+
+    def add(channel_id, count, views, published=None):
+        for key in (channel_id, ALL_CHANNELS):
+            delta = deltas[key]
+            delta[0] += count
+            delta[1] += views
+            if published is not None and (delta[2] is None or published > delta[2]):
+                delta[2] = published
+
+    for video_id, new in after.items():
+        old = before.get(video_id)
+        if old is not None:
+            add(old['channel_id'], -1, -(old['view_count'] or 0))
+        if new is not None:
+            add(new['channel_id'], 1, new['view_count'] or 0, new.get('published_time'))
+
+    # Drop no-op entries (e.g. a row rewritten with identical values)
+    return {channel_id: delta for channel_id, delta in deltas.items() if delta[0] or delta[1] or delta[2]}
+
+
+def channel_delta_rows(deltas: Dict[str, list]) -> List[tuple]:
+    """Parameters for CHANNEL_STATS_DELTA_QUERY, in channel order so concurrent writers lock rows consistently"""
+    return [(channel_id, *deltas[channel_id]) for channel_id in sorted(deltas)]
+
+
+def apply_channel_deltas(cursor, deltas: Dict[str, list]):
+    """Apply deltas with an open cursor"""
+    if deltas:
+        cursor.executemany(CHANNEL_STATS_DELTA_QUERY, channel_delta_rows(deltas))
+
+
+class ChannelStatsRepository:
+    """Repository for the materialized channel_stats table"""
+
+    @staticmethod
+    @retry_on_disconnect
+    def create_table():
+        """Create channel_stats table if it doesn't exist"""
+        create_table_query = """
+        CREATE TABLE IF NOT EXISTS channel_stats (
+            channel_id VARCHAR(64) PRIMARY KEY,
+            video_count BIGINT NOT NULL DEFAULT 0,
+            total_views BIGINT NOT NULL DEFAULT 0,
+            latest_published DATETIME NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(create_table_query)
+                logger.info("Channel stats table created or already exists")
+                return True
+        except Error as e:
+            logger.error(f"Error creating channel_stats table: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def rebuild() -> int:
+        """
+        Recompute channel_stats from videos in one transaction
+
+        The aggregate is computed into a temporary staging table first. Under
+        REPEATABLE READ that read share-locks the videos rows, so writers
+        wait until the rebuild commits. channel_stats is replaced from the
+        staging table only afterwards. Writers also lock videos before
+        channel_stats, so the two never deadlock and no delta is lost, and
+        crawlers can keep running.
+
+        Returns:
+            int: Number of channels
+        """
+        try:
+            with get_db_cursor() as cursor:
+                # Temporary tables are per connection and do not commit the transaction
+                cursor.execute("DROP TEMPORARY TABLE IF EXISTS channel_stats_staging")
+                cursor.execute("""
+                CREATE TEMPORARY TABLE channel_stats_staging (
+                    channel_id VARCHAR(64) PRIMARY KEY,
+                    video_count BIGINT NOT NULL,
+                    total_views BIGINT NOT NULL,
+                    latest_published DATETIME NULL
+                ) ENGINE=InnoDB
+                """)
+                cursor.execute("""
+                INSERT INTO channel_stats_staging (channel_id, video_count, total_views, latest_published)
+                SELECT channel_id, COUNT(*), COALESCE(SUM(view_count), 0), MAX(published_time)
+                FROM videos
+                GROUP BY channel_id
+                """)
+                channels = cursor.rowcount
+                cursor.execute("DELETE FROM channel_stats")
+                cursor.execute("""
+                INSERT INTO channel_stats (channel_id, video_count, total_views, latest_published)
+                SELECT channel_id, video_count, total_views, latest_published FROM channel_stats_staging
+                """)
+                # A temporary table can only be referenced once per statement, so the totals row is separate
+                cursor.execute("""
+                INSERT INTO channel_stats (channel_id, video_count, total_views, latest_published)
+                SELECT %s, COALESCE(SUM(video_count), 0), COALESCE(SUM(total_views), 0), MAX(latest_published)
+                FROM channel_stats_staging
+                """, (ALL_CHANNELS,))
+                cursor.execute("DROP TEMPORARY TABLE channel_stats_staging")
+            logger.info(f"Rebuilt channel stats for {channels} channels")
+            return channels
+        except Error as e:
+            logger.error(f"Error rebuilding channel stats: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def get_channel_stats(channel_id: str) -> Optional[Dict[str, Any]]:
+        """Get the materialized row for a channel (ALL_CHANNELS for the totals)"""
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(
+                    "SELECT channel_id, video_count, total_views, latest_published "
+                    "FROM channel_stats WHERE channel_id = %s",
+                    (channel_id,)
+                )
+                return cursor.fetchone()
+        except Error as e:
+            logger.error(f"Error retrieving channel stats for {channel_id}: {e}")
+            raise
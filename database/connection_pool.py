@@ -0,0 +1,279 @@
+"""
+Blocking MySQL connection pool
+
+Unlike mysql.connector.pooling.MySQLConnectionPool, callers that find every
+connection checked out wait (up to an acquire timeout) for one to be returned
+instead of failing immediately. Idle connections are validated before reuse,
+connections are recycled after a maximum age, and wait/utilization metrics are
+kept for monitoring.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional
+
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled connection.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to the pool instead of disconnecting it.
+    """
+
+    def __init__(self, pool: 'BlockingConnectionPool', cnx: Any, created_at: float):
+        self._pool = pool
+        self._cnx = cnx
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        if self._cnx is None:
+            raise PoolError("Connection has already been returned to the pool")
+        return getattr(self._cnx, name)
+
+    def is_connected(self) -> bool:
+        return self._cnx is not None and self._cnx.is_connected()
+
+    def prepared_cursor(self, operation: str, dictionary: bool = True):
+        """Prepared cursor for `operation`, kept for the lifetime of the underlying connection"""
+        if self._cnx is None:
+            raise PoolError("Connection has already been returned to the pool")
+        return self._pool._prepared_cursor(self._cnx, operation, dictionary)
+
+    def close(self):
+        """Return the connection to the pool (idempotent)"""
+        if self._cnx is None:
+            return
+        cnx, self._cnx = self._cnx, None
+        self._pool._release(cnx, self._created_at)
+
+
+class BlockingConnectionPool:
+    """
+    Fixed-size connection pool whose get_connection() waits for a free slot.
+
+    Args:
+        connection_factory: Callable returning a new, open connection
+        pool_size: Maximum number of open connections
+        acquire_timeout: Seconds to wait for a connection before raising PoolError
+        max_age: Seconds after which a connection is closed and replaced (0 disables)
+        validate_idle_after: Idle seconds after which a connection is pinged before reuse
+        prefill: Open all pool_size connections up front
+        max_prepared: Prepared statements cached per connection (least recently used are closed)
+    """
+
+    def __init__(self, connection_factory: Callable[[], Any], pool_size: int = 5,
+                 acquire_timeout: float = 30.0, max_age: float = 3600.0,
+                 validate_idle_after: float = 30.0, prefill: bool = True, max_prepared: int = 64):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+
+        self._factory = connection_factory
+        self.pool_size = pool_size
+        self.acquire_timeout = acquire_timeout
+        self.max_age = max_age
+        self.validate_idle_after = validate_idle_after
+        self.max_prepared = max_prepared
+        # id(connection) -> OrderedDict of (operation, dictionary) -> prepared cursor
+        self._statements: Dict[int, OrderedDict] = {}
+
+        self._cond = threading.Condition()
+        # Idle entries are (connection, created_at, returned_at); used LIFO
+        self._idle = deque()
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._stats = {
+            'acquisitions': 0,
+            'timeouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'invalidated': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'peak_in_use': 0,
+            'statements_prepared': 0,
+        }
+
+        if prefill:
+            try:
+                for _ in range(pool_size):
+                    cnx = self._create()
+                    now = time.monotonic()
+                    self._idle.append((cnx, now, now))
+                    self._open += 1
+            except Exception:
+                # The pool is never handed out, so nothing else would close what was opened
+                self.close_all()
+                raise
+
+    def _create(self):
+        cnx = self._factory()
+        with self._cond:
+            self._stats['created'] += 1
+        return cnx
+
+    def _discard(self, cnx):
+        # Prepared statements die with their session
+        self._statements.pop(id(cnx), None)
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+    def _prepared_cursor(self, cnx, operation: str, dictionary: bool):
+        # Only the thread holding cnx touches its cache
+        cache = self._statements.setdefault(id(cnx), OrderedDict())
+        key = (operation, dictionary)
+        cursor = cache.get(key)
+        if cursor is not None:
+            cache.move_to_end(key)
+            return cursor
+        if len(cache) >= self.max_prepared:
+            _, evicted = cache.popitem(last=False)
+            try:
+                evicted.close()
+            except Error:
+                pass
+        cursor = cache[key] = cnx.cursor(prepared=True, dictionary=dictionary)
+        with self._cond:
+            self._stats['statements_prepared'] += 1
+        return cursor
+
+    def get_connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Check out a connection, waiting up to `timeout` (default acquire_timeout) seconds.
+
+        Raises:
+            PoolError: If no connection became available in time
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        entry = None
+
+        with self._cond:
+            if self._closed:
+                raise PoolError("Connection pool is closed")
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._open < self.pool_size:
+                        # Reserve a slot; the connection is opened outside the lock
+                        self._open += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolError(
+                            f"Timed out after {timeout:.1f}s waiting for a connection "
+                            f"(pool_size={self.pool_size})"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            waited = time.monotonic() - started
+            self._in_use += 1
+            self._stats['acquisitions'] += 1
+            self._stats['total_wait_seconds'] += waited
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+            self._stats['peak_in_use'] = max(self._stats['peak_in_use'], self._in_use)
+
+        try:
+            cnx, created_at = self._checkout(entry)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, cnx, created_at)
+
+    def _checkout(self, entry):
+        """Validate or recycle an idle entry, opening a new connection when needed."""
+        now = time.monotonic()
+        if entry is not None:
+            cnx, created_at, returned_at = entry
+            if self.max_age and now - created_at > self.max_age:
+                self._discard(cnx)
+                with self._cond:
+                    self._stats['recycled'] += 1
+            elif now - returned_at > self.validate_idle_after and not self._is_alive(cnx):
+                self._discard(cnx)
+                with self._cond:
+                    self._stats['invalidated'] += 1
+                logger.warning("Discarded stale pooled connection")
+            else:
+                return cnx, created_at
+
+        return self._create(), time.monotonic()
+
+    @staticmethod
+    def _is_alive(cnx) -> bool:
+        try:
+            return cnx.is_connected()
+        except Exception:
+            return False
+
+    def _release(self, cnx, created_at):
+        """Take a connection back from a caller; broken connections free their slot."""
+        healthy = True
+        try:
+            if getattr(cnx, 'in_transaction', False):
+                cnx.rollback()
+        except Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._closed:
+                self._idle.append((cnx, created_at, time.monotonic()))
+                cnx = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+
+        if cnx is not None:
+            self._discard(cnx)
+
+    def close_all(self):
+        """Close idle connections and refuse new checkouts; in-use ones close on return"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+
+        for cnx, _, _ in idle:
+            self._discard(cnx)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of pool utilization and acquire-wait metrics"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'pool_size': self.pool_size,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'utilization': self._in_use / self.pool_size,
+            })
+        acquisitions = stats['acquisitions']
+        stats['avg_wait_seconds'] = stats['total_wait_seconds'] / acquisitions if acquisitions else 0.0
+        return stats
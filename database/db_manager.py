@@ -4,14 +4,24 @@ Handles MySQL connections via SSH tunnel with connection pooling and best practi
 """
 
 import mysql.connector
-from mysql.connector import pooling, Error
+from mysql.connector import Error
+from mysql.connector.errors import InterfaceError, OperationalError, PoolError
 from sshtunnel import SSHTunnelForwarder
 import os
+import socket
+import threading
+import time
+import functools
 from dotenv import load_dotenv
 import logging
 from contextlib import contextmanager
 from typing import Optional, Dict, Any, List
 
+from database.connection_pool import BlockingConnectionPool
+from database.instrumentation import query_stats, InstrumentedConnection, InstrumentedCursor
+from database.prepared_statements import PreparedStatementCursor, prepared_statements_enabled
+from database.storage import get_storage_backend
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +32,30 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Client error codes meaning the server/tunnel went away:
+# 2003 can't connect, 2006 server has gone away, 2013 lost connection, 2055 lost connection (pure driver)
+DISCONNECT_ERRNOS = {2003, 2006, 2013, 2055}
+
+
+def is_disconnect_error(error: Exception) -> bool:
+    """True if a MySQL error indicates a dropped connection rather than a bad query"""
+    return isinstance(error, (OperationalError, InterfaceError)) and error.errno in DISCONNECT_ERRNOS
+
+
+def commit_outcome_unknown(error: Exception) -> bool:
+    """True if the connection dropped during COMMIT, so the server may or may not have applied it"""
+    return getattr(error, 'during_commit', False)
+
+
+def _commit(connection):
+    """Commit, flagging a disconnect on the way as one whose outcome is unknown"""
+    try:
+        connection.commit()
+    except Error as e:
+        if is_disconnect_error(e):
+            e.during_commit = True
+        raise
+
 
 class DatabaseManager:
     """
@@ -54,6 +88,9 @@ class DatabaseManager:
         self.ssh_user = os.getenv('SSH_USER')
         self.ssh_password = os.getenv('SSH_PASSWORD')
         self.ssh_key_path = os.getenv('SSH_KEY_PATH')
+        # Seconds between SSH keepalive packets and between tunnel health checks
+        self.ssh_keepalive = float(os.getenv('SSH_KEEPALIVE', 30))
+        self.ssh_monitor_interval = float(os.getenv('SSH_MONITOR_INTERVAL', 15))
         
         # Database Configuration
         self.remote_db_host = os.getenv('REMOTE_DB_HOST', '127.0.0.1')
@@ -67,6 +104,23 @@ class DatabaseManager:
         # Connection pool configuration
         self.pool_name = "youtube_crawler_pool"
         self.pool_size = int(os.getenv('DB_POOL_SIZE', 5))
+        self.pool_acquire_timeout = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', 30))
+        self.pool_max_age = float(os.getenv('DB_POOL_MAX_AGE', 3600))
+        self.pool_validate_idle_after = float(os.getenv('DB_POOL_VALIDATE_IDLE_AFTER', 30))
+        
+        # Use the C extension driver (faster protocol parsing) when available
+        self.use_c_extension = os.getenv('DB_USE_C_EXTENSION', 'false').lower() == 'true'
+        
+        # Tunnel supervision state; generation increases on every reconnect
+        self._active = False
+        self.generation = 0
+        self.reconnect_count = 0
+        self._reconnect_lock = threading.Lock()
+        self._monitor_thread = None
+        self._monitor_stop = threading.Event()
+        
+        # Callables run by cleanup() before the pool is closed (e.g. final buffer flushes)
+        self._shutdown_hooks = []
         
     def start_ssh_tunnel(self):
         """Start SSH tunnel if not already running"""
@@ -97,7 +151,8 @@ class DatabaseManager:
                 ssh_username=self.ssh_user,
                 **ssh_auth,
                 remote_bind_address=(self.remote_db_host, self.remote_db_port),
-                local_bind_address=('127.0.0.1', self.local_bind_port)
+                local_bind_address=('127.0.0.1', self.local_bind_port),
+                set_keepalive=self.ssh_keepalive
             )
             
             self._tunnel.start()
@@ -113,27 +168,111 @@ class DatabaseManager:
             self._tunnel.stop()
             logger.info("SSH tunnel stopped")
     
-    def create_connection_pool(self):
-        """Create MySQL connection pool"""
-        if self._connection_pool is not None:
-            logger.info("Connection pool already exists")
+    def is_tunnel_healthy(self) -> bool:
+        """Check that the tunnel is active and its local port accepts connections"""
+        tunnel = self._tunnel
+        if tunnel is None or not tunnel.is_active:
+            return False
+        try:
+            with socket.create_connection(('127.0.0.1', tunnel.local_bind_port), timeout=5):
+                return True
+        except OSError:
+            return False
+    
+    def start_tunnel_monitor(self):
+        """Start the background thread that restarts a dropped SSH tunnel"""
+        if self._monitor_thread is not None and self._monitor_thread.is_alive():
             return
+        self._monitor_stop.clear()
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_tunnel, name='ssh-tunnel-monitor', daemon=True
+        )
+        self._monitor_thread.start()
+        logger.info(f"SSH tunnel monitor started (interval {self.ssh_monitor_interval}s)")
+    
+    def stop_tunnel_monitor(self):
+        """Stop the background tunnel monitor thread"""
+        self._monitor_stop.set()
+        if self._monitor_thread is not None and self._monitor_thread is not threading.current_thread():
+            self._monitor_thread.join(timeout=self.ssh_monitor_interval + 5)
+        self._monitor_thread = None
+    
+    def _monitor_tunnel(self):
+        while not self._monitor_stop.wait(self.ssh_monitor_interval):
+            # The sync pool only exists once initialize() ran; async-only processes just need the tunnel
+            if self.is_tunnel_healthy() and (self._connection_pool is not None or not self._active):
+                continue
+            logger.warning("SSH tunnel or connection pool is down, reconnecting")
+            try:
+                self.reconnect(self.generation)
+            except Exception as e:
+                logger.error(f"Tunnel reconnect failed, will retry: {e}")
+    
+    def reconnect(self, expected_generation: Optional[int] = None):
+        """
+        Restart the SSH tunnel (if it is unhealthy) and rebuild the connection pool.
+        The async pool (AsyncDatabaseManager) notices the new generation and rebuilds itself.
         
-        try:
-            # Determine host and port based on SSH tunnel usage
-            if self.use_ssh:
-                db_host = '127.0.0.1'
-                db_port = self.local_bind_port
-            else:
-                db_host = os.getenv('DB_HOST', 'localhost')
-                db_port = int(os.getenv('DB_PORT', 3306))
+        The new pool is built before it replaces the old one, so concurrent callers
+        keep using the old pool until the swap and never see it missing; if building
+        fails, the old pool stays in place. Connections checked out from the old pool
+        are closed when they are returned.
+        
+        Args:
+            expected_generation: Generation observed when the failure happened. If another
+                thread has already reconnected since then, nothing is done.
+        """
+        with self._reconnect_lock:
+            if expected_generation is not None and expected_generation != self.generation:
+                return
             
+            if self.use_ssh and not self.is_tunnel_healthy():
+                if self._tunnel is not None:
+                    try:
+                        self._tunnel.stop()
+                    except Exception as e:
+                        logger.warning(f"Error stopping broken SSH tunnel: {e}")
+                self._tunnel = None
+                self.start_ssh_tunnel()
+            
+            if self._active:
+                new_pool = self._build_connection_pool()
+                old_pool, self._connection_pool = self._connection_pool, new_pool
+                if old_pool is not None:
+                    old_pool.close_all()
+            
+            self.generation += 1
+            self.reconnect_count += 1
+            logger.info(f"Database connection re-established (reconnect #{self.reconnect_count})")
+    
+    def get_connection_target(self):
+        """Return the (host, port) clients connect to: the tunnel's local end or DB_HOST/DB_PORT"""
+        if self.use_ssh:
+            return '127.0.0.1', self.local_bind_port
+        return os.getenv('DB_HOST', 'localhost'), int(os.getenv('DB_PORT', 3306))
+    
+    def create_connection_pool(self):
+        """Create MySQL connection pool"""
+        with self._reconnect_lock:
+            if self._connection_pool is not None:
+                logger.info("Connection pool already exists")
+                return
+            self._connection_pool = self._build_connection_pool()
+    
+    def _build_connection_pool(self) -> BlockingConnectionPool:
+        """Open a new, prefilled connection pool to the current connection target"""
+        try:
+            db_host, db_port = self.get_connection_target()
             logger.info(f"Creating connection pool to {db_host}:{db_port}")
             
-            self._connection_pool = pooling.MySQLConnectionPool(
-                pool_name=self.pool_name,
-                pool_size=self.pool_size,
-                pool_reset_session=True,
+            use_pure = True
+            if self.use_c_extension:
+                if mysql.connector.HAVE_CEXT:
+                    use_pure = False
+                else:
+                    logger.warning("DB_USE_C_EXTENSION is set but the C extension is not available; using pure Python driver")
+            
+            connection_config = dict(
                 host=db_host,
                 port=db_port,
                 user=self.db_user,
@@ -142,21 +281,42 @@ class DatabaseManager:
                 autocommit=False,
                 charset='utf8mb4',
                 collation='utf8mb4_unicode_ci',
-                use_pure=True,
+                use_pure=use_pure,
                 ssl_disabled=True
             )
             
+            pool = BlockingConnectionPool(
+                lambda: mysql.connector.connect(**connection_config),
+                pool_size=self.pool_size,
+                acquire_timeout=self.pool_acquire_timeout,
+                max_age=self.pool_max_age,
+                validate_idle_after=self.pool_validate_idle_after
+            )
+            
             logger.info(f"Connection pool created with {self.pool_size} connections")
+            return pool
             
         except Error as e:
             logger.error(f"Failed to create connection pool: {e}")
             raise
     
-    def initialize(self):
-        """Initialize SSH tunnel and connection pool"""
+    def initialize(self, settings: Optional[Dict[str, Any]] = None):
+        """
+        Initialize SSH tunnel and connection pool
+
+        Args:
+            settings: Connection attributes (e.g. ssh_host, db_name) that override
+                      the environment, for callers with their own configuration
+        """
+        for name, value in (settings or {}).items():
+            if not hasattr(self, name) or name.startswith('_'):
+                raise ValueError(f"Unknown database setting: {name}")
+            setattr(self, name, value)
         try:
+            self._active = True
             if self.use_ssh:
                 self.start_ssh_tunnel()
+                self.start_tunnel_monitor()
             self.create_connection_pool()
             logger.info("Database manager initialized successfully")
         except Exception as e:
@@ -164,6 +324,36 @@ class DatabaseManager:
             self.cleanup()
             raise
     
+    @property
+    def is_initialized(self) -> bool:
+        """True once initialize() has built the connection pool (and until cleanup())"""
+        return self._connection_pool is not None
+
+    def _pool(self) -> BlockingConnectionPool:
+        """
+        The current connection pool
+        
+        Raises:
+            InterfaceError: A disconnect error (retried by retry_on_disconnect) if the
+                pool is missing while the manager is active, e.g. after a failed rebuild
+        """
+        pool = self._connection_pool
+        if pool is None:
+            if self._active:
+                raise InterfaceError(msg="Connection pool is not available", errno=2013)
+            raise InterfaceError(msg="Database manager is not initialized")
+        return pool
+    
+    def _checkout_connection(self):
+        """Check out a pooled connection, moving to the new pool if a reconnect closed ours meanwhile"""
+        pool = self._pool()
+        try:
+            return pool.get_connection()
+        except PoolError:
+            if pool is self._connection_pool or self._connection_pool is None:
+                raise
+            return self._pool().get_connection()
+    
     @contextmanager
     def get_connection(self):
         """
@@ -177,15 +367,21 @@ class DatabaseManager:
         """
         connection = None
         try:
-            connection = self._connection_pool.get_connection()
-            yield connection
+            if query_stats.enabled:
+                started = time.perf_counter()
+                connection = self._checkout_connection()
+                query_stats.record_acquire((time.perf_counter() - started) * 1000)
+                yield InstrumentedConnection(connection, query_stats)
+            else:
+                connection = self._checkout_connection()
+                yield connection
         except Error as e:
             logger.error(f"Database connection error: {e}")
             if connection:
                 connection.rollback()
             raise
         finally:
-            if connection and connection.is_connected():
+            if connection:
                 connection.close()
     
     @contextmanager
@@ -202,10 +398,57 @@ class DatabaseManager:
         connection = None
         cursor = None
         try:
-            connection = self._connection_pool.get_connection()
+            if query_stats.enabled:
+                started = time.perf_counter()
+                connection = self._checkout_connection()
+                query_stats.record_acquire((time.perf_counter() - started) * 1000)
+                connection = InstrumentedConnection(connection, query_stats)
+            else:
+                connection = self._checkout_connection()
             cursor = connection.cursor(dictionary=dictionary)
             yield cursor
-            connection.commit()
+            _commit(connection)
+        except Error as e:
+            logger.error(f"Database cursor error: {e}")
+            if connection:
+                connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+    
+    @contextmanager
+    def get_prepared_cursor(self, dictionary=True):
+        """
+        Like get_cursor(), but statements run as server-side prepared statements
+        cached on the pooled connection (DB_PREPARED_STATEMENTS=true).
+        Falls back to get_cursor() when prepared statements are disabled.
+
+        Usage:
+            with db_manager.get_prepared_cursor() as cursor:
+                cursor.execute("SELECT * FROM videos WHERE video_id = %s", (video_id,))
+                row = cursor.fetchone()
+        """
+        if not prepared_statements_enabled():
+            with self.get_cursor(dictionary=dictionary) as cursor:
+                yield cursor
+            return
+
+        connection = None
+        cursor = None
+        try:
+            started = time.perf_counter()
+            connection = self._checkout_connection()
+            if query_stats.enabled:
+                query_stats.record_acquire((time.perf_counter() - started) * 1000)
+                cursor = InstrumentedCursor(PreparedStatementCursor(connection, dictionary), query_stats)
+                connection = InstrumentedConnection(connection, query_stats)
+            else:
+                cursor = PreparedStatementCursor(connection, dictionary)
+            yield cursor
+            _commit(connection)
         except Error as e:
             logger.error(f"Database cursor error: {e}")
             if connection:
@@ -214,18 +457,47 @@ class DatabaseManager:
         finally:
             if cursor:
                 cursor.close()
-            if connection and connection.is_connected():
+            if connection:
                 connection.close()
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Connection pool metrics: size, in-use/idle/waiting counts, utilization,
+        acquire wait times, timeouts and recycled/invalidated connections.
+        """
+        if self._connection_pool is None:
+            return {}
+        return self._connection_pool.get_stats()
+    
+    def register_shutdown_hook(self, hook):
+        """Run `hook()` during cleanup(), while the connection pool is still open"""
+        if hook not in self._shutdown_hooks:
+            self._shutdown_hooks.append(hook)
+    
     def cleanup(self):
         """Cleanup resources (connection pool and SSH tunnel)"""
+        # Hooks run once: repeated close_database() calls and __del__ must not
+        # flush into a pool that is already closed (they re-register on restart)
+        hooks, self._shutdown_hooks = self._shutdown_hooks, []
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Error in database shutdown hook: {e}")
+        
+        if query_stats.enabled:
+            logger.info(f"Query stats:\n{query_stats.format_report()}")
+        
+        self._active = False
         try:
             if self._connection_pool:
                 # Close all connections in the pool
                 logger.info("Closing connection pool")
+                self._connection_pool.close_all()
                 self._connection_pool = None
             
             if self.use_ssh:
+                self.stop_tunnel_monitor()
                 self.stop_ssh_tunnel()
                 
             logger.info("Database manager cleanup completed")
@@ -241,14 +513,60 @@ class DatabaseManager:
 db_manager = DatabaseManager()
 
 
+def retry_on_disconnect(func=None, *, idempotent: bool = True):
+    """
+    Retry a database call once after reconnecting if the connection was lost.
+    
+    Lets repository calls that were in flight when the SSH tunnel dropped
+    succeed once the tunnel and pool have been rebuilt.
+
+    Calls marked idempotent=False (they apply channel_stats deltas or append
+    change events) are not retried when the connection dropped during COMMIT:
+    the server may already have applied the transaction, and running it again
+    would apply the deltas and events twice. Disconnects before the commit
+    rolled the transaction back, so those are still retried.
+    """
+    if func is None:
+        return functools.partial(retry_on_disconnect, idempotent=idempotent)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        generation = db_manager.generation
+        try:
+            return func(*args, **kwargs)
+        except Error as e:
+            if not is_disconnect_error(e):
+                raise
+            if not idempotent and commit_outcome_unknown(e):
+                logger.error(f"Lost database connection while committing {func.__name__}; "
+                             f"not retrying as it may already have been applied: {e}")
+                raise
+            logger.warning(f"Lost database connection in {func.__name__}, reconnecting and retrying once: {e}")
+            db_manager.reconnect(generation)
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def get_db_manager() -> DatabaseManager:
+    """Return the process-wide DatabaseManager (SSH tunnel and connection pool)"""
+    return db_manager
+
+
 def init_database():
-    """Initialize database connection"""
+    """Initialize database connection (MySQL, or the embedded SQLite file with DB_BACKEND=sqlite)"""
+    if get_storage_backend() == 'sqlite':
+        from database.sqlite_backend import sqlite_db
+        sqlite_db.initialize()
+        return
     db_manager.initialize()
 
 
 def close_database():
     """Close database connection"""
     db_manager.cleanup()
+    if get_storage_backend() == 'sqlite':
+        from database.sqlite_backend import sqlite_db
+        sqlite_db.cleanup()
 
 
 # Convenience functions
@@ -264,3 +582,10 @@ def get_db_cursor(dictionary=True):
     """Get database cursor (convenience wrapper)"""
     with db_manager.get_cursor(dictionary=dictionary) as cursor:
         yield cursor
+
+
+@contextmanager
+def get_db_prepared_cursor(dictionary=True):
+    """Get a prepared-statement cursor (convenience wrapper)"""
+    with db_manager.get_prepared_cursor(dictionary=dictionary) as cursor:
+        yield cursor
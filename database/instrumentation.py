@@ -0,0 +1,213 @@
+"""
+Query instrumentation for DatabaseManager cursors and connections
+
+With DB_INSTRUMENTATION=true, get_cursor()/get_connection() record pool
+acquire latency, per-statement execution time and rows affected (keyed by a
+normalized query fingerprint) and commit time into in-process latency
+histograms. Statements slower than DB_SLOW_QUERY_MS are written to the
+'database.slow_queries' logger. When disabled, cursors and connections are
+handed out unwrapped, so the only cost is one attribute check per checkout.
+"""
+
+import bisect
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict
+
+slow_query_logger = logging.getLogger('database.slow_queries')
+
+# Upper bounds (milliseconds) of the histogram buckets; the last bucket is unbounded
+BUCKET_BOUNDS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_COMMENT = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|\?|\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_VALUES_ROWS = re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """
+    Normalize a statement so executions differing only in values share a key
+
+    Literals and placeholders become '?', IN lists and multi-row VALUES
+    collapse to a single entry, and whitespace and comments are removed.
+    """
+    normalized = _COMMENT.sub(' ', query)
+    normalized = _STRING.sub('?', normalized)
+    normalized = _PLACEHOLDER.sub('?', normalized)
+    normalized = _IN_LIST.sub('IN (...)', normalized)
+    normalized = _VALUES_ROWS.sub(r'\1, ...', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count, total, max and percentile estimates"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+
+    def record(self, elapsed_ms: float, rows: int = 0):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.rows += max(rows, 0)
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= threshold:
+                return BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'rows': self.rows,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+class QueryStats:
+    """
+    Process-wide latency histograms for pool checkout, statements and commits.
+
+    Args:
+        enabled: Record anything at all
+        slow_query_ms: Log statements taking at least this long (0 disables the slow log)
+    """
+
+    def __init__(self, enabled: bool = False, slow_query_ms: float = 500.0):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.acquire = LatencyHistogram()
+            self.commit = LatencyHistogram()
+            self.statements: Dict[str, LatencyHistogram] = {}
+
+    def record_acquire(self, elapsed_ms: float):
+        with self._lock:
+            self.acquire.record(elapsed_ms)
+
+    def record_commit(self, elapsed_ms: float):
+        with self._lock:
+            self.commit.record(elapsed_ms)
+
+    def record_statement(self, query: str, elapsed_ms: float, rows: int, batch_size: int = 1):
+        key = fingerprint(query)
+        with self._lock:
+            histogram = self.statements.get(key)
+            if histogram is None:
+                histogram = self.statements[key] = LatencyHistogram()
+            histogram.record(elapsed_ms, rows)
+        if self.slow_query_ms and elapsed_ms >= self.slow_query_ms:
+            batch = f", {batch_size} parameter sets" if batch_size > 1 else ""
+            slow_query_logger.warning(f"Slow query ({elapsed_ms:.1f} ms, {rows} rows{batch}): {key[:500]}")
+
+    def get_stats(self, top: int = 20) -> Dict[str, Any]:
+        """Histogram summaries; statements are the `top` fingerprints by total time"""
+        with self._lock:
+            statements = sorted(self.statements.items(), key=lambda item: item[1].total_ms, reverse=True)
+            return {
+                'acquire': self.acquire.summary(),
+                'commit': self.commit.summary(),
+                'statements': {key: histogram.summary() for key, histogram in statements[:top]},
+            }
+
+    def format_report(self, top: int = 10) -> str:
+        stats = self.get_stats(top)
+        lines = [
+            f"pool acquire: {stats['acquire']}",
+            f"commit: {stats['commit']}",
+        ]
+        lines.extend(f"{summary} {key[:120]}" for key, summary in stats['statements'].items())
+        return '\n'.join(lines)
+
+
+class InstrumentedCursor:
+    """Cursor proxy timing execute/executemany; everything else is delegated"""
+
+    def __init__(self, cursor, stats: QueryStats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, operation, params=(), *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._stats.record_statement(operation, (time.perf_counter() - started) * 1000, self._cursor.rowcount)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        seq_params = seq_params if isinstance(seq_params, (list, tuple)) else list(seq_params)
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._stats.record_statement(
+                operation, (time.perf_counter() - started) * 1000, self._cursor.rowcount, len(seq_params)
+            )
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are instrumented and whose commits are timed"""
+
+    def __init__(self, connection, stats: QueryStats):
+        self._connection = connection
+        self._stats = stats
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._stats)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return self._connection.commit()
+        finally:
+            self._stats.record_commit((time.perf_counter() - started) * 1000)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+query_stats = QueryStats(
+    enabled=os.getenv('DB_INSTRUMENTATION', 'false').lower() == 'true',
+    slow_query_ms=float(os.getenv('DB_SLOW_QUERY_MS', 500)),
+)
+
+
+def get_query_stats(top: int = 20) -> Dict[str, Any]:
+    """Latency histograms for pool acquire, commits and the slowest statement fingerprints"""
+    return query_stats.get_stats(top)
@@ -0,0 +1,399 @@
+"""
+In-memory index of stored videos for skipping redundant writes
+
+Each stored video is one 64-bit entry: 32 bits of its packed video_id and its
+exact view_count (INT UNSIGNED, so it always fits in the other 32 bits).
+Entries live in 65536 small sorted arrays selected by the top 16 bits of the
+packed ID, so an entry identifies the video by 48 of its 64 bits. That is
+8 bytes per video plus ~5 MB of fixed overhead: 10M videos take about 85 MB.
+Inserts go straight into their (small) bucket, and loading fills the buckets
+in place, so there is no merge step that copies the whole index.
+
+A crawled row is skipped when its ID is present with the same view_count:
+
+- view_count changes are always detected (the count is stored exactly);
+- channel_id / view_count_raw changes that leave view_count the same are not
+  detected. The raw text is derived from the count and channel_id never
+  changes in practice; such rows are rewritten with the next count change;
+- a new video whose ID shares 48 bits with a stored one (probability about
+  n / 2^48 per new video, 3.6e-8 at 10M stored) and happens to have that
+  video's exact view_count is skipped as if known.
+
+Incremental refreshes only see rows that still exist, so videos deleted by
+other processes are dropped by a full reload every reload_every refreshes
+(delete_video in this process evicts at once). A reload builds the new
+buckets before swapping them in, so it briefly holds two copies; set
+DB_KNOWN_VIDEO_RELOAD_EVERY=0 where no other process deletes videos.
+"""
+
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from database.db_manager import get_db_cursor, logger
+from database.video_ids import pack_video_id, unpack_video_id
+
+# Rows fetched per round trip while loading or refreshing
+LOAD_BATCH_SIZE = 50000
+
+BUCKET_BITS = 16
+ID_BITS = 32
+STATE_MASK = 0xFFFFFFFF
+# Stored for videos without a view count, which a real count never equals
+NO_VIEW_COUNT = STATE_MASK
+
+
+def video_state(video: Dict[str, Any]) -> int:
+    """32-bit state of a video: its exact view_count"""
+    view_count = video.get('view_count')
+    if view_count is None or not 0 <= view_count < NO_VIEW_COUNT:
+        return NO_VIEW_COUNT
+    return view_count
+
+
+def split_key(packed_id: int) -> Tuple[int, int]:
+    """Bucket number and the 32 ID bits kept in the entry"""
+    return packed_id >> (64 - BUCKET_BITS), (packed_id >> (64 - BUCKET_BITS - ID_BITS)) & STATE_MASK
+
+
+def _put(bucket: array, id_bits: int, state: int):
+    """Insert or replace the entry for id_bits in a sorted bucket"""
+    entry = (id_bits << 32) | state
+    index = bisect_left(bucket, id_bits << 32)
+    if index < len(bucket) and bucket[index] >> 32 == id_bits:
+        bucket[index] = entry
+    else:
+        bucket.insert(index, entry)
+
+
+def _remove(bucket: array, id_bits: int) -> bool:
+    index = bisect_left(bucket, id_bits << 32)
+    if index < len(bucket) and bucket[index] >> 32 == id_bits:
+        del bucket[index]
+        return True
+    return False
+
+
+def _sorted_bucket(bucket: array) -> array:
+    """Sort a bucket filled in arbitrary order; for duplicate IDs the entry appended last wins"""
+    latest = {}
+    for entry in bucket:
+        latest[entry >> 32] = entry
+    return array('Q', sorted(latest.values()))
+
+
+class KnownVideoIndex:
+    """
+    Bucketed, sorted index of stored videos with their view counts.
+
+    load() builds the index from the videos table; refresh() pulls rows
+    changed by other writers since the last load, and reloads fully every
+    reload_every refreshes (0 never does). Both build off-lock, and videos
+    record()ed or forget()ed meanwhile are replayed on the result, so a
+    concurrent write is never lost or overwritten by an older snapshot.
+    async_ensure_fresh() does the same through the aiomysql pool.
+    """
+
+    def __init__(self, refresh_interval: float = 300.0, reload_every: int = 12):
+        self.refresh_interval = refresh_interval
+        self.reload_every = reload_every
+        self._refreshes = 0
+        self._buckets: List[Optional[array]] = [None] * (1 << BUCKET_BITS)
+        self._size = 0
+        self._lock = threading.Lock()
+        # Serializes load/refresh, so concurrent ensure_fresh() callers do the work once
+        self._refresh_lock = threading.Lock()
+        # Writes made while a load/refresh is in progress: (packed_id, state or None to forget)
+        self._replay: Optional[List[Tuple[int, Optional[int]]]] = None
+        self._watermark = None
+        self._last_refresh = None
+        self.stats = {'skipped': 0, 'passed': 0}
+
+    @property
+    def loaded(self) -> bool:
+        return self._last_refresh is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._size
+
+    def memory_bytes(self) -> int:
+        """Approximate memory used by the entries and the bucket arrays"""
+        with self._lock:
+            buckets = [bucket for bucket in self._buckets if bucket is not None]
+            return 8 * len(self._buckets) + sum(64 + bucket.itemsize * len(bucket) for bucket in buckets)
+
+    @staticmethod
+    def _rows_query(since=None) -> Tuple[str, tuple]:
+        query = "SELECT video_id, view_count, updated_at FROM videos"
+        if since is None:
+            return query, ()
+        # Inclusive so rows written within the same second are not missed
+        return query + " WHERE updated_at >= %s", (since,)
+
+    @staticmethod
+    def _pairs(rows: List[Dict[str, Any]], watermark):
+        """(packed_id, state) pairs of a batch of rows and the advanced watermark"""
+        pairs = []
+        for row in rows:
+            key = pack_video_id(row['video_id'])
+            if key is not None:
+                pairs.append((key, video_state(row)))
+            if row['updated_at'] is not None and (watermark is None or row['updated_at'] > watermark):
+                watermark = row['updated_at']
+        return pairs, watermark
+
+    def _read_rows(self, since=None) -> Iterable[List[Tuple[int, int]]]:
+        """Stream (packed_id, state) batches for videos, optionally only those updated since a time"""
+        watermark = since
+        with get_db_cursor() as cursor:
+            cursor.execute(*self._rows_query(since))
+            while True:
+                rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+                if not rows:
+                    break
+                pairs, watermark = self._pairs(rows, watermark)
+                yield pairs
+        self._watermark = watermark
+
+    async def _async_read_rows(self, since=None):
+        """_read_rows() through the aiomysql pool"""
+        from database.async_db_manager import get_async_db_cursor
+
+        watermark = since
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(*self._rows_query(since))
+            while True:
+                rows = await cursor.fetchmany(LOAD_BATCH_SIZE)
+                if not rows:
+                    break
+                pairs, watermark = self._pairs(rows, watermark)
+                yield pairs
+        self._watermark = watermark
+
+    def _apply(self, buckets: List[Optional[array]], key: int, state: Optional[int]) -> int:
+        """Put (or, with state None, remove) one video; returns the change in size"""
+        number, id_bits = split_key(key)
+        bucket = buckets[number]
+        if state is None:
+            return -1 if bucket is not None and _remove(bucket, id_bits) else 0
+        if bucket is None:
+            bucket = buckets[number] = array('Q')
+        before = len(bucket)
+        _put(bucket, id_bits, state)
+        return len(bucket) - before
+
+    def _begin(self):
+        with self._lock:
+            self._replay = []
+
+    def _end(self):
+        with self._lock:
+            self._replay = None
+
+    def _replay_onto(self, buckets: List[Optional[array]]) -> int:
+        """Apply writes recorded during a load/refresh; call with self._lock held"""
+        change = sum(self._apply(buckets, key, state) for key, state in self._replay)
+        self._replay = None
+        return change
+
+    @staticmethod
+    def _fill(buckets: List[Optional[array]], pairs: List[Tuple[int, int]]):
+        # Append unsorted, then sort bucket by bucket in _install(): peak memory stays close to the final size
+        for key, state in pairs:
+            number, id_bits = split_key(key)
+            bucket = buckets[number]
+            if bucket is None:
+                bucket = buckets[number] = array('Q')
+            bucket.append((id_bits << 32) | state)
+
+    def _install(self, buckets: List[Optional[array]], started: float):
+        size = 0
+        for number, bucket in enumerate(buckets):
+            if bucket is not None:
+                buckets[number] = _sorted_bucket(bucket)
+                size += len(buckets[number])
+        with self._lock:
+            size += self._replay_onto(buckets)
+            self._buckets, self._size = buckets, size
+            self._last_refresh = time.monotonic()
+            self._refreshes = 0
+        logger.info(
+            f"Loaded known-video index: {size} videos, "
+            f"{self.memory_bytes() / 1e6:.1f} MB in {time.monotonic() - started:.1f}s"
+        )
+
+    def _merge(self, pairs: List[Tuple[int, int]]):
+        with self._lock:
+            for key, state in pairs:
+                self._size += self._apply(self._buckets, key, state)
+
+    def _finish_refresh(self, changed: int):
+        with self._lock:
+            # Rows read above may predate writes recorded meanwhile
+            self._size += self._replay_onto(self._buckets)
+            self._last_refresh = time.monotonic()
+            self._refreshes += 1
+        logger.info(f"Refreshed known-video index: {changed} changed rows")
+
+    def _needs_load(self) -> bool:
+        return not self.loaded or (self.reload_every > 0 and self._refreshes >= self.reload_every)
+
+    def load(self):
+        """Build the index from every row in the videos table"""
+        with self._refresh_lock:
+            self._load()
+
+    def _load(self):
+        started = time.monotonic()
+        self._begin()
+        try:
+            buckets: List[Optional[array]] = [None] * (1 << BUCKET_BITS)
+            for pairs in self._read_rows():
+                self._fill(buckets, pairs)
+            self._install(buckets, started)
+        finally:
+            self._end()
+
+    async def _async_load(self):
+        started = time.monotonic()
+        self._begin()
+        try:
+            buckets: List[Optional[array]] = [None] * (1 << BUCKET_BITS)
+            async for pairs in self._async_read_rows():
+                self._fill(buckets, pairs)
+            self._install(buckets, started)
+        finally:
+            self._end()
+
+    def refresh(self):
+        """Pull rows written by other processes since the last load/refresh (or reload fully when due)"""
+        with self._refresh_lock:
+            self._refresh()
+
+    def _refresh(self):
+        if self._needs_load():
+            self._load()
+            return
+        self._begin()
+        changed = 0
+        try:
+            for pairs in self._read_rows(self._watermark):
+                self._merge(pairs)
+                changed += len(pairs)
+            self._finish_refresh(changed)
+        finally:
+            self._end()
+
+    async def _async_refresh(self):
+        if self._needs_load():
+            await self._async_load()
+            return
+        self._begin()
+        changed = 0
+        try:
+            async for pairs in self._async_read_rows(self._watermark):
+                self._merge(pairs)
+                changed += len(pairs)
+            self._finish_refresh(changed)
+        finally:
+            self._end()
+
+    def _is_stale(self) -> bool:
+        return not self.loaded or time.monotonic() - self._last_refresh >= self.refresh_interval
+
+    def ensure_fresh(self):
+        """Load on first use and refresh once refresh_interval has elapsed"""
+        if not self._is_stale():
+            return
+        with self._refresh_lock:
+            # Another caller may have loaded or refreshed while we waited
+            if self._is_stale():
+                self._refresh()
+
+    async def async_ensure_fresh(self):
+        """
+        ensure_fresh() for async writers, reading through the aiomysql pool
+
+        Returns at once while another caller is loading or refreshing: waiting
+        on the thread lock would block the event loop, and filtering against
+        the current (possibly empty) index only lets more rows through.
+        """
+        if not self._is_stale() or not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            if self._is_stale():
+                await self._async_refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def _find(self, key: int) -> Optional[int]:
+        number, id_bits = split_key(key)
+        bucket = self._buckets[number]
+        if bucket is None:
+            return None
+        index = bisect_left(bucket, id_bits << 32)
+        if index < len(bucket) and bucket[index] >> 32 == id_bits:
+            return bucket[index] & STATE_MASK
+        return None
+
+    def is_unchanged(self, video: Dict[str, Any]) -> bool:
+        """True if the video is stored with the same view_count (see the module docstring)"""
+        key = pack_video_id(video.get('video_id'))
+        if key is None:
+            return False
+        with self._lock:
+            return self._find(key) == video_state(video)
+
+    def filter_changed(self, videos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the videos that are new or whose view_count changed"""
+        changed = [video for video in videos if not self.is_unchanged(video)]
+        with self._lock:
+            self.stats['skipped'] += len(videos) - len(changed)
+            self.stats['passed'] += len(changed)
+        return changed
+
+    def _write(self, updates: Iterable[Tuple[int, Optional[int]]]):
+        with self._lock:
+            for key, state in updates:
+                self._size += self._apply(self._buckets, key, state)
+                if self._replay is not None:
+                    self._replay.append((key, state))
+
+    def record(self, videos: Iterable[Dict[str, Any]]):
+        """Remember videos that were just written"""
+        self._write(
+            (key, video_state(video))
+            for video in videos
+            for key in (pack_video_id(video.get('video_id')),) if key is not None
+        )
+
+    def forget(self, video_ids: Iterable[str]):
+        """Drop deleted videos, so a re-crawl inserts them again"""
+        self._write(
+            (key, None)
+            for video_id in video_ids
+            for key in (pack_video_id(video_id),) if key is not None
+        )
+
+
+_known_videos: Optional[KnownVideoIndex] = None
+
+
+def known_videos_enabled() -> bool:
+    """True when DB_KNOWN_VIDEO_INDEX=true: batch upserts skip rows that have not changed"""
+    return os.getenv('DB_KNOWN_VIDEO_INDEX', 'false').lower() == 'true'
+
+
+def get_known_videos() -> KnownVideoIndex:
+    """Return the process-wide known-video index"""
+    global _known_videos
+    if _known_videos is None:
+        _known_videos = KnownVideoIndex(
+            refresh_interval=float(os.getenv('DB_KNOWN_VIDEO_REFRESH_INTERVAL', 300)),
+            reload_every=int(os.getenv('DB_KNOWN_VIDEO_RELOAD_EVERY', 12))
+        )
+    return _known_videos
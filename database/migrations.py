@@ -0,0 +1,193 @@
+"""
+Versioned schema migrations
+
+Each migration has an integer version and a list of DDL statements. Applied
+versions are recorded in schema_migrations, so apply_migrations() only runs
+what a database has not seen yet. ALTER TABLE statements ask for
+ALGORITHM=INPLACE, LOCK=NONE so index builds do not block crawler writes;
+when the server refuses an online change it is retried with the default
+algorithm and a warning is logged. A migration whose tables do not exist yet
+is left pending, so it runs once they have been created.
+"""
+
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+from database.db_manager import get_db_cursor, logger, retry_on_disconnect
+from database.transcript_payloads import TRANSCRIPT_PAYLOADS_TABLE_DDL
+from database.transcript_repository import TRANSCRIPT_LANGUAGES_TABLE_DDL
+from database.video_ids import video_id_column_type
+from mysql.connector import Error
+
+ONLINE_DDL = "ALGORITHM=INPLACE, LOCK=NONE"
+
+# Server refused the requested ALGORITHM/LOCK for this change
+ONLINE_DDL_UNSUPPORTED_ERRNOS = {1845, 1846}
+
+# The change is already in place: fresh tables are created with the current
+# indexes and columns
+ALREADY_APPLIED_ERRNOS = {
+    1060,  # Duplicate column name
+    1061,  # Duplicate key name
+    1091,  # Can't DROP; check that column/key exists
+}
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    # DDL strings, or callables returning one when it depends on run-time settings
+    statements: List[Union[str, Callable[[], str]]]
+    # Tables the statements alter; the migration stays pending until they all exist
+    tables: Tuple[str, ...] = ()
+
+
+MIGRATIONS = [
+    Migration(1, 'videos_channel_published_index', [
+        # Serves "latest videos for channel X": equality on channel_id, ordered by published_time
+        f"ALTER TABLE videos ADD INDEX idx_channel_published (channel_id, published_time), {ONLINE_DDL}",
+        # Left prefix of idx_channel_published, so it only costs writes
+        f"ALTER TABLE videos DROP INDEX idx_channel_id, {ONLINE_DDL}",
+    ], ('videos',)),
+    Migration(2, 'videos_published_covering_index', [
+        # Covers the transcript backlog anti-join: InnoDB appends the primary key, so
+        # (published_time DESC, video_id) is read in order without touching the rows
+        f"ALTER TABLE videos ADD INDEX idx_published_desc (published_time DESC), {ONLINE_DDL}",
+        f"ALTER TABLE videos DROP INDEX idx_published_time, {ONLINE_DDL}",
+    ], ('videos',)),
+    Migration(3, 'updated_at_indexes', [
+        # Incremental reads by watermark: known-video index refresh, migration catch-up
+        f"ALTER TABLE videos ADD INDEX idx_updated_at (updated_at), {ONLINE_DDL}",
+        f"ALTER TABLE transcripts ADD INDEX idx_updated_at (updated_at), {ONLINE_DDL}",
+    ], ('videos', 'transcripts')),
+    Migration(4, 'transcript_payload_dedup', [
+        # Content-addressed payloads (DB_TRANSCRIPT_DEDUP); the index serves orphan purges
+        TRANSCRIPT_PAYLOADS_TABLE_DDL,
+        f"ALTER TABLE transcripts ADD COLUMN payload_hash BINARY(32) NULL AFTER transcript_raw, {ONLINE_DDL}",
+        f"ALTER TABLE transcripts ADD INDEX idx_payload_hash (payload_hash), {ONLINE_DDL}",
+    ], ('transcripts',)),
+    Migration(5, 'transcript_language_cache', [
+        # Column type follows DB_BINARY_VIDEO_IDS when the migration runs, not at import
+        lambda: TRANSCRIPT_LANGUAGES_TABLE_DDL.format(id_type=video_id_column_type()),
+    ]),
+]
+
+
+def _missing_tables(cursor, tables: Tuple[str, ...]) -> List[str]:
+    if not tables:
+        return []
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(
+        f"SELECT TABLE_NAME AS name FROM information_schema.TABLES "
+        f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})",
+        tables
+    )
+    present = {row['name'] for row in cursor.fetchall()}
+    return [table for table in tables if table not in present]
+
+
+def _execute_ddl(cursor, statement: str):
+    try:
+        cursor.execute(statement)
+    except Error as e:
+        if e.errno in ALREADY_APPLIED_ERRNOS:
+            logger.info(f"Skipping already applied change ({e.msg})")
+        elif e.errno in ONLINE_DDL_UNSUPPORTED_ERRNOS and ONLINE_DDL in statement:
+            logger.warning(f"Online DDL not supported, retrying with a table copy: {e.msg}")
+            _execute_ddl(cursor, statement.replace(f", {ONLINE_DDL}", ''))
+        else:
+            raise
+
+
+class MigrationRunner:
+    """Applies MIGRATIONS in version order and records them in schema_migrations"""
+
+    @staticmethod
+    @retry_on_disconnect
+    def create_table():
+        """Create schema_migrations table if it doesn't exist"""
+        create_table_query = """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT UNSIGNED PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(create_table_query)
+                return True
+        except Error as e:
+            logger.error(f"Error creating schema_migrations table: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def get_applied_versions() -> List[int]:
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+                return [row['version'] for row in cursor.fetchall()]
+        except Error as e:
+            logger.error(f"Error reading applied migrations: {e}")
+            raise
+
+    @staticmethod
+    def get_pending(target: Optional[int] = None) -> List[Migration]:
+        """Migrations not yet applied, up to and including target"""
+        MigrationRunner.create_table()
+        applied = set(MigrationRunner.get_applied_versions())
+        return [
+            migration for migration in sorted(MIGRATIONS, key=lambda m: m.version)
+            if migration.version not in applied and (target is None or migration.version <= target)
+        ]
+
+    @staticmethod
+    @retry_on_disconnect
+    def apply(migration: Migration) -> bool:
+        """
+        Apply one migration and record it; DDL auto-commits, so each statement is its own step
+
+        Returns:
+            False (and records nothing) when a table it alters does not exist yet
+        """
+        try:
+            with get_db_cursor() as cursor:
+                missing = _missing_tables(cursor, migration.tables)
+                if missing:
+                    logger.info(f"Deferring migration {migration.version} ({migration.name}): "
+                                f"missing tables {', '.join(missing)}")
+                    return False
+                for statement in migration.statements:
+                    _execute_ddl(cursor, statement() if callable(statement) else statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (migration.version, migration.name)
+                )
+            logger.info(f"Applied migration {migration.version}: {migration.name}")
+            return True
+        except Error as e:
+            logger.error(f"Error applying migration {migration.version} ({migration.name}): {e}")
+            raise
+
+    @staticmethod
+    def apply_all(target: Optional[int] = None) -> List[int]:
+        """
+        Apply every pending migration in version order
+
+        Args:
+            target: Stop after this version (default: latest)
+
+        Returns:
+            List of versions applied (deferred ones are left out)
+        """
+        applied = []
+        for migration in MigrationRunner.get_pending(target):
+            if MigrationRunner.apply(migration):
+                applied.append(migration.version)
+        return applied
+
+
+def apply_migrations(target: Optional[int] = None) -> List[int]:
+    """Apply pending schema migrations (convenience wrapper)"""
+    return MigrationRunner.apply_all(target)
@@ -0,0 +1,342 @@
+"""
+Streaming Parquet export of videos and transcripts
+
+Rows are read in keyset-paginated pages ordered by (updated_at, video_id), so
+each query is a short range scan on idx_updated_at no matter how far the
+export has progressed. Pages are routed into per-partition buffers (by
+channel or by published month) and written as Parquet row groups; buffered
+rows and open files are both bounded, so memory does not grow with the table.
+Transcripts are flattened to one row per segment; deduplicated payloads and
+archived transcripts are hydrated page by page before flattening.
+
+Each run writes new part files named after its start time and only reads rows
+updated before that time. export() keeps the start time as the watermark of
+the next incremental run, so rows updated during a run are exported again by
+the next one: downstream readers should keep the row with the latest
+updated_at per video_id (and segment_index).
+"""
+
+import json
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from database.db_manager import get_db_cursor, logger
+from database.transcript_archive import ARCHIVED_STATUS, load_archived
+from database.video_ids import encode_video_id, decode_video_id
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency, only needed for exports
+    pa = None
+    pq = None
+
+PARTITION_BY = ('channel', 'month')
+
+# Name of the watermark file kept in the output directory
+STATE_FILE = '_export_state.json'
+
+VIDEO_COLUMNS = (
+    'video_id', 'channel_id', 'published_time', 'view_count',
+    'published_time_raw', 'view_count_raw', 'created_at', 'updated_at'
+)
+
+# Keyset pages: rows after the previous page's (updated_at, video_id), before the run started
+VIDEOS_PAGE_QUERY = f"""
+SELECT {', '.join(VIDEO_COLUMNS)}
+FROM videos
+WHERE updated_at < %s AND (updated_at > %s OR (updated_at = %s AND video_id > %s))
+ORDER BY updated_at, video_id
+LIMIT %s
+"""
+
+TRANSCRIPTS_PAGE_QUERY = """
+SELECT t.video_id, v.channel_id, v.published_time, t.transcript_raw, t.status, t.fetched_at, t.updated_at
+FROM transcripts t
+JOIN videos v ON v.video_id = t.video_id
+WHERE t.status IN ('fetched', 'archived')
+  AND t.updated_at < %s AND (t.updated_at > %s OR (t.updated_at = %s AND t.video_id > %s))
+ORDER BY t.updated_at, t.video_id
+LIMIT %s
+"""
+
+# Payloads of deduplicated transcripts (DB_TRANSCRIPT_DEDUP) live in transcript_payloads
+DEDUPLICATED_PAYLOADS_QUERY = """
+SELECT t.video_id, p.transcript_raw
+FROM transcripts t
+JOIN transcript_payloads p ON p.payload_hash = t.payload_hash
+WHERE t.video_id IN ({placeholders})
+"""
+
+# Lower bound of a full export
+EPOCH = datetime(1970, 1, 1)
+
+_UNSAFE_PATH_CHARS = re.compile(r'[^\w.-]')
+
+
+def _schemas() -> Dict[str, Any]:
+    return {
+        'videos': pa.schema([
+            ('video_id', pa.string()),
+            ('channel_id', pa.string()),
+            ('published_time', pa.timestamp('s')),
+            ('view_count', pa.int64()),
+            ('published_time_raw', pa.string()),
+            ('view_count_raw', pa.string()),
+            ('created_at', pa.timestamp('s')),
+            ('updated_at', pa.timestamp('s')),
+        ]),
+        'transcripts': pa.schema([
+            ('video_id', pa.string()),
+            ('channel_id', pa.string()),
+            ('published_time', pa.timestamp('s')),
+            ('segment_index', pa.int32()),
+            ('start', pa.float64()),
+            ('duration', pa.float64()),
+            ('text', pa.string()),
+            ('fetched_at', pa.timestamp('s')),
+            ('updated_at', pa.timestamp('s')),
+        ]),
+    }
+
+
+def partition_path(row: Dict[str, Any], partition_by: str) -> str:
+    """Hive-style partition directory of a row: channel_id=<id> or month=YYYY-MM"""
+    if partition_by == 'channel':
+        return f"channel_id={_UNSAFE_PATH_CHARS.sub('_', row['channel_id'] or 'unknown')}"
+    published = row.get('published_time')
+    return f"month={published:%Y-%m}" if published else 'month=unknown'
+
+
+def flatten_transcript(row: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One row per transcript segment; the raw payload is a JSON list of {text, start, duration}"""
+    raw = row['transcript_raw']
+    segments = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+    return [
+        {
+            'video_id': row['video_id'],
+            'channel_id': row['channel_id'],
+            'published_time': row['published_time'],
+            'segment_index': index,
+            'start': segment.get('start'),
+            'duration': segment.get('duration'),
+            'text': segment.get('text'),
+            'fetched_at': row['fetched_at'],
+            'updated_at': row['updated_at'],
+        }
+        for index, segment in enumerate(segments or [])
+    ]
+
+
+def resolve_archived(rows: List[Dict[str, Any]]):
+    """Fill archived stub rows in a page from the cold-storage shards, in place"""
+    for row in rows:
+        if row['status'] == ARCHIVED_STATUS:
+            load_archived(row)
+
+
+def resolve_deduplicated(rows: List[Dict[str, Any]]):
+    """Fill transcript_raw of deduplicated rows in a page, in place"""
+    pending = {
+        row['video_id']: row for row in rows
+        if row['transcript_raw'] is None and row['status'] != ARCHIVED_STATUS
+    }
+    if not pending:
+        return
+    with get_db_cursor() as cursor:
+        cursor.execute(DEDUPLICATED_PAYLOADS_QUERY.format(placeholders=', '.join(['%s'] * len(pending))),
+                       tuple(encode_video_id(video_id) for video_id in pending))
+        for payload in cursor.fetchall():
+            pending[decode_video_id(payload['video_id'])]['transcript_raw'] = payload['transcript_raw']
+
+
+def iter_pages(query: str, since: datetime, until: datetime, page_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Keyset-paginate a *_PAGE_QUERY, one short transaction per page
+
+    Rows are yielded with video_id decoded; the keyset uses the stored value.
+    """
+    last_updated, last_id = since, ''
+    while True:
+        with get_db_cursor() as cursor:
+            cursor.execute(query, (until, last_updated, last_updated, last_id, page_size))
+            rows = cursor.fetchall()
+        if not rows:
+            return
+        last_updated, last_id = rows[-1]['updated_at'], rows[-1]['video_id']
+        for row in rows:
+            row['video_id'] = decode_video_id(row['video_id'])
+        yield rows
+        if len(rows) < page_size:
+            return
+
+
+class PartitionedParquetWriter:
+    """
+    Buffers rows per partition and appends them to Parquet files as row groups
+
+    Args:
+        root: Table directory; partitions are its subdirectories
+        schema: pyarrow schema of the rows
+        file_prefix: Part file name prefix, unique per run so runs never overwrite each other
+        row_group_size: Rows per row group written for a partition
+        max_buffered_rows: Flush the largest buffer when more rows than this are held
+        max_open_files: Close the least recently written file beyond this many;
+            the partition continues in a new part file
+    """
+
+    def __init__(self, root: str, schema, file_prefix: str, row_group_size: int = 50000,
+                 max_buffered_rows: int = 200000, max_open_files: int = 32):
+        self.root = root
+        self.schema = schema
+        self.file_prefix = file_prefix
+        self.row_group_size = row_group_size
+        self.max_buffered_rows = max_buffered_rows
+        self.max_open_files = max_open_files
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self._buffered = 0
+        self._writers: OrderedDict = OrderedDict()
+        self._parts: Dict[str, int] = {}
+        self.files: List[str] = []
+        self.rows = 0
+
+    def add(self, partition: str, rows: List[Dict[str, Any]]):
+        buffer = self._buffers.setdefault(partition, [])
+        buffer.extend(rows)
+        self._buffered += len(rows)
+        if len(buffer) >= self.row_group_size:
+            self._flush(partition)
+        while self._buffered > self.max_buffered_rows:
+            self._flush(max(self._buffers, key=lambda key: len(self._buffers[key])))
+
+    def _writer(self, partition: str):
+        writer = self._writers.get(partition)
+        if writer is not None:
+            self._writers.move_to_end(partition)
+            return writer
+        if len(self._writers) >= self.max_open_files:
+            self._writers.popitem(last=False)[1].close()
+        part = self._parts[partition] = self._parts.get(partition, -1) + 1
+        directory = os.path.join(self.root, partition)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.file_prefix}-{part:05d}.parquet")
+        writer = self._writers[partition] = pq.ParquetWriter(path, self.schema, compression='zstd')
+        self.files.append(path)
+        return writer
+
+    def _flush(self, partition: str):
+        rows = self._buffers.pop(partition, None)
+        if not rows:
+            return
+        self._buffered -= len(rows)
+        for start in range(0, len(rows), self.row_group_size):
+            chunk = rows[start:start + self.row_group_size]
+            self._writer(partition).write_table(pa.Table.from_pylist(chunk, schema=self.schema))
+            self.rows += len(chunk)
+
+    def close(self):
+        """Flush every buffer and close all files"""
+        for partition in list(self._buffers):
+            self._flush(partition)
+        while self._writers:
+            self._writers.popitem(last=False)[1].close()
+
+
+def export_table(table: str, output_dir: str, since: datetime, until: datetime,
+                 partition_by: str = 'month', page_size: Optional[int] = None,
+                 **writer_options) -> Dict[str, Any]:
+    """
+    Export rows of `table` updated in [since, until) to output_dir/<table>/<partition>/
+
+    Args:
+        table: 'videos' or 'transcripts'
+        partition_by: 'channel' or 'month' (published month)
+        page_size: Source rows per query (default 5000 videos / 200 transcripts)
+        writer_options: Passed to PartitionedParquetWriter
+
+    Returns:
+        Dict with source rows read, rows written and files created
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet export: pip install pyarrow")
+    if partition_by not in PARTITION_BY:
+        raise ValueError(f"partition_by must be one of {PARTITION_BY}")
+
+    if table == 'videos':
+        query, page_size = VIDEOS_PAGE_QUERY, page_size or 5000
+    elif table == 'transcripts':
+        query, page_size = TRANSCRIPTS_PAGE_QUERY, page_size or 200
+    else:
+        raise ValueError(f"Unknown table: {table}")
+
+    writer = PartitionedParquetWriter(
+        os.path.join(output_dir, table), _schemas()[table],
+        file_prefix=f"part-{until:%Y%m%dT%H%M%S}", **writer_options
+    )
+    source_rows = 0
+    try:
+        for rows in iter_pages(query, since, until, page_size):
+            source_rows += len(rows)
+            if table == 'transcripts':
+                resolve_deduplicated(rows)
+                resolve_archived(rows)
+            for row in rows:
+                if table == 'transcripts':
+                    writer.add(partition_path(row, partition_by), flatten_transcript(row))
+                else:
+                    writer.add(partition_path(row, partition_by), [row])
+    finally:
+        writer.close()
+
+    logger.info(f"Exported {source_rows} {table} rows ({writer.rows} written) to {len(writer.files)} files")
+    return {'source_rows': source_rows, 'rows': writer.rows, 'files': writer.files}
+
+
+def _server_now() -> datetime:
+    with get_db_cursor() as cursor:
+        cursor.execute("SELECT NOW() AS now")
+        return cursor.fetchone()['now']
+
+
+def read_watermarks(output_dir: str) -> Dict[str, datetime]:
+    """Watermark (start of the last successful run) per table"""
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as state_file:
+        return {table: datetime.fromisoformat(value) for table, value in json.load(state_file).items()}
+
+
+def write_watermarks(output_dir: str, watermarks: Dict[str, datetime]):
+    path = os.path.join(output_dir, STATE_FILE)
+    with open(f"{path}.tmp", 'w') as state_file:
+        json.dump({table: value.isoformat() for table, value in watermarks.items()}, state_file, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def export(output_dir: str, tables=('videos', 'transcripts'), partition_by: str = 'month',
+           full: bool = False, **options) -> Dict[str, Any]:
+    """
+    Incremental export: each table resumes from its watermark unless full=True
+
+    A table's watermark only advances after its export completes, so a failed
+    run is simply repeated by the next one.
+
+    Returns:
+        Dict of table -> export_table() stats (plus 'since')
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    watermarks = read_watermarks(output_dir)
+    until = _server_now()
+
+    results = {}
+    for table in tables:
+        since = EPOCH if full else watermarks.get(table, EPOCH)
+        results[table] = export_table(table, output_dir, since, until, partition_by, **options)
+        results[table]['since'] = since
+        watermarks[table] = until
+        write_watermarks(output_dir, watermarks)
+    return results
@@ -0,0 +1,96 @@
+"""
+Server-side prepared statements cached per pooled connection
+
+PreparedStatementCursor behaves like a regular cursor, but each distinct
+statement runs through a prepared cursor that the pool keeps for the lifetime
+of the underlying connection, so the server parses it once per connection
+instead of once per call. executemany() stays on a regular text cursor, where
+mysql-connector rewrites INSERTs into multi-row statements - one round trip
+per batch beats one prepared execution per row.
+"""
+
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple
+
+_NAMED_PARAM = re.compile(r'%\((\w+)\)s')
+
+
+@lru_cache(maxsize=256)
+def to_positional(operation: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Rewrite %(name)s placeholders to %s
+
+    Returns:
+        Tuple of (positional statement, parameter names in order)
+    """
+    names = tuple(_NAMED_PARAM.findall(operation))
+    return _NAMED_PARAM.sub('%s', operation), names
+
+
+class PreparedStatementCursor:
+    """
+    Cursor over one pooled connection that executes through cached prepared statements.
+
+    Result rows are read eagerly, so fetchone() never leaves an unread result
+    on the connection. Only single-result statements are supported.
+    """
+
+    def __init__(self, connection, dictionary: bool = True):
+        self._connection = connection
+        self._dictionary = dictionary
+        self._text_cursor = None
+        self._rows: List[Any] = []
+        self.rowcount = -1
+        self.lastrowid = None
+        self.description = None
+
+    def execute(self, operation: str, params: Optional[Any] = None):
+        if isinstance(params, dict):
+            operation, names = to_positional(operation)
+            params = tuple(params[name] for name in names)
+        # mysql-connector re-prepares unless it sees the identical string object again
+        operation = sys.intern(operation)
+        cursor = self._connection.prepared_cursor(operation, self._dictionary)
+        cursor.execute(operation, tuple(params) if params else ())
+        self.description = cursor.description
+        self._rows = cursor.fetchall() if cursor.description else []
+        self.rowcount = cursor.rowcount
+        self.lastrowid = cursor.lastrowid
+
+    def executemany(self, operation: str, seq_params: Sequence[Any]):
+        if self._text_cursor is None:
+            self._text_cursor = self._connection.cursor(dictionary=self._dictionary)
+        self._text_cursor.executemany(operation, seq_params)
+        self.description = self._text_cursor.description
+        self._rows = self._text_cursor.fetchall() if self._text_cursor.description else []
+        self.rowcount = self._text_cursor.rowcount
+        self.lastrowid = self._text_cursor.lastrowid
+
+    def fetchone(self) -> Optional[Any]:
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size: int = 1) -> List[Any]:
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        """Close the text cursor; prepared cursors stay cached on the connection"""
+        if self._text_cursor is not None:
+            self._text_cursor.close()
+            self._text_cursor = None
+        self._rows = []
+
+
+def prepared_statements_enabled() -> bool:
+    """True when DB_PREPARED_STATEMENTS=true: repository hot paths use prepared statements"""
+    return os.getenv('DB_PREPARED_STATEMENTS', 'false').lower() == 'true'
@@ -0,0 +1,438 @@
+"""
+Embedded SQLite storage backend
+
+Implements the VideoRepository / TranscriptRepository interfaces on a local
+SQLite file in WAL mode, so single-node crawls and tests run at local-disk
+speed with no MySQL server or SSH tunnel. Every write bumps the row's dirty
+counter (0 = synced); sync_to_mysql() pushes dirty rows to MySQL in bulk and
+resets the counter only where it still holds the value it read, so a row
+rewritten during the push stays dirty for the next pass.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+from database.db_manager import logger
+
+
+def _dict_factory(cursor, row):
+    return {column[0]: row[index] for index, column in enumerate(cursor.description)}
+
+
+class SQLiteDatabase:
+    """
+    Manages SQLite connections (one per thread) for the embedded backend.
+
+    Connections use WAL journaling so readers never block the writer, and
+    NORMAL synchronous mode, which is durable across application crashes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('SQLITE_PATH', 'youtube_crawler.sqlite3')
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def get_connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def initialize(self):
+        """Open the database file and make sure both tables exist"""
+        self.get_connection()
+        SQLiteVideoRepository.create_table()
+        SQLiteTranscriptRepository.create_table()
+        logger.info(f"SQLite backend initialized at {self.path}")
+
+    @contextmanager
+    def get_cursor(self, dictionary=True):
+        """
+        Cursor inside one transaction: committed on success, rolled back on error.
+
+        Usage:
+            with sqlite_db.get_cursor() as cursor:
+                cursor.execute("SELECT * FROM videos")
+        """
+        connection = self.get_connection()
+        cursor = connection.cursor()
+        if dictionary:
+            cursor.row_factory = _dict_factory
+        try:
+            yield cursor
+            connection.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite cursor error: {e}")
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def cleanup(self):
+        """Close every connection opened by this database"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+# Global SQLite database instance
+sqlite_db = SQLiteDatabase()
+
+
+VIDEO_COLUMNS = ('video_id', 'channel_id', 'published_time', 'view_count', 'published_time_raw', 'view_count_raw')
+
+SQLITE_VIDEO_INSERT_QUERY = """
+INSERT INTO videos (
+    video_id, channel_id, published_time, view_count,
+    published_time_raw, view_count_raw
+) VALUES (
+    :video_id, :channel_id, :published_time, :view_count,
+    :published_time_raw, :view_count_raw
+)
+"""
+
+SQLITE_VIDEO_UPSERT_QUERY = SQLITE_VIDEO_INSERT_QUERY + """ON CONFLICT(video_id) DO UPDATE SET
+    view_count = excluded.view_count,
+    view_count_raw = excluded.view_count_raw,
+    channel_id = excluded.channel_id,
+    updated_at = CURRENT_TIMESTAMP,
+    dirty = dirty + 1
+"""
+
+SQLITE_TRANSCRIPT_UPSERT_QUERY = """
+INSERT INTO transcripts (video_id, transcript_raw, status, error_message)
+VALUES (:video_id, :transcript_raw, :status, :error_message)
+ON CONFLICT(video_id) DO UPDATE SET
+    transcript_raw = excluded.transcript_raw,
+    status = excluded.status,
+    error_message = excluded.error_message,
+    fetched_at = CURRENT_TIMESTAMP,
+    updated_at = CURRENT_TIMESTAMP,
+    dirty = dirty + 1
+"""
+
+
+def _video_params(video: Dict[str, Any]) -> Dict[str, Any]:
+    return {column: video.get(column) for column in VIDEO_COLUMNS}
+
+
+class SQLiteVideoRepository:
+    """VideoRepository interface backed by the embedded SQLite database"""
+
+    @staticmethod
+    def create_table():
+        """Create videos table if it doesn't exist"""
+        with sqlite_db.get_cursor() as cursor:
+            cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                channel_id TEXT NOT NULL,
+                published_time TEXT NOT NULL,
+                view_count INTEGER NOT NULL,
+                published_time_raw TEXT,
+                view_count_raw TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                dirty INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS idx_channel_published ON videos (channel_id, published_time);
+            CREATE INDEX IF NOT EXISTS idx_published_time ON videos (published_time);
+            CREATE INDEX IF NOT EXISTS idx_view_count ON videos (view_count);
+            CREATE INDEX IF NOT EXISTS idx_videos_dirty ON videos (dirty);
+            """)
+        logger.info("Videos table created or already exists (SQLite)")
+        return True
+
+    @staticmethod
+    def insert_video(video_data: Dict[str, Any]) -> bool:
+        """Insert a single video; returns False if it already exists"""
+        try:
+            with sqlite_db.get_cursor() as cursor:
+                cursor.execute(SQLITE_VIDEO_INSERT_QUERY, _video_params(video_data))
+                return True
+        except sqlite3.IntegrityError as e:
+            logger.warning(f"Video {video_data['video_id']} already exists: {e}")
+            return False
+
+    @staticmethod
+    def insert_videos_batch(videos: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Insert multiple videos in a single transaction"""
+        stats = {'inserted': 0, 'skipped': 0, 'failed': 0}
+        with sqlite_db.get_cursor() as cursor:
+            for video in videos:
+                try:
+                    cursor.execute(SQLITE_VIDEO_INSERT_QUERY, _video_params(video))
+                    stats['inserted'] += 1
+                except sqlite3.IntegrityError:
+                    stats['skipped'] += 1
+        logger.info(f"Batch insert completed: {stats}")
+        return stats
+
+    @staticmethod
+    def update_video(video_id: str, video_data: Dict[str, Any]) -> bool:
+        """Update an existing video"""
+        params = _video_params(video_data)
+        params['video_id'] = video_id
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute("""
+            UPDATE videos
+            SET published_time = :published_time,
+                view_count = :view_count,
+                published_time_raw = :published_time_raw,
+                view_count_raw = :view_count_raw,
+                channel_id = :channel_id,
+                updated_at = CURRENT_TIMESTAMP,
+                dirty = dirty + 1
+            WHERE video_id = :video_id
+            """, params)
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def upsert_video(video_data: Dict[str, Any]) -> bool:
+        """Insert or update a video"""
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute(SQLITE_VIDEO_UPSERT_QUERY, _video_params(video_data))
+            return True
+
+    @staticmethod
+    def upsert_videos_batch(videos: List[Dict[str, Any]]) -> int:
+        """Upsert multiple videos in a single transaction"""
+        with sqlite_db.get_cursor() as cursor:
+            cursor.executemany(SQLITE_VIDEO_UPSERT_QUERY, [_video_params(v) for v in videos])
+        logger.info(f"Upserted {len(videos)} videos")
+        return len(videos)
+
+    @staticmethod
+    def upsert_videos_diff(videos: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Upsert only new and changed videos; returns new/changed/unchanged counts"""
+        from database.video_repository import diff_videos
+
+        new, changed, unchanged = diff_videos(videos, SQLiteVideoRepository.get_videos_by_ids([v['video_id'] for v in videos]))
+        if new or changed:
+            SQLiteVideoRepository.upsert_videos_batch(new + changed)
+        return {'new': len(new), 'changed': len(changed), 'unchanged': unchanged}
+
+    @staticmethod
+    def get_video(video_id: str) -> Optional[Dict[str, Any]]:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute("SELECT * FROM videos WHERE video_id = ?", (video_id,))
+            return cursor.fetchone()
+
+    @staticmethod
+    def get_videos_by_ids(video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        video_ids = list(dict.fromkeys(video_ids))
+        found = {}
+        with sqlite_db.get_cursor() as cursor:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(video_ids), 500):
+                chunk = video_ids[start:start + 500]
+                cursor.execute(f"SELECT * FROM videos WHERE video_id IN ({', '.join(['?'] * len(chunk))})", chunk)
+                found.update((row['video_id'], row) for row in cursor.fetchall())
+        return found
+
+    @staticmethod
+    def get_all_videos(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute("SELECT * FROM videos ORDER BY published_time DESC LIMIT ? OFFSET ?", (limit, offset))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_latest_videos_for_channel(channel_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT * FROM videos WHERE channel_id = ? ORDER BY published_time DESC LIMIT ?",
+                (channel_id, limit)
+            )
+            return cursor.fetchall()
+
+    @staticmethod
+    def delete_video(video_id: str) -> bool:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def get_video_count() -> int:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS count FROM videos")
+            return cursor.fetchone()['count']
+
+    @staticmethod
+    def get_channel_stats(channel_id: str) -> Optional[Dict[str, Any]]:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT channel_id, COUNT(*) AS video_count, SUM(view_count) AS total_views, "
+                "MAX(published_time) AS latest_published FROM videos WHERE channel_id = ? GROUP BY channel_id",
+                (channel_id,)
+            )
+            return cursor.fetchone()
+
+
+class SQLiteTranscriptRepository:
+    """TranscriptRepository interface backed by the embedded SQLite database"""
+
+    @staticmethod
+    def create_table():
+        """Create transcripts table if it doesn't exist"""
+        with sqlite_db.get_cursor() as cursor:
+            cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT PRIMARY KEY REFERENCES videos(video_id) ON DELETE CASCADE,
+                transcript_raw TEXT,
+                status TEXT DEFAULT 'fetched',
+                error_message TEXT,
+                fetched_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                dirty INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS idx_status ON transcripts (status);
+            CREATE INDEX IF NOT EXISTS idx_transcripts_dirty ON transcripts (dirty);
+            CREATE TABLE IF NOT EXISTS transcript_languages (
+                video_id TEXT PRIMARY KEY,
+                languages TEXT NOT NULL,
+                listed_at TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            """)
+        logger.info("Transcripts table created or already exists (SQLite)")
+        return True
+
+    @staticmethod
+    def _params(video_id, transcript_raw=None, status='fetched', error_message=None) -> Dict[str, Any]:
+        return {
+            'video_id': video_id,
+            'transcript_raw': json.dumps(transcript_raw) if transcript_raw is not None else None,
+            'status': status,
+            'error_message': error_message,
+        }
+
+    @staticmethod
+    def upsert_transcript(video_id: str, transcript_raw: Optional[Any] = None, status: str = 'fetched', error_message: Optional[str] = None) -> bool:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute(SQLITE_TRANSCRIPT_UPSERT_QUERY, SQLiteTranscriptRepository._params(video_id, transcript_raw, status, error_message))
+        logger.info(f"Upserted transcript for video: {video_id} (status={status})")
+        return True
+
+    @staticmethod
+    def upsert_transcripts_batch(transcripts: List[Dict[str, Any]]) -> int:
+        rows = [
+            SQLiteTranscriptRepository._params(t['video_id'], t.get('transcript_raw'), t.get('status', 'fetched'), t.get('error_message'))
+            for t in transcripts
+        ]
+        with sqlite_db.get_cursor() as cursor:
+            cursor.executemany(SQLITE_TRANSCRIPT_UPSERT_QUERY, rows)
+        logger.info(f"Upserted {len(rows)} transcripts")
+        return len(rows)
+
+    @staticmethod
+    def get_transcript(video_id: str) -> Optional[Dict[str, Any]]:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute("SELECT * FROM transcripts WHERE video_id = ?", (video_id,))
+            return cursor.fetchone()
+
+    @staticmethod
+    def get_transcript_languages(video_id: str, max_age_hours: float = 168) -> Optional[List[Dict[str, Any]]]:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT languages FROM transcript_languages WHERE video_id = ? AND listed_at >= datetime('now', ?)",
+                (video_id, f'-{max_age_hours} hours')
+            )
+            row = cursor.fetchone()
+            return json.loads(row['languages']) if row else None
+
+    @staticmethod
+    def save_transcript_languages(video_id: str, languages: List[Dict[str, Any]]) -> bool:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute("""
+            INSERT INTO transcript_languages (video_id, languages) VALUES (?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET languages = excluded.languages, listed_at = CURRENT_TIMESTAMP
+            """, (video_id, json.dumps(languages)))
+        return True
+
+    @staticmethod
+    def get_videos_without_transcripts(limit: int = 100, offset: int = 0) -> List[str]:
+        """Return a list of video_ids that don't yet have a transcript stored."""
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute("""
+            SELECT v.video_id FROM videos v
+            LEFT JOIN transcripts t ON v.video_id = t.video_id
+            WHERE t.video_id IS NULL
+            ORDER BY v.published_time DESC
+            LIMIT ? OFFSET ?
+            """, (limit, offset))
+            return [r['video_id'] for r in cursor.fetchall()]
+
+
+def _mark_clean(table: str, rows: List[Dict[str, Any]]):
+    """Clear the dirty counter of pushed rows, unless they were written again since they were read"""
+    with sqlite_db.get_cursor() as cursor:
+        cursor.executemany(
+            f"UPDATE {table} SET dirty = 0 WHERE video_id = ? AND dirty = ?",
+            [(row['video_id'], row['dirty']) for row in rows]
+        )
+
+
+def sync_to_mysql(batch_size: int = 500) -> Dict[str, int]:
+    """
+    Push rows written since the last sync from SQLite to MySQL in bulk.
+
+    The MySQL database manager must already be initialized. Videos are pushed
+    before transcripts (foreign key); each pushed batch is marked clean.
+
+    Returns:
+        Dict with counts of videos and transcripts pushed
+    """
+    from database.video_repository import VideoRepository
+    from database.transcript_repository import TranscriptRepository
+
+    stats = {'videos': 0, 'transcripts': 0}
+
+    while True:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute(f"SELECT {', '.join(VIDEO_COLUMNS)}, dirty FROM videos WHERE dirty > 0 LIMIT ?", (batch_size,))
+            videos = cursor.fetchall()
+        if not videos:
+            break
+        VideoRepository.upsert_videos_batch([_video_params(v) for v in videos])
+        _mark_clean('videos', videos)
+        stats['videos'] += len(videos)
+
+    while True:
+        with sqlite_db.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT video_id, transcript_raw, status, error_message, dirty FROM transcripts WHERE dirty > 0 LIMIT ?",
+                (batch_size,)
+            )
+            rows = cursor.fetchall()
+        if not rows:
+            break
+        # Stored as JSON text; the MySQL repository serializes it again
+        TranscriptRepository.upsert_transcripts_batch([
+            dict(row, transcript_raw=json.loads(row['transcript_raw']) if row['transcript_raw'] is not None else None)
+            for row in rows
+        ])
+        _mark_clean('transcripts', rows)
+        stats['transcripts'] += len(rows)
+
+    logger.info(f"Synced SQLite to MySQL: {stats}")
+    return stats
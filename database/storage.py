@@ -0,0 +1,35 @@
+"""
+Storage backend selection
+
+DB_BACKEND=mysql (default) uses the MySQL repositories over DatabaseManager;
+DB_BACKEND=sqlite uses the embedded SQLite (WAL) repositories, which need no
+server or SSH tunnel and can later be pushed to MySQL with sync_sqlite_to_mysql.py.
+"""
+
+import os
+
+
+def get_storage_backend() -> str:
+    """Return the configured storage backend name ('mysql' or 'sqlite')"""
+    backend = os.getenv('DB_BACKEND', 'mysql').lower()
+    if backend not in ('mysql', 'sqlite'):
+        raise ValueError(f"Unsupported DB_BACKEND '{backend}' (expected 'mysql' or 'sqlite')")
+    return backend
+
+
+def get_video_repository():
+    """Return the video repository class for the configured backend"""
+    if get_storage_backend() == 'sqlite':
+        from database.sqlite_backend import SQLiteVideoRepository
+        return SQLiteVideoRepository
+    from database.video_repository import VideoRepository
+    return VideoRepository
+
+
+def get_transcript_repository():
+    """Return the transcript repository class for the configured backend"""
+    if get_storage_backend() == 'sqlite':
+        from database.sqlite_backend import SQLiteTranscriptRepository
+        return SQLiteTranscriptRepository
+    from database.transcript_repository import TranscriptRepository
+    return TranscriptRepository
@@ -0,0 +1,301 @@
+"""
+Tiered cold storage for old transcripts
+
+archive_transcripts() moves fetched transcripts older than N days out of the
+hot InnoDB table into compressed shards on local disk. Deduplicated rows
+(see transcript_payloads) are archived with their resolved payload. The hot
+row stays behind as a stub (status 'archived', transcript_raw and payload_hash
+NULL), so the transcript backlog query still sees the video as done, and
+get_transcript() reads the payload from the archive when it meets a stub.
+
+A shard is written once and never modified:
+
+    shard-<n>.dat   zlib-compressed JSON records, back to back
+    shard-<n>.idx   fixed-size entries (key, offset, length) sorted by key,
+                    where key is an 8-byte hash of the video_id
+
+Lookups binary-search the mmap'ed index of each shard, newest shard first,
+and check the video_id stored in the record, so hash collisions are harmless.
+Both files are written under temporary names and the index is renamed last:
+a shard exists once its .idx does, and hot rows are only stubbed after that.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from database.db_manager import get_db_cursor, logger
+from database.video_ids import encode_video_id, decode_video_id
+from mysql.connector import Error
+
+ARCHIVED_STATUS = 'archived'
+
+# key (8 bytes), offset (uint64), length (uint32)
+INDEX_ENTRY = struct.Struct('>8sQI')
+
+_SHARD_INDEX = re.compile(r'^shard-(\d+)\.idx$')
+
+ARCHIVED_FIELDS = ('transcript_raw', 'status', 'error_message', 'fetched_at', 'created_at', 'updated_at')
+_TIMESTAMP_FIELDS = ('fetched_at', 'created_at', 'updated_at')
+
+# Keyset pages of archivable transcripts: fetched before the cutoff, after the previous page.
+# Deduplicated rows (transcript_raw NULL, see transcript_payloads) are archived with their
+# resolved payload; stubbing drops the hash, and purge_orphaned_payloads() frees the payload
+# once no hot row shares it.
+ARCHIVE_CANDIDATES_QUERY = """
+SELECT t.video_id, COALESCE(t.transcript_raw, p.transcript_raw) AS transcript_raw,
+       t.status, t.error_message, t.fetched_at, t.created_at, t.updated_at
+FROM transcripts t
+LEFT JOIN transcript_payloads p ON p.payload_hash = t.payload_hash
+WHERE t.status = 'fetched' AND (t.transcript_raw IS NOT NULL OR p.transcript_raw IS NOT NULL)
+  AND t.fetched_at < %s AND (t.fetched_at > %s OR (t.fetched_at = %s AND t.video_id > %s))
+ORDER BY t.fetched_at, t.video_id
+LIMIT %s
+"""
+
+
+def archive_key(video_id: str) -> bytes:
+    return hashlib.blake2b(video_id.encode(), digest_size=8).digest()
+
+
+def encode_record(row: Dict[str, Any]) -> bytes:
+    record = {'video_id': row['video_id']}
+    for field in ARCHIVED_FIELDS:
+        value = row.get(field)
+        record[field] = value.isoformat() if isinstance(value, datetime) else value
+    return zlib.compress(json.dumps(record).encode(), 6)
+
+
+def decode_record(data: bytes) -> Dict[str, Any]:
+    record = json.loads(zlib.decompress(data))
+    for field in _TIMESTAMP_FIELDS:
+        if record.get(field):
+            record[field] = datetime.fromisoformat(record[field])
+    return record
+
+
+class ArchiveShard:
+    """Read-only view of one sealed shard through mmap"""
+
+    def __init__(self, index_path: str, data_path: str):
+        self.index_path = index_path
+        self.data_path = data_path
+        with open(index_path, 'rb') as index_file, open(data_path, 'rb') as data_file:
+            # mmap of an empty file is not allowed; an empty shard has nothing to find
+            self._index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(index_path) else b''
+            self._data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(data_path) else b''
+        self.entries = len(self._index) // INDEX_ENTRY.size
+
+    def _key_at(self, position: int) -> bytes:
+        start = position * INDEX_ENTRY.size
+        return self._index[start:start + 8]
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        key = archive_key(video_id)
+        low, high = 0, self.entries
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self.entries and self._key_at(low) == key:
+            _, offset, length = INDEX_ENTRY.unpack_from(self._index, low * INDEX_ENTRY.size)
+            record = decode_record(self._data[offset:offset + length])
+            if record['video_id'] == video_id:
+                return record
+            low += 1
+        return None
+
+    def close(self):
+        for mapped in (self._index, self._data):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+
+class TranscriptArchive:
+    """
+    Directory of append-only transcript shards
+
+    Args:
+        root: Directory holding shard-<n>.dat / shard-<n>.idx files
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._shards: List[ArchiveShard] = []
+        self._loaded = set()
+        self._listed_mtime = None
+
+    def _shard_numbers(self) -> List[int]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(int(match.group(1)) for match in map(_SHARD_INDEX.match, os.listdir(self.root)) if match)
+
+    def _path(self, number: int, suffix: str) -> str:
+        return os.path.join(self.root, f"shard-{number:06d}.{suffix}")
+
+    def refresh(self):
+        """Open shards sealed since the last refresh (e.g. by another process)"""
+        with self._lock:
+            # Sealing a shard renames its index into the directory, which bumps the mtime
+            try:
+                mtime = os.stat(self.root).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime == self._listed_mtime:
+                return
+            self._listed_mtime = mtime
+            for number in self._shard_numbers():
+                if number not in self._loaded:
+                    self._shards.append(ArchiveShard(self._path(number, 'idx'), self._path(number, 'dat')))
+                    self._loaded.add(number)
+            self._shards.sort(key=lambda shard: shard.index_path, reverse=True)
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Latest archived record of a video, or None"""
+        self.refresh()
+        for shard in list(self._shards):
+            record = shard.get(video_id)
+            if record is not None:
+                return record
+        return None
+
+    def write_shard(self, rows: Iterable[Dict[str, Any]]) -> Optional[str]:
+        """
+        Write rows (with decoded video_id) into a new sealed shard
+
+        Returns:
+            str: Index path of the shard, or None if rows was empty
+        """
+        os.makedirs(self.root, exist_ok=True)
+        numbers = self._shard_numbers()
+        number = numbers[-1] + 1 if numbers else 1
+        data_path, index_path = self._path(number, 'dat'), self._path(number, 'idx')
+
+        entries = []
+        offset = 0
+        with open(f"{data_path}.tmp", 'wb') as data_file:
+            for row in rows:
+                record = encode_record(row)
+                data_file.write(record)
+                entries.append((archive_key(row['video_id']), offset, len(record)))
+                offset += len(record)
+            data_file.flush()
+            os.fsync(data_file.fileno())
+        if not entries:
+            os.remove(f"{data_path}.tmp")
+            return None
+
+        entries.sort()
+        with open(f"{index_path}.tmp", 'wb') as index_file:
+            for entry in entries:
+                index_file.write(INDEX_ENTRY.pack(*entry))
+            index_file.flush()
+            os.fsync(index_file.fileno())
+        os.replace(f"{data_path}.tmp", data_path)
+        os.replace(f"{index_path}.tmp", index_path)
+        return index_path
+
+    def close(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.close()
+            self._shards = []
+            self._loaded = set()
+            self._listed_mtime = None
+
+
+_transcript_archive: Optional[TranscriptArchive] = None
+
+
+def get_transcript_archive() -> TranscriptArchive:
+    """Return the process-wide archive rooted at TRANSCRIPT_ARCHIVE_DIR"""
+    global _transcript_archive
+    if _transcript_archive is None:
+        _transcript_archive = TranscriptArchive(os.getenv('TRANSCRIPT_ARCHIVE_DIR', 'transcript_archive'))
+        _transcript_archive.refresh()
+    return _transcript_archive
+
+
+def _stub_archived(video_ids: List[str], started: datetime):
+    """Drop archived payloads from the hot table, unless the row was rewritten after the job started"""
+    with get_db_cursor() as cursor:
+        for start in range(0, len(video_ids), 1000):
+            chunk = video_ids[start:start + 1000]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f"UPDATE transcripts SET transcript_raw = NULL, payload_hash = NULL, status = %s "
+                f"WHERE video_id IN ({placeholders}) AND status = 'fetched' AND updated_at < %s",
+                (ARCHIVED_STATUS, *(encode_video_id(video_id) for video_id in chunk), started)
+            )
+
+
+def archive_transcripts(older_than_days: int, shard_records: int = 10000, page_size: int = 500,
+                        archive: Optional[TranscriptArchive] = None) -> Dict[str, int]:
+    """
+    Move transcripts fetched more than older_than_days ago into archive shards
+
+    Each shard of up to shard_records transcripts is sealed before its hot
+    rows are stubbed, so an interrupted run loses nothing; it only leaves
+    payloads that are both archived and still hot, which the next run
+    archives again into a newer shard. Run one archiver at a time: shard
+    numbers are picked from the directory listing.
+
+    Returns:
+        Dict with 'archived' transcripts and 'shards' written
+    """
+    archive = archive or get_transcript_archive()
+    with get_db_cursor() as cursor:
+        cursor.execute("SELECT NOW() AS now, NOW() - INTERVAL %s DAY AS cutoff", (older_than_days,))
+        bounds = cursor.fetchone()
+    started, cutoff = bounds['now'], bounds['cutoff']
+
+    stats = {'archived': 0, 'shards': 0}
+    last_fetched, last_id = datetime(1970, 1, 1), ''
+    done = False
+    try:
+        while not done:
+            pending = []
+            while len(pending) < shard_records:
+                with get_db_cursor() as cursor:
+                    cursor.execute(ARCHIVE_CANDIDATES_QUERY, (cutoff, last_fetched, last_fetched, last_id,
+                                                              min(page_size, shard_records - len(pending))))
+                    rows = cursor.fetchall()
+                if not rows:
+                    done = True
+                    break
+                last_fetched, last_id = rows[-1]['fetched_at'], rows[-1]['video_id']
+                for row in rows:
+                    row['video_id'] = decode_video_id(row['video_id'])
+                pending.extend(rows)
+
+            if archive.write_shard(pending):
+                _stub_archived([row['video_id'] for row in pending], started)
+                stats['archived'] += len(pending)
+                stats['shards'] += 1
+                logger.info(f"Archived {len(pending)} transcripts ({stats['archived']} so far)")
+        return stats
+    except Error as e:
+        logger.error(f"Error archiving transcripts: {e}")
+        raise
+
+
+def load_archived(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Fill an 'archived' stub row from the archive; other rows are returned unchanged"""
+    if row is None or row.get('status') != ARCHIVED_STATUS:
+        return row
+    record = get_transcript_archive().get(row['video_id'])
+    if record is None:
+        logger.warning(f"Transcript {row['video_id']} is marked archived but missing from the archive")
+        return row
+    row.update((field, record[field]) for field in ARCHIVED_FIELDS if field != 'updated_at')
+    return row
@@ -0,0 +1,222 @@
+"""
+Content-addressed storage of transcript payloads
+
+With DB_TRANSCRIPT_DEDUP=true, transcript writes hash the serialized payload
+(SHA-256). A transcript whose stored hash already matches is not written at
+all. Otherwise the payload goes into transcript_payloads once per distinct
+hash, and the transcripts row keeps only payload_hash with transcript_raw
+NULL. Retried fetches and byte-identical transcripts of re-uploads therefore
+cost no LONGTEXT writes.
+
+Readers resolve the payload through resolve_payloads(), so rows written with
+and without deduplication can be mixed. Payloads no longer referenced are
+removed by purge_orphaned_payloads().
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+
+from database.db_manager import get_db_cursor, logger
+from mysql.connector import Error
+
+TRANSCRIPT_PAYLOADS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS transcript_payloads (
+    payload_hash BINARY(32) PRIMARY KEY,
+    transcript_raw LONGTEXT NOT NULL,
+    size INT UNSIGNED NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+TRANSCRIPT_DEDUP_UPSERT_QUERY = """
+INSERT INTO transcripts (video_id, transcript_raw, payload_hash, status, error_message)
+VALUES (%(video_id)s, %(transcript_raw)s, %(payload_hash)s, %(status)s, %(error_message)s)
+ON DUPLICATE KEY UPDATE
+    transcript_raw = VALUES(transcript_raw),
+    payload_hash = VALUES(payload_hash),
+    status = VALUES(status),
+    error_message = VALUES(error_message),
+    fetched_at = CURRENT_TIMESTAMP
+"""
+
+# IDs/hashes per IN (...) list
+LOOKUP_BATCH_SIZE = 1000
+
+
+def transcript_dedup_enabled() -> bool:
+    """True when DB_TRANSCRIPT_DEDUP=true: transcript payloads are stored once per content hash"""
+    return os.getenv('DB_TRANSCRIPT_DEDUP', 'false').lower() == 'true'
+
+
+def payload_hash(transcript_raw: str) -> bytes:
+    return hashlib.sha256(transcript_raw.encode()).digest()
+
+
+def _key(value):
+    # Older connector versions return BINARY columns as (unhashable) bytearray
+    return bytes(value) if isinstance(value, bytearray) else value
+
+
+STORED_HASHES_QUERY = "SELECT video_id, payload_hash, status FROM transcripts WHERE video_id IN ({placeholders})"
+
+# Share locks keep purge_orphaned_payloads() from deleting a payload we are about to reference
+EXISTING_PAYLOADS_QUERY = "SELECT payload_hash FROM transcript_payloads WHERE payload_hash IN ({placeholders}) FOR SHARE"
+
+# IGNORE: a concurrent writer may store the same payload first
+PAYLOAD_INSERT_QUERY = "INSERT IGNORE INTO transcript_payloads (payload_hash, transcript_raw, size) VALUES (%s, %s, %s)"
+
+PAYLOADS_QUERY = "SELECT payload_hash, transcript_raw FROM transcript_payloads WHERE payload_hash IN ({placeholders})"
+
+
+def _select_in(cursor, query: str, values: List[Any]) -> List[Dict[str, Any]]:
+    """Run query, whose {placeholders} is an IN list, over values in chunks"""
+    rows = []
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        chunk = values[start:start + LOOKUP_BATCH_SIZE]
+        cursor.execute(query.format(placeholders=', '.join(['%s'] * len(chunk))), tuple(chunk))
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+async def _async_select_in(cursor, query: str, values: List[Any]) -> List[Dict[str, Any]]:
+    """_select_in() with an aiomysql cursor"""
+    rows = []
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        chunk = values[start:start + LOOKUP_BATCH_SIZE]
+        await cursor.execute(query.format(placeholders=', '.join(['%s'] * len(chunk))), tuple(chunk))
+        rows.extend(await cursor.fetchall())
+    return rows
+
+
+def _hash_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop duplicate video_ids (last wins) and set payload_hash"""
+    rows = list({row['video_id']: row for row in rows}.values())
+    for row in rows:
+        row['payload_hash'] = payload_hash(row['transcript_raw']) if row['transcript_raw'] is not None else None
+    return rows
+
+
+def _changed_rows(rows: List[Dict[str, Any]], stored_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Rows whose payload hash or status differs from the stored row"""
+    stored = {_key(row['video_id']): row for row in stored_rows}
+    return [
+        row for row in rows
+        if row['payload_hash'] is None
+        or stored.get(row['video_id'], {}).get('payload_hash') != row['payload_hash']
+        or stored[row['video_id']]['status'] != row['status']
+    ]
+
+
+def _new_payloads(to_write: List[Dict[str, Any]]) -> Dict[bytes, str]:
+    return {row['payload_hash']: row['transcript_raw'] for row in to_write if row['payload_hash'] is not None}
+
+
+def _missing_payloads(payloads: Dict[bytes, str], existing_rows: List[Dict[str, Any]]) -> List[tuple]:
+    """PAYLOAD_INSERT_QUERY parameters for payloads not stored yet"""
+    existing = {_key(row['payload_hash']) for row in existing_rows}
+    return [(digest, text, len(text)) for digest, text in payloads.items() if digest not in existing]
+
+
+def _strip_payloads(to_write: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for row in to_write:
+        if row['payload_hash'] is not None:
+            row['transcript_raw'] = None
+    return to_write
+
+
+def dedup_transcript_rows(cursor, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Prepare transcript_params() rows for TRANSCRIPT_DEDUP_UPSERT_QUERY inside the caller's transaction
+
+    Drops rows whose stored payload already has the same hash, stores new
+    payloads in transcript_payloads and replaces transcript_raw with
+    payload_hash on the rest.
+
+    Returns:
+        The rows that still need writing (with encoded video_id)
+    """
+    rows = _hash_rows(rows)
+    to_write = _changed_rows(rows, _select_in(cursor, STORED_HASHES_QUERY, [row['video_id'] for row in rows]))
+    payloads = _new_payloads(to_write)
+    missing = _missing_payloads(payloads, _select_in(cursor, EXISTING_PAYLOADS_QUERY, list(payloads)))
+    if missing:
+        cursor.executemany(PAYLOAD_INSERT_QUERY, missing)
+    return _strip_payloads(to_write)
+
+
+async def async_dedup_transcript_rows(cursor, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """dedup_transcript_rows() with an aiomysql cursor"""
+    rows = _hash_rows(rows)
+    to_write = _changed_rows(rows, await _async_select_in(cursor, STORED_HASHES_QUERY, [row['video_id'] for row in rows]))
+    payloads = _new_payloads(to_write)
+    missing = _missing_payloads(payloads, await _async_select_in(cursor, EXISTING_PAYLOADS_QUERY, list(payloads)))
+    if missing:
+        await cursor.executemany(PAYLOAD_INSERT_QUERY, missing)
+    return _strip_payloads(to_write)
+
+
+def _unresolved_hashes(rows: List[Optional[Dict[str, Any]]]) -> List[bytes]:
+    return list({
+        _key(row['payload_hash']) for row in rows
+        if row is not None and row.get('transcript_raw') is None and row.get('payload_hash') is not None
+    })
+
+
+def _fill_payloads(rows: List[Optional[Dict[str, Any]]], payload_rows: List[Dict[str, Any]]):
+    payloads = {_key(row['payload_hash']): row['transcript_raw'] for row in payload_rows}
+    for row in rows:
+        if row is not None and row.get('transcript_raw') is None and _key(row.get('payload_hash')) in payloads:
+            row['transcript_raw'] = payloads[_key(row['payload_hash'])]
+
+
+def resolve_payloads(cursor, rows: List[Optional[Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+    """Fill transcript_raw of deduplicated rows from transcript_payloads, in place"""
+    hashes = _unresolved_hashes(rows)
+    if hashes:
+        _fill_payloads(rows, _select_in(cursor, PAYLOADS_QUERY, hashes))
+    return rows
+
+
+async def async_resolve_payloads(cursor, rows: List[Optional[Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+    """resolve_payloads() with an aiomysql cursor"""
+    hashes = _unresolved_hashes(rows)
+    if hashes:
+        _fill_payloads(rows, await _async_select_in(cursor, PAYLOADS_QUERY, hashes))
+    return rows
+
+
+def purge_orphaned_payloads(chunk_size: int = 1000) -> int:
+    """
+    Delete payloads no transcript references any more
+
+    Returns:
+        int: Number of payloads deleted
+    """
+    deleted = 0
+    try:
+        while True:
+            with get_db_cursor() as cursor:
+                cursor.execute("""
+                SELECT p.payload_hash FROM transcript_payloads p
+                LEFT JOIN transcripts t ON t.payload_hash = p.payload_hash
+                WHERE t.video_id IS NULL
+                LIMIT %s
+                """, (chunk_size,))
+                orphans = [row['payload_hash'] for row in cursor.fetchall()]
+                if orphans:
+                    placeholders = ', '.join(['%s'] * len(orphans))
+                    # Re-check under lock: a writer may have referenced the payload since
+                    cursor.execute(f"""
+                    DELETE p FROM transcript_payloads p
+                    LEFT JOIN transcripts t ON t.payload_hash = p.payload_hash
+                    WHERE p.payload_hash IN ({placeholders}) AND t.video_id IS NULL
+                    """, tuple(orphans))
+                    deleted += cursor.rowcount
+            if len(orphans) < chunk_size:
+                break
+        logger.info(f"Purged {deleted} orphaned transcript payloads")
+        return deleted
+    except Error as e:
+        logger.error(f"Error purging transcript payloads: {e}")
+        raise
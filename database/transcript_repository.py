@@ -5,37 +5,98 @@ This repository handles transcripts CRUD and queries for missing transcripts
 used by the transcript fetcher script.
 """
 
-from database.db_manager import get_db_cursor, logger
+from database.db_manager import get_db_cursor, get_db_prepared_cursor, logger, retry_on_disconnect
+from database.cache import transcript_cache, MISSING
+from database.change_log import change_log_enabled, transcript_event, append_events
+from database.transcript_archive import load_archived
+from database.transcript_payloads import (
+    TRANSCRIPT_PAYLOADS_TABLE_DDL, TRANSCRIPT_DEDUP_UPSERT_QUERY, transcript_dedup_enabled,
+    dedup_transcript_rows, resolve_payloads
+)
+from database.video_ids import video_id_column_type, encode_video_id, decode_video_id, decode_video_row
 from mysql.connector import Error, IntegrityError
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import json
 
 
+# Rows per multi-row INSERT in batch upserts; kept small because payloads are LONGTEXT
+TRANSCRIPT_BATCH_SIZE = 50
+
+TRANSCRIPT_UPSERT_QUERY = """
+INSERT INTO transcripts (video_id, transcript_raw, status, error_message)
+VALUES (%(video_id)s, %(transcript_raw)s, %(status)s, %(error_message)s)
+ON DUPLICATE KEY UPDATE
+    transcript_raw = VALUES(transcript_raw),
+    status = VALUES(status),
+    error_message = VALUES(error_message),
+    fetched_at = CURRENT_TIMESTAMP
+"""
+
+# transcripts table definition; video_id matches the videos key type (DB_VIDEO_ID_FORMAT)
+TRANSCRIPTS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    video_id {id_type} PRIMARY KEY,
+    transcript_raw LONGTEXT,
+    payload_hash BINARY(32) NULL,
+    status VARCHAR(20) DEFAULT 'fetched',
+    error_message TEXT,
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    CONSTRAINT {fk_name} FOREIGN KEY (video_id) REFERENCES {videos_table}(video_id) ON DELETE CASCADE,
+    INDEX idx_status (status),
+    INDEX idx_fetched_at (fetched_at),
+    INDEX idx_updated_at (updated_at),
+    INDEX idx_payload_hash (payload_hash)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+# Transcripts listed per video (language_code, language, is_generated, is_translatable)
+TRANSCRIPT_LANGUAGES_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS transcript_languages (
+    video_id {id_type} PRIMARY KEY,
+    languages JSON NOT NULL,
+    listed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+VIDEOS_WITHOUT_TRANSCRIPTS_QUERY = """
+SELECT v.video_id FROM videos v
+LEFT JOIN transcripts t ON v.video_id = t.video_id
+WHERE t.video_id IS NULL
+ORDER BY v.published_time DESC
+LIMIT %s OFFSET %s
+"""
+
+
+def transcript_params(video_id: str, transcript_raw: Optional[Any] = None, status: str = 'fetched', error_message: Optional[str] = None) -> Dict[str, Any]:
+    """Build TRANSCRIPT_UPSERT_QUERY parameters, serializing the raw payload to JSON."""
+    return {
+        'video_id': encode_video_id(video_id),
+        'transcript_raw': json.dumps(transcript_raw) if transcript_raw is not None else None,
+        'status': status,
+        'error_message': error_message,
+    }
+
+
 class TranscriptRepository:
     """Repository for transcripts table operations"""
 
     @staticmethod
+    @retry_on_disconnect
     def create_table():
         """Create transcripts table if it doesn't exist"""
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS transcripts (
-            video_id VARCHAR(20) PRIMARY KEY,
-            transcript_raw LONGTEXT,
-            status VARCHAR(20) DEFAULT 'fetched',
-            error_message TEXT,
-            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            CONSTRAINT fk_transcript_video FOREIGN KEY (video_id) REFERENCES videos(video_id) ON DELETE CASCADE,
-            INDEX idx_status (status),
-            INDEX idx_fetched_at (fetched_at)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
-        """
+        create_table_query = TRANSCRIPTS_TABLE_DDL.format(
+            table='transcripts', id_type=video_id_column_type(),
+            fk_name='fk_transcript_video', videos_table='videos'
+        )
 
         try:
             with get_db_cursor() as cursor:
                 cursor.execute(create_table_query)
+                cursor.execute(TRANSCRIPT_PAYLOADS_TABLE_DDL)
+                cursor.execute(TRANSCRIPT_LANGUAGES_TABLE_DDL.format(id_type=video_id_column_type()))
                 logger.info("Transcripts table created or already exists")
                 return True
         except Error as e:
@@ -43,64 +104,140 @@ class TranscriptRepository:
             raise
 
     @staticmethod
+    @retry_on_disconnect(idempotent=False)
     def upsert_transcript(video_id: str, transcript_raw: Optional[Dict[str, Any]] = None, status: str = 'fetched', error_message: Optional[str] = None) -> bool:
         """Insert or update raw transcript data for a video.
 
         Stores only the raw transcript payload (list of snippet dicts) and status/error metadata.
         """
-        upsert_query = """
-        INSERT INTO transcripts (video_id, transcript_raw, status, error_message)
-        VALUES (%(video_id)s, %(transcript_raw)s, %(status)s, %(error_message)s)
-        ON DUPLICATE KEY UPDATE
-            transcript_raw = VALUES(transcript_raw),
-            status = VALUES(status),
-            error_message = VALUES(error_message),
-            fetched_at = CURRENT_TIMESTAMP
+        params = transcript_params(video_id, transcript_raw, status, error_message)
+
+        try:
+            with get_db_prepared_cursor() as cursor:
+                if transcript_dedup_enabled():
+                    rows = dedup_transcript_rows(cursor, [params])
+                    if not rows:
+                        logger.info(f"Transcript for video {video_id} unchanged, skipped")
+                        return True
+                    cursor.execute(TRANSCRIPT_DEDUP_UPSERT_QUERY, rows[0])
+                else:
+                    cursor.execute(TRANSCRIPT_UPSERT_QUERY, params)
+                if status == 'fetched' and change_log_enabled():
+                    append_events(cursor, [transcript_event(video_id, transcript_raw)])
+                logger.info(f"Upserted transcript for video: {video_id} (status={status})")
+            transcript_cache.invalidate(video_id)
+            return True
+        except Error as e:
+            logger.error(f"Error upserting transcript for {video_id}: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect(idempotent=False)
+    def upsert_transcripts_batch(transcripts: List[Dict[str, Any]]) -> int:
+        """Upsert many transcripts in one transaction using multi-row INSERTs.
+
+        Each item is a dict with video_id and optional transcript_raw, status, error_message.
+        Returns the number of transcripts processed.
         """
+        rows = [
+            transcript_params(t['video_id'], t.get('transcript_raw'), t.get('status', 'fetched'), t.get('error_message'))
+            for t in transcripts
+        ]
 
-        params = {
-            'video_id': video_id,
-            'transcript_raw': json.dumps(transcript_raw) if transcript_raw is not None else None,
-            'status': status,
-            'error_message': error_message,
-        }
+        dedup = transcript_dedup_enabled()
+        upsert_query = TRANSCRIPT_DEDUP_UPSERT_QUERY if dedup else TRANSCRIPT_UPSERT_QUERY
 
         try:
             with get_db_cursor() as cursor:
-                cursor.execute(upsert_query, params)
-                logger.info(f"Upserted transcript for video: {video_id} (status={status})")
-                return True
+                to_write = dedup_transcript_rows(cursor, rows) if dedup else rows
+                for start in range(0, len(to_write), TRANSCRIPT_BATCH_SIZE):
+                    cursor.executemany(upsert_query, to_write[start:start + TRANSCRIPT_BATCH_SIZE])
+                written = {row['video_id'] for row in to_write} if dedup else None
+                if change_log_enabled():
+                    append_events(cursor, [
+                        transcript_event(t['video_id'], t.get('transcript_raw'))
+                        for t in transcripts
+                        if t.get('status', 'fetched') == 'fetched'
+                        and (written is None or encode_video_id(t['video_id']) in written)
+                    ])
+                skipped = len(rows) - len(to_write)
+                logger.info(f"Upserted {len(to_write)} transcripts" + (f", skipped {skipped} unchanged" if skipped else ""))
+            transcript_cache.invalidate_many(t['video_id'] for t in transcripts)
+            return len(rows)
         except Error as e:
-            logger.error(f"Error upserting transcript for {video_id}: {e}")
+            logger.error(f"Error during batch transcript upsert: {e}")
             raise
 
     @staticmethod
+    @retry_on_disconnect
     def get_transcript(video_id: str) -> Optional[Dict[str, Any]]:
+        cached = transcript_cache.get(video_id)
+        if cached is not MISSING:
+            return cached
+
         select_query = "SELECT * FROM transcripts WHERE video_id = %s"
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(select_query, (video_id,))
-                return cursor.fetchone()
+            with get_db_prepared_cursor() as cursor:
+                cursor.execute(select_query, (encode_video_id(video_id),))
+                result = decode_video_row(cursor.fetchone())
+                resolve_payloads(cursor, [result])
+            # Archived rows are stubs; the payload lives in the cold-storage shards
+            result = load_archived(result)
+            transcript_cache.set(video_id, result)
+            return result
         except Error as e:
             logger.error(f"Error retrieving transcript for {video_id}: {e}")
             raise
 
     @staticmethod
-    def get_videos_without_transcripts(limit: int = 100, offset: int = 0) -> List[str]:
-        """Return a list of video_ids that don't yet have a transcript stored."""
-        query = """
-        SELECT v.video_id FROM videos v
-        LEFT JOIN transcripts t ON v.video_id = t.video_id
-        WHERE t.video_id IS NULL
-        ORDER BY v.published_time DESC
-        LIMIT %s OFFSET %s
+    @retry_on_disconnect
+    def get_transcript_languages(video_id: str, max_age_hours: float = 168) -> Optional[List[Dict[str, Any]]]:
+        """
+        Cached listing of a video's transcripts, if listed within max_age_hours
+
+        Returns:
+            List of {language_code, language, is_generated, is_translatable}
+            (a single {transcripts_disabled, error} marker if transcripts are
+            disabled), or None if not cached
         """
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(
+                    "SELECT languages FROM transcript_languages "
+                    "WHERE video_id = %s AND listed_at >= NOW() - INTERVAL %s HOUR",
+                    (encode_video_id(video_id), max_age_hours)
+                )
+                row = cursor.fetchone()
+                return json.loads(row['languages']) if row else None
+        except Error as e:
+            logger.error(f"Error reading transcript languages for {video_id}: {e}")
+            raise
 
+    @staticmethod
+    @retry_on_disconnect
+    def save_transcript_languages(video_id: str, languages: List[Dict[str, Any]]) -> bool:
+        """Cache the transcripts listed for a video"""
+        try:
+            with get_db_cursor() as cursor:
+                # listed_at is set explicitly: an identical listing would not trigger ON UPDATE
+                cursor.execute("""
+                INSERT INTO transcript_languages (video_id, languages) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE languages = VALUES(languages), listed_at = CURRENT_TIMESTAMP
+                """, (encode_video_id(video_id), json.dumps(languages)))
+            return True
+        except Error as e:
+            logger.error(f"Error saving transcript languages for {video_id}: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def get_videos_without_transcripts(limit: int = 100, offset: int = 0) -> List[str]:
+        """Return a list of video_ids that don't yet have a transcript stored."""
         try:
             with get_db_cursor() as cursor:
-                cursor.execute(query, (limit, offset))
+                cursor.execute(VIDEOS_WITHOUT_TRANSCRIPTS_QUERY, (limit, offset))
                 rows = cursor.fetchall()
-                return [r['video_id'] for r in rows]
+                return [decode_video_id(r['video_id']) for r in rows]
         except Error as e:
             logger.error(f"Error fetching videos without transcripts: {e}")
             raise
@@ -0,0 +1,237 @@
+"""
+Online migration of videos/transcripts from VARCHAR(20) to BINARY(8) video IDs
+
+copy_to_binary() builds videos_bin/transcripts_bin next to the live tables
+and fills them with server-side INSERT ... SELECT in primary-key chunks, then
+runs catch-up passes over rows updated since the previous pass while crawlers
+keep writing. swap_tables() - run with writers stopped, since they must be
+restarted with DB_VIDEO_ID_FORMAT=binary anyway - does a last catch-up and
+renames the tables atomically, keeping the originals as *_varchar_old.
+
+If the change_events outbox exists it is migrated the same way into
+change_events_bin, keeping each event's seq so consumer positions stay valid.
+Events are never updated, so its catch-up passes copy events created since
+the previous pass and ignore the ones already copied.
+
+Rows with IDs that are not canonical 11-character base64url strings cannot be
+represented and are left behind (counted in the returned stats). Deletes made
+during the copy are not propagated.
+"""
+
+import time
+from typing import Any, Dict
+
+from database.change_log import CHANGE_EVENTS_TABLE_DDL
+from database.db_manager import get_db_cursor, logger
+from database.migrations import apply_migrations
+from database.video_ids import CANONICAL_VIDEO_ID_REGEXP, VIDEO_ID_TO_BINARY_SQL
+from database.video_repository import VIDEOS_TABLE_DDL
+from database.transcript_repository import TRANSCRIPTS_TABLE_DDL, TRANSCRIPT_LANGUAGES_TABLE_DDL
+
+VIDEO_COLUMNS = (
+    'channel_id', 'published_time', 'view_count', 'published_time_raw',
+    'view_count_raw', 'created_at', 'updated_at'
+)
+TRANSCRIPT_COLUMNS = (
+    'transcript_raw', 'payload_hash', 'status', 'error_message', 'fetched_at', 'created_at', 'updated_at'
+)
+
+# Source table -> (binary copy, non-key columns copied)
+MIGRATED_TABLES = {
+    'videos': ('videos_bin', VIDEO_COLUMNS),
+    'transcripts': ('transcripts_bin', TRANSCRIPT_COLUMNS),
+}
+
+
+def _copy_query(source: str, condition: str) -> str:
+    target, columns = MIGRATED_TABLES[source]
+    column_list = ', '.join(columns)
+    updates = ', '.join(f"{column} = VALUES({column})" for column in columns)
+    binary_id = VIDEO_ID_TO_BINARY_SQL.format(column='video_id')
+    if source == 'transcripts':
+        # Transcripts of videos inserted after the videos copy wait for a catch-up pass
+        condition += f" AND EXISTS (SELECT 1 FROM videos_bin WHERE videos_bin.video_id = {binary_id})"
+    return f"""
+    INSERT INTO {target} (video_id, {column_list})
+    SELECT {binary_id}, {column_list}
+    FROM {source}
+    WHERE {condition} AND REGEXP_LIKE(video_id, '{CANONICAL_VIDEO_ID_REGEXP}', 'c')
+    ON DUPLICATE KEY UPDATE {updates}
+    """
+
+EVENT_COLUMNS = ('seq', 'event_type', 'channel_id', 'payload', 'created_at')
+
+
+def _events_copy_query(condition: str) -> str:
+    column_list = ', '.join(EVENT_COLUMNS)
+    return f"""
+    INSERT IGNORE INTO change_events_bin (video_id, {column_list})
+    SELECT {VIDEO_ID_TO_BINARY_SQL.format(column='video_id')}, {column_list}
+    FROM change_events
+    WHERE {condition} AND REGEXP_LIKE(video_id, '{CANONICAL_VIDEO_ID_REGEXP}', 'c')
+    """
+
+
+def _has_change_events() -> bool:
+    with get_db_cursor() as cursor:
+        cursor.execute("SHOW TABLES LIKE 'change_events'")
+        return bool(cursor.fetchall())
+
+
+def create_binary_tables(events: bool = False):
+    """Create the BINARY(8) copies of videos and transcripts (and change_events if events)"""
+    with get_db_cursor() as cursor:
+        cursor.execute(VIDEOS_TABLE_DDL.format(table='videos_bin', id_type='BINARY(8)'))
+        cursor.execute(TRANSCRIPTS_TABLE_DDL.format(
+            table='transcripts_bin', id_type='BINARY(8)',
+            fk_name='fk_transcript_video_bin', videos_table='videos_bin'
+        ))
+        if events:
+            cursor.execute(CHANGE_EVENTS_TABLE_DDL.format(table='change_events_bin', id_type='BINARY(8)'))
+
+
+def _copy_table(source: str, chunk_size: int, pause: float) -> int:
+    """Copy a whole table in primary-key ranges of chunk_size rows; returns rows copied"""
+    copied = 0
+    lower = ''
+    while True:
+        with get_db_cursor() as cursor:
+            cursor.execute(
+                f"SELECT video_id FROM {source} WHERE video_id > %s ORDER BY video_id LIMIT 1 OFFSET %s",
+                (lower, chunk_size - 1)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(_copy_query(source, 'video_id > %s'), (lower,))
+                return copied + cursor.rowcount
+            upper = row['video_id']
+            cursor.execute(_copy_query(source, 'video_id > %s AND video_id <= %s'), (lower, upper))
+            copied += cursor.rowcount
+        lower = upper
+        if pause:
+            # Give replication and foreground queries room between chunks
+            time.sleep(pause)
+
+
+def _copy_events(chunk_size: int, pause: float) -> int:
+    """Copy change_events in seq ranges of chunk_size, resuming after the last copied event"""
+    with get_db_cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM change_events_bin")
+        lower = cursor.fetchone()['seq']
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM change_events")
+        last = cursor.fetchone()['seq']
+    copied = 0
+    while lower < last:
+        with get_db_cursor() as cursor:
+            cursor.execute(_events_copy_query('seq > %s AND seq <= %s'), (lower, lower + chunk_size))
+            copied += cursor.rowcount
+        lower += chunk_size
+        if pause:
+            time.sleep(pause)
+    return copied
+
+
+def _catch_up(since, events: bool = False) -> int:
+    """Copy rows of the migrated tables updated (events: created) at or after since; returns rows copied"""
+    copied = 0
+    # Videos first: transcripts_bin references videos_bin
+    for source in MIGRATED_TABLES:
+        with get_db_cursor() as cursor:
+            cursor.execute(_copy_query(source, 'updated_at >= %s'), (since,))
+            copied += cursor.rowcount
+    if events:
+        with get_db_cursor() as cursor:
+            cursor.execute(_events_copy_query('created_at >= %s'), (since,))
+            copied += cursor.rowcount
+    return copied
+
+
+def _server_now():
+    with get_db_cursor() as cursor:
+        cursor.execute("SELECT NOW() AS now")
+        return cursor.fetchone()['now']
+
+
+def copy_to_binary(chunk_size: int = 5000, pause: float = 0.0, max_catch_up_passes: int = 10,
+                   converge_rows: int = 100) -> Dict[str, Any]:
+    """
+    Copy the live tables into videos_bin/transcripts_bin while writers keep running
+
+    Safe to re-run: rows are upserted, so an interrupted copy resumes correctly.
+
+    Args:
+        chunk_size: Rows per INSERT ... SELECT
+        pause: Seconds to sleep between chunks
+        max_catch_up_passes: Upper bound on catch-up passes
+        converge_rows: Stop catching up once a pass copies fewer rows than this
+
+    Returns:
+        Dict with rows copied per table, catch-up rows, rows left behind
+        ('non_canonical') and the 'since' watermark to pass to swap_tables
+    """
+    # The copies are created from the current DDL, so the live tables need every column too
+    apply_migrations()
+    events = _has_change_events()
+    create_binary_tables(events)
+    started = _server_now()
+
+    stats = {}
+    for source in MIGRATED_TABLES:
+        stats[source] = _copy_table(source, chunk_size, pause)
+        logger.info(f"Copied {source} into {MIGRATED_TABLES[source][0]}")
+    if events:
+        stats['change_events'] = _copy_events(chunk_size, pause)
+        logger.info("Copied change_events into change_events_bin")
+
+    stats['catch_up'] = 0
+    since = started
+    for _ in range(max_catch_up_passes):
+        pass_started = _server_now()
+        copied = _catch_up(since, events)
+        stats['catch_up'] += copied
+        since = pass_started
+        if copied < converge_rows:
+            break
+
+    with get_db_cursor() as cursor:
+        cursor.execute(
+            f"SELECT COUNT(*) AS count FROM videos WHERE NOT REGEXP_LIKE(video_id, '{CANONICAL_VIDEO_ID_REGEXP}', 'c')"
+        )
+        stats['non_canonical'] = cursor.fetchone()['count']
+    stats['since'] = since
+    logger.info(f"Binary video_id copy complete: {stats}")
+    return stats
+
+
+def swap_tables(since) -> int:
+    """
+    Final catch-up and atomic rename; run with all writers stopped
+
+    Args:
+        since: The 'since' value returned by copy_to_binary
+
+    Returns:
+        int: Rows copied by the final catch-up
+    """
+    events = _has_change_events()
+    copied = 0
+    if events:
+        # Covers events appended after the copy step, or an outbox created since then
+        create_binary_tables(events)
+        copied += _copy_events(chunk_size=5000, pause=0.0)
+    copied += _catch_up(since, events)
+    renames = [
+        'transcripts TO transcripts_varchar_old',
+        'videos TO videos_varchar_old',
+        'videos_bin TO videos',
+        'transcripts_bin TO transcripts',
+    ]
+    if events:
+        renames += ['change_events TO change_events_varchar_old', 'change_events_bin TO change_events']
+    with get_db_cursor() as cursor:
+        cursor.execute(f"RENAME TABLE {', '.join(renames)}")
+        # The language listing cache is cheap to rebuild, so it is recreated rather than copied
+        cursor.execute("DROP TABLE IF EXISTS transcript_languages")
+        cursor.execute(TRANSCRIPT_LANGUAGES_TABLE_DDL.format(id_type='BINARY(8)'))
+    logger.info(f"Swapped in BINARY(8) video_id tables after copying {copied} final rows")
+    return copied
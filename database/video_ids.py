@@ -0,0 +1,94 @@
+"""
+Compact encodings of YouTube video IDs
+
+A canonical video ID is 11 base64url characters that decode to exactly
+8 bytes, so it can be stored as a 64-bit integer or as BINARY(8).
+
+With DB_VIDEO_ID_FORMAT=binary the videos and transcripts tables key on
+BINARY(8) instead of VARCHAR(20) utf8mb4; the repositories encode IDs on the
+way in and decode them on the way out, so callers always see strings.
+"""
+
+import base64
+import binascii
+import os
+from typing import Any, Dict, Optional, Union
+
+# SQL condition matching the IDs pack_video_id accepts: 11 base64url characters,
+# the last of which has its two low (padding) bits clear
+CANONICAL_VIDEO_ID_REGEXP = '^[A-Za-z0-9_-]{10}[AEIMQUYcgkosw048]$'
+
+# SQL expression decoding a canonical VARCHAR video_id column to its 8 bytes
+VIDEO_ID_TO_BINARY_SQL = "FROM_BASE64(CONCAT(REPLACE(REPLACE({column}, '-', '+'), '_', '/'), '='))"
+
+
+def binary_video_ids() -> bool:
+    """True when DB_VIDEO_ID_FORMAT=binary: video_id columns are BINARY(8)"""
+    return os.getenv('DB_VIDEO_ID_FORMAT', 'varchar').lower() == 'binary'
+
+
+def video_id_column_type() -> str:
+    """Column type for video_id in the configured schema mode"""
+    return 'BINARY(8)' if binary_video_ids() else 'VARCHAR(20)'
+
+
+def pack_video_id(video_id: Union[str, bytes]) -> Optional[int]:
+    """
+    Encode an 11-character video ID as an unsigned 64-bit integer.
+
+    Also accepts the 8-byte BINARY(8) form. Returns None for IDs that are not
+    canonical 11-character base64url strings.
+    """
+    if isinstance(video_id, (bytes, bytearray)):
+        return int.from_bytes(video_id, 'big') if len(video_id) == 8 else None
+    if not video_id or len(video_id) != 11:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(video_id + '=')
+    except (binascii.Error, ValueError):
+        return None
+    # Reject characters outside the alphabet and non-zero padding bits in the last character
+    if len(raw) != 8 or base64.urlsafe_b64encode(raw)[:11].decode('ascii') != video_id:
+        return None
+    return int.from_bytes(raw, 'big')
+
+
+def unpack_video_id(packed: int) -> str:
+    """Decode a 64-bit integer produced by pack_video_id back to the video ID"""
+    return base64.urlsafe_b64encode(packed.to_bytes(8, 'big'))[:11].decode('ascii')
+
+
+def encode_video_id(video_id: str) -> Union[str, bytes]:
+    """
+    Convert a video ID to its column value in the configured schema mode
+
+    Raises:
+        ValueError: In binary mode, for IDs that cannot be packed into 8 bytes
+    """
+    if not binary_video_ids():
+        return video_id
+    packed = pack_video_id(video_id)
+    if packed is None:
+        raise ValueError(f"Video ID {video_id!r} cannot be stored as BINARY(8)")
+    return packed.to_bytes(8, 'big')
+
+
+def decode_video_id(value: Union[str, bytes]) -> str:
+    """Convert a video_id column value back to the 11-character ID"""
+    if isinstance(value, (bytes, bytearray)):
+        return unpack_video_id(int.from_bytes(value, 'big'))
+    return value
+
+
+def encode_video_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a parameter dict with video_id encoded (the dict itself in varchar mode)"""
+    if not binary_video_ids():
+        return params
+    return {**params, 'video_id': encode_video_id(params['video_id'])}
+
+
+def decode_video_row(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Decode the video_id of a fetched row in place"""
+    if row is not None and 'video_id' in row:
+        row['video_id'] = decode_video_id(row['video_id'])
+    return row
@@ -3,34 +3,117 @@ Database operations for YouTube videos
 Handles CRUD operations with proper error handling and transactions
 """
 
-from database.db_manager import get_db_cursor, logger
+from database.db_manager import get_db_cursor, get_db_prepared_cursor, logger, retry_on_disconnect
+from database.cache import video_cache, transcript_cache, MISSING
+from database.known_videos import known_videos_enabled, get_known_videos
+from database.video_stats import snapshots_enabled, append_snapshots
+from database.channel_stats import (
+    ALL_CHANNELS, ChannelStatsRepository, channel_stats_enabled, compute_channel_deltas, apply_channel_deltas
+)
+from database.change_log import change_log_enabled, video_events, deleted_video_event, append_events
+from database.video_ids import (
+    video_id_column_type, encode_video_id, encode_video_params, decode_video_row
+)
 from mysql.connector import Error, IntegrityError
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 
+# Rows per multi-row INSERT statement in batch upserts
+UPSERT_BATCH_SIZE = 500
+
+# IDs per IN (...) list in multi-get lookups
+LOOKUP_BATCH_SIZE = 1000
+
+# videos table definition; video_id is VARCHAR(20) or BINARY(8) (DB_VIDEO_ID_FORMAT)
+VIDEOS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    video_id {id_type} PRIMARY KEY,
+    channel_id VARCHAR(64) NOT NULL,
+    published_time DATETIME NOT NULL,
+    view_count INT UNSIGNED NOT NULL,
+    published_time_raw VARCHAR(50),
+    view_count_raw VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_channel_published (channel_id, published_time),
+    INDEX idx_published_desc (published_time DESC),
+    INDEX idx_view_count (view_count),
+    INDEX idx_created_at (created_at),
+    INDEX idx_updated_at (updated_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+VIDEO_INSERT_QUERY = """
+INSERT INTO videos (
+    video_id, channel_id, published_time, view_count, 
+    published_time_raw, view_count_raw
+) VALUES (
+    %(video_id)s, %(channel_id)s, %(published_time)s, %(view_count)s,
+    %(published_time_raw)s, %(view_count_raw)s
+)
+"""
+
+VIDEO_UPSERT_QUERY = VIDEO_INSERT_QUERY + """ON DUPLICATE KEY UPDATE
+    view_count = VALUES(view_count),
+    view_count_raw = VALUES(view_count_raw),
+    channel_id = VALUES(channel_id)
+"""
+
+
+# Columns the upsert rewrites on an existing row; a row is unchanged when all of them match
+TRACKED_VIDEO_FIELDS = ('channel_id', 'view_count', 'view_count_raw')
+
+
+def diff_videos(videos: List[Dict[str, Any]], current: Dict[str, Dict[str, Any]]):
+    """
+    Split a batch against the stored rows
+    
+    Args:
+        videos: Incoming video dictionaries (later duplicates win)
+        current: Stored rows keyed by video_id
+        
+    Returns:
+        Tuple of (new videos, changed videos, number unchanged)
+    """
+    new, changed, unchanged = [], [], 0
+    for video_id, video in {v['video_id']: v for v in videos}.items():
+        stored = current.get(video_id)
+        if stored is None:
+            new.append(video)
+        elif any(stored.get(field) != video.get(field) for field in TRACKED_VIDEO_FIELDS):
+            changed.append(video)
+        else:
+            unchanged += 1
+    return new, changed, unchanged
+
+
+def current_rows_query(count: int, for_update: bool = False) -> str:
+    """SELECT of the tracked columns of count videos, optionally locking them (and the gaps for absent IDs)"""
+    columns = ', '.join(('video_id',) + TRACKED_VIDEO_FIELDS)
+    placeholders = ', '.join(['%s'] * count)
+    return f"SELECT {columns} FROM videos WHERE video_id IN ({placeholders})" + (" FOR UPDATE" if for_update else "")
+
+
+def _fetch_current(cursor, video_ids: List[str], for_update: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Read the tracked columns of stored videos keyed by video_id"""
+    current = {}
+    for start in range(0, len(video_ids), LOOKUP_BATCH_SIZE):
+        chunk = video_ids[start:start + LOOKUP_BATCH_SIZE]
+        cursor.execute(current_rows_query(len(chunk), for_update),
+                       tuple(encode_video_id(video_id) for video_id in chunk))
+        current.update((row['video_id'], row) for row in map(decode_video_row, cursor.fetchall()))
+    return current
+
+
 class VideoRepository:
     """Repository pattern for video database operations"""
     
     @staticmethod
+    @retry_on_disconnect
     def create_table():
         """Create videos table if it doesn't exist"""
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS videos (
-            video_id VARCHAR(20) PRIMARY KEY,
-            channel_id VARCHAR(64) NOT NULL,
-            published_time DATETIME NOT NULL,
-            view_count INT UNSIGNED NOT NULL,
-            published_time_raw VARCHAR(50),
-            view_count_raw VARCHAR(50),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            INDEX idx_channel_id (channel_id),
-            INDEX idx_published_time (published_time),
-            INDEX idx_view_count (view_count),
-            INDEX idx_created_at (created_at)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
-        """
+        create_table_query = VIDEOS_TABLE_DDL.format(table='videos', id_type=video_id_column_type())
         
         try:
             with get_db_cursor() as cursor:
@@ -42,6 +125,7 @@ class VideoRepository:
             raise
     
     @staticmethod
+    @retry_on_disconnect(idempotent=False)
     def insert_video(video_data: Dict[str, Any]) -> bool:
         """
         Insert a single video into the database
@@ -52,21 +136,17 @@ class VideoRepository:
         Returns:
             bool: True if successful, False otherwise
         """
-        insert_query = """
-        INSERT INTO videos (
-            video_id, channel_id, published_time, view_count, 
-            published_time_raw, view_count_raw
-        ) VALUES (
-            %(video_id)s, %(channel_id)s, %(published_time)s, %(view_count)s,
-            %(published_time_raw)s, %(view_count_raw)s
-        )
-        """
         
         try:
             with get_db_cursor() as cursor:
-                cursor.execute(insert_query, video_data)
+                cursor.execute(VIDEO_INSERT_QUERY, encode_video_params(video_data))
+                if channel_stats_enabled():
+                    apply_channel_deltas(cursor, compute_channel_deltas({}, {video_data['video_id']: video_data}))
+                if change_log_enabled():
+                    append_events(cursor, video_events({}, [video_data]))
                 logger.info(f"Inserted video: {video_data['video_id']}")
-                return True
+            video_cache.invalidate(video_data['video_id'])
+            return True
         except IntegrityError as e:
             logger.warning(f"Video {video_data['video_id']} already exists: {e}")
             return False
@@ -75,6 +155,7 @@ class VideoRepository:
             raise
     
     @staticmethod
+    @retry_on_disconnect(idempotent=False)
     def insert_videos_batch(videos: List[Dict[str, Any]]) -> Dict[str, int]:
         """
         Insert multiple videos in a single transaction
@@ -85,23 +166,15 @@ class VideoRepository:
         Returns:
             Dict with counts of inserted, skipped, and failed videos
         """
-        insert_query = """
-        INSERT INTO videos (
-            video_id, channel_id, published_time, view_count, 
-            published_time_raw, view_count_raw
-        ) VALUES (
-            %(video_id)s, %(channel_id)s, %(published_time)s, %(view_count)s,
-            %(published_time_raw)s, %(view_count_raw)s
-        )
-        """
-        
         stats = {'inserted': 0, 'skipped': 0, 'failed': 0}
+        inserted = {}
         
         try:
             with get_db_cursor() as cursor:
                 for video in videos:
                     try:
-                        cursor.execute(insert_query, video)
+                        cursor.execute(VIDEO_INSERT_QUERY, encode_video_params(video))
+                        inserted[video['video_id']] = video
                         stats['inserted'] += 1
                         logger.debug(f"Inserted video: {video['video_id']}")
                     except IntegrityError:
@@ -110,14 +183,20 @@ class VideoRepository:
                     except Error as e:
                         stats['failed'] += 1
                         logger.error(f"Failed to insert video {video['video_id']}: {e}")
+                if channel_stats_enabled():
+                    apply_channel_deltas(cursor, compute_channel_deltas({}, inserted))
+                if change_log_enabled():
+                    append_events(cursor, video_events({}, inserted.values()))
                 
                 logger.info(f"Batch insert completed: {stats}")
-                return stats
+            video_cache.invalidate_many(video['video_id'] for video in videos)
+            return stats
         except Error as e:
             logger.error(f"Error during batch insert: {e}")
             raise
     
     @staticmethod
+    @retry_on_disconnect(idempotent=False)
     def update_video(video_id: str, video_data: Dict[str, Any]) -> bool:
         """
         Update an existing video
@@ -142,18 +221,30 @@ class VideoRepository:
         try:
             video_data['video_id'] = video_id
             with get_db_cursor() as cursor:
-                cursor.execute(update_query, video_data)
-                if cursor.rowcount > 0:
-                    logger.info(f"Updated video: {video_id}")
-                    return True
-                else:
-                    logger.warning(f"Video not found for update: {video_id}")
-                    return False
+                read_before = channel_stats_enabled() or change_log_enabled()
+                before = _fetch_current(cursor, [video_id], for_update=True) if read_before else {}
+                cursor.execute(update_query, encode_video_params(video_data))
+                # Read before the delta/event statements below reuse the cursor
+                updated = cursor.rowcount > 0
+                if video_id in before:
+                    if channel_stats_enabled():
+                        apply_channel_deltas(cursor, compute_channel_deltas(before, {video_id: video_data}))
+                    if change_log_enabled():
+                        append_events(cursor, video_events(before, [video_data]))
+            # After the commit, so a concurrent reader cannot re-cache the old row
+            video_cache.invalidate(video_id)
+            if updated:
+                logger.info(f"Updated video: {video_id}")
+                return True
+            else:
+                logger.warning(f"Video not found for update: {video_id}")
+                return False
         except Error as e:
             logger.error(f"Error updating video {video_id}: {e}")
             raise
     
     @staticmethod
+    @retry_on_disconnect(idempotent=False)
     def upsert_video(video_data: Dict[str, Any]) -> bool:
         """
         Insert or update a video (INSERT ... ON DUPLICATE KEY UPDATE)
@@ -164,30 +255,25 @@ class VideoRepository:
         Returns:
             bool: True if successful, False otherwise
         """
-        upsert_query = """
-        INSERT INTO videos (
-            video_id, channel_id, published_time, view_count, 
-            published_time_raw, view_count_raw
-        ) VALUES (
-            %(video_id)s, %(channel_id)s, %(published_time)s, %(view_count)s,
-            %(published_time_raw)s, %(view_count_raw)s
-        )
-        ON DUPLICATE KEY UPDATE
-            view_count = VALUES(view_count),
-            view_count_raw = VALUES(view_count_raw),
-            channel_id = VALUES(channel_id)
-        """
+        if channel_stats_enabled() or change_log_enabled():
+            # channel_stats and change events need the stored row, which the diff path reads
+            VideoRepository.upsert_videos_diff([video_data])
+            return True
         
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(upsert_query, video_data)
+            with get_db_prepared_cursor() as cursor:
+                cursor.execute(VIDEO_UPSERT_QUERY, encode_video_params(video_data))
+                if snapshots_enabled():
+                    append_snapshots(cursor, [video_data])
                 logger.info(f"Upserted video: {video_data['video_id']}")
-                return True
+            video_cache.invalidate(video_data['video_id'])
+            return True
         except Error as e:
             logger.error(f"Error upserting video {video_data['video_id']}: {e}")
             raise
     
     @staticmethod
+    @retry_on_disconnect(idempotent=False)
     def upsert_videos_batch(videos: List[Dict[str, Any]]) -> int:
         """
         Upsert multiple videos in a single transaction
@@ -196,36 +282,103 @@ class VideoRepository:
             videos: List of video dictionaries
             
         Returns:
-            int: Number of videos processed
-        """
-        upsert_query = """
-        INSERT INTO videos (
-            video_id, channel_id, published_time, view_count, 
-            published_time_raw, view_count_raw
-        ) VALUES (
-            %(video_id)s, %(channel_id)s, %(published_time)s, %(view_count)s,
-            %(published_time_raw)s, %(view_count_raw)s
-        )
-        ON DUPLICATE KEY UPDATE
-            view_count = VALUES(view_count),
-            view_count_raw = VALUES(view_count_raw),
-            channel_id = VALUES(channel_id)
+            int: Number of videos processed (including unchanged videos that were skipped)
         """
+        if channel_stats_enabled() or change_log_enabled():
+            # channel_stats and change events need the stored rows, which the diff path reads
+            VideoRepository.upsert_videos_diff(videos)
+            return len(videos)
+        
+        known_videos = get_known_videos() if known_videos_enabled() else None
+        to_write = videos
+        if known_videos is not None:
+            known_videos.ensure_fresh()
+            to_write = known_videos.filter_changed(videos)
         
         count = 0
         try:
             with get_db_cursor() as cursor:
-                for video in videos:
-                    cursor.execute(upsert_query, video)
-                    count += 1
+                # executemany rewrites the upsert into multi-row INSERT statements
+                for start in range(0, len(to_write), UPSERT_BATCH_SIZE):
+                    chunk = to_write[start:start + UPSERT_BATCH_SIZE]
+                    cursor.executemany(VIDEO_UPSERT_QUERY, [encode_video_params(video) for video in chunk])
+                    count += len(chunk)
+                # Unchanged videos are still snapshotted: the history records every crawl
+                if snapshots_enabled():
+                    append_snapshots(cursor, videos)
                 
-                logger.info(f"Upserted {count} videos")
-                return count
+                skipped = len(videos) - len(to_write)
+                logger.info(f"Upserted {count} videos" + (f", skipped {skipped} unchanged" if skipped else ""))
+            video_cache.invalidate_many(video['video_id'] for video in to_write)
+            if known_videos is not None:
+                known_videos.record(to_write)
+            return len(videos)
         except Error as e:
             logger.error(f"Error during batch upsert: {e}")
             raise
     
     @staticmethod
+    @retry_on_disconnect(idempotent=False)
+    def upsert_videos_diff(videos: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Upsert a batch, writing only new rows and rows whose tracked fields changed
+        
+        Current values for the whole batch are read in one pass of IN (...)
+        lookups inside the same transaction, so unchanged rows cost no write,
+        no updated_at bump and no redo/binlog traffic. With DB_CHANNEL_STATS
+        or DB_CHANGE_LOG the read locks the rows, and the channel_stats deltas
+        and change events are written in the same transaction. With
+        DB_KNOWN_VIDEO_INDEX, videos the index already holds with the same
+        view_count are counted as unchanged without being read at all.
+        
+        Args:
+            videos: List of video dictionaries
+            
+        Returns:
+            Dict with counts of 'new', 'changed' and 'unchanged' videos
+        """
+        all_ids = list(dict.fromkeys(video['video_id'] for video in videos))
+        maintain_stats = channel_stats_enabled()
+        log_changes = change_log_enabled()
+        known_videos = get_known_videos() if known_videos_enabled() else None
+        
+        to_diff = videos
+        if known_videos is not None:
+            known_videos.ensure_fresh()
+            to_diff = known_videos.filter_changed(videos)
+        video_ids = list(dict.fromkeys(video['video_id'] for video in to_diff))
+        
+        try:
+            with get_db_cursor() as cursor:
+                current = _fetch_current(cursor, video_ids, for_update=maintain_stats or log_changes)
+                new, changed, unchanged = diff_videos(to_diff, current)
+                # New rows also go through the upsert in case another writer inserted them meanwhile
+                to_write = new + changed
+                for start in range(0, len(to_write), UPSERT_BATCH_SIZE):
+                    chunk = to_write[start:start + UPSERT_BATCH_SIZE]
+                    cursor.executemany(VIDEO_UPSERT_QUERY, [encode_video_params(video) for video in chunk])
+                if maintain_stats:
+                    apply_channel_deltas(cursor, compute_channel_deltas(
+                        current, {video['video_id']: video for video in to_write}
+                    ))
+                if log_changes:
+                    append_events(cursor, video_events(current, to_write))
+                if snapshots_enabled():
+                    append_snapshots(cursor, videos)
+            
+            unchanged += len(all_ids) - len(video_ids)
+            counts = {'new': len(new), 'changed': len(changed), 'unchanged': unchanged}
+            logger.info(f"Diff upsert of {len(all_ids)} videos: {counts}")
+            video_cache.invalidate_many(video['video_id'] for video in to_write)
+            if known_videos is not None:
+                known_videos.record(to_write)
+            return counts
+        except Error as e:
+            logger.error(f"Error during diff upsert: {e}")
+            raise
+    
+    @staticmethod
+    @retry_on_disconnect
     def get_video(video_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a single video by ID
@@ -236,18 +389,64 @@ class VideoRepository:
         Returns:
             Dict containing video data or None if not found
         """
+        cached = video_cache.get(video_id)
+        if cached is not MISSING:
+            return cached
+        
         select_query = "SELECT * FROM videos WHERE video_id = %s"
         
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(select_query, (video_id,))
-                result = cursor.fetchone()
-                return result
+            with get_db_prepared_cursor() as cursor:
+                cursor.execute(select_query, (encode_video_id(video_id),))
+                result = decode_video_row(cursor.fetchone())
+            video_cache.set(video_id, result)
+            return result
         except Error as e:
             logger.error(f"Error retrieving video {video_id}: {e}")
             raise
     
     @staticmethod
+    @retry_on_disconnect
+    def get_videos_by_ids(video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get many videos by ID, serving cached entries locally
+        
+        Args:
+            video_ids: Video IDs to retrieve
+            
+        Returns:
+            Dict mapping video_id to video data for the IDs that exist
+        """
+        found = {}
+        to_fetch = []
+        for video_id in dict.fromkeys(video_ids):
+            cached = video_cache.get(video_id)
+            if cached is MISSING:
+                to_fetch.append(video_id)
+            elif cached is not None:
+                found[video_id] = cached
+        if not to_fetch:
+            return found
+        
+        try:
+            with get_db_cursor() as cursor:
+                for start in range(0, len(to_fetch), LOOKUP_BATCH_SIZE):
+                    chunk = to_fetch[start:start + LOOKUP_BATCH_SIZE]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    cursor.execute(f"SELECT * FROM videos WHERE video_id IN ({placeholders})",
+                                   tuple(encode_video_id(video_id) for video_id in chunk))
+                    rows = {row['video_id']: row for row in map(decode_video_row, cursor.fetchall())}
+                    for video_id in chunk:
+                        # Cache misses too, so repeated lookups of absent IDs stay local
+                        video_cache.set(video_id, rows.get(video_id))
+                    found.update(rows)
+            return found
+        except Error as e:
+            logger.error(f"Error retrieving {len(to_fetch)} videos: {e}")
+            raise
+    
+    @staticmethod
+    @retry_on_disconnect
     def get_all_videos(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """
         Get all videos with pagination
@@ -269,12 +468,41 @@ class VideoRepository:
             with get_db_cursor() as cursor:
                 cursor.execute(select_query, (limit, offset))
                 results = cursor.fetchall()
-                return results
+                return [decode_video_row(row) for row in results]
         except Error as e:
             logger.error(f"Error retrieving videos: {e}")
             raise
     
     @staticmethod
+    @retry_on_disconnect
+    def get_latest_videos_for_channel(channel_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get a channel's most recently published videos
+        
+        Args:
+            channel_id: Channel ID
+            limit: Maximum number of videos to return
+            
+        Returns:
+            List of video dictionaries, newest first
+        """
+        select_query = """
+        SELECT * FROM videos 
+        WHERE channel_id = %s 
+        ORDER BY published_time DESC 
+        LIMIT %s
+        """
+        
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(select_query, (channel_id, limit))
+                return [decode_video_row(row) for row in cursor.fetchall()]
+        except Error as e:
+            logger.error(f"Error retrieving latest videos for channel {channel_id}: {e}")
+            raise
+    
+    @staticmethod
+    @retry_on_disconnect(idempotent=False)
     def delete_video(video_id: str) -> bool:
         """
         Delete a video by ID
@@ -289,25 +517,48 @@ class VideoRepository:
         
         try:
             with get_db_cursor() as cursor:
-                cursor.execute(delete_query, (video_id,))
-                if cursor.rowcount > 0:
-                    logger.info(f"Deleted video: {video_id}")
-                    return True
-                else:
-                    logger.warning(f"Video not found for deletion: {video_id}")
-                    return False
+                read_before = channel_stats_enabled() or change_log_enabled()
+                before = _fetch_current(cursor, [video_id], for_update=True) if read_before else {}
+                cursor.execute(delete_query, (encode_video_id(video_id),))
+                # Read before the delta/event statements below reuse the cursor
+                deleted = cursor.rowcount > 0
+                if video_id in before:
+                    if channel_stats_enabled():
+                        apply_channel_deltas(cursor, compute_channel_deltas(before, {video_id: None}))
+                    if change_log_enabled():
+                        append_events(cursor, [deleted_video_event(before[video_id])])
+            # Transcripts are removed with the video (ON DELETE CASCADE)
+            video_cache.invalidate(video_id)
+            transcript_cache.invalidate(video_id)
+            if known_videos_enabled():
+                # Otherwise a re-crawl with the same view count would be skipped and never re-inserted
+                get_known_videos().forget([video_id])
+            if deleted:
+                logger.info(f"Deleted video: {video_id}")
+                return True
+            else:
+                logger.warning(f"Video not found for deletion: {video_id}")
+                return False
         except Error as e:
             logger.error(f"Error deleting video {video_id}: {e}")
             raise
     
     @staticmethod
+    @retry_on_disconnect
     def get_video_count() -> int:
         """
         Get total number of videos in database
         
+        Reads the channel_stats totals row when DB_CHANNEL_STATS is enabled,
+        instead of counting the whole table.
+        
         Returns:
             int: Total video count
         """
+        if channel_stats_enabled():
+            stats = VideoRepository.get_channel_stats(ALL_CHANNELS)
+            return stats['video_count'] if stats else 0
+        
         count_query = "SELECT COUNT(*) as count FROM videos"
         
         try:
@@ -318,3 +569,35 @@ class VideoRepository:
         except Error as e:
             logger.error(f"Error counting videos: {e}")
             raise
+    
+    @staticmethod
+    @retry_on_disconnect
+    def get_channel_stats(channel_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get video count, total views and latest upload for a channel
+        
+        Args:
+            channel_id: Channel ID
+            
+        Returns:
+            Dict with channel_id, video_count, total_views and latest_published,
+            or None if the channel has no videos
+        """
+        if channel_stats_enabled():
+            return ChannelStatsRepository.get_channel_stats(channel_id)
+        
+        select_query = """
+        SELECT channel_id, COUNT(*) AS video_count, SUM(view_count) AS total_views, 
+            MAX(published_time) AS latest_published
+        FROM videos 
+        WHERE channel_id = %s
+        GROUP BY channel_id
+        """
+        
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(select_query, (channel_id,))
+                return cursor.fetchone()
+        except Error as e:
+            logger.error(f"Error retrieving channel stats for {channel_id}: {e}")
+            raise
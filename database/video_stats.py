@@ -0,0 +1,395 @@
+"""
+Append-only view-count history for videos
+
+Every crawl appends (packed video_id, captured_at, view_count) rows to
+video_stats_snapshots, a table partitioned by day. A downsampling job rolls
+raw snapshots older than a few days into hourly aggregates (dropping whole
+day partitions afterwards) and hourly aggregates older than a few months into
+daily ones, so history is kept at a resolution that decreases with age.
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from database.db_manager import get_db_cursor, logger, retry_on_disconnect
+from database.video_ids import pack_video_id
+from mysql.connector import Error
+
+# Snapshot rows per multi-row INSERT
+SNAPSHOT_BATCH_SIZE = 1000
+
+# Video IDs per IN (...) list in channel growth queries
+CHANNEL_LOOKUP_BATCH_SIZE = 1000
+
+SNAPSHOT_INSERT_QUERY = """
+INSERT IGNORE INTO video_stats_snapshots (video_id, captured_at, view_count)
+VALUES (%s, %s, %s)
+"""
+
+# Raw snapshots, hourly and daily aggregates for a set of videos within a time range
+GROWTH_POINTS_QUERY = """
+SELECT video_id, captured_at AS point_time, view_count
+FROM video_stats_snapshots
+WHERE video_id IN ({ids}) AND captured_at >= %s AND captured_at < %s
+UNION ALL
+SELECT video_id, bucket_start AS point_time, max_views AS view_count
+FROM video_stats_rollups
+WHERE video_id IN ({ids}) AND bucket_start >= %s AND bucket_start < %s
+"""
+
+MIN_TIME = datetime(1970, 1, 1)
+MAX_TIME = datetime(9999, 12, 31)
+
+
+def snapshots_enabled() -> bool:
+    """True when DB_STATS_SNAPSHOTS=true: video upserts also append view-count snapshots"""
+    return os.getenv('DB_STATS_SNAPSHOTS', 'false').lower() == 'true'
+
+
+def snapshot_rows(videos: Iterable[Dict[str, Any]], captured_at: Optional[datetime] = None) -> List[Tuple[int, datetime, int]]:
+    """
+    Build snapshot rows for videos that have a view count
+
+    Videos whose ID cannot be packed into 64 bits are skipped.
+    """
+    captured_at = (captured_at or datetime.now()).replace(microsecond=0)
+    rows = []
+    for video in videos:
+        packed = pack_video_id(video.get('video_id'))
+        if packed is not None and video.get('view_count') is not None:
+            rows.append((packed, captured_at, video['view_count']))
+    return rows
+
+
+def append_snapshots(cursor, videos: Iterable[Dict[str, Any]], captured_at: Optional[datetime] = None) -> int:
+    """Append snapshots using an open cursor, so they commit with the surrounding upsert"""
+    rows = snapshot_rows(videos, captured_at)
+    for start in range(0, len(rows), SNAPSHOT_BATCH_SIZE):
+        cursor.executemany(SNAPSHOT_INSERT_QUERY, rows[start:start + SNAPSHOT_BATCH_SIZE])
+    return len(rows)
+
+
+async def async_append_snapshots(cursor, videos: Iterable[Dict[str, Any]], captured_at: Optional[datetime] = None) -> int:
+    """append_snapshots() with an aiomysql cursor"""
+    rows = snapshot_rows(videos, captured_at)
+    for start in range(0, len(rows), SNAPSHOT_BATCH_SIZE):
+        await cursor.executemany(SNAPSHOT_INSERT_QUERY, rows[start:start + SNAPSHOT_BATCH_SIZE])
+    return len(rows)
+
+
+def partition_name(day: date) -> str:
+    return f"p{day:%Y%m%d}"
+
+
+def missing_partitions(existing: Iterable[str], today: date, days_ahead: int) -> List[date]:
+    """Days from today through today + days_ahead that have no partition yet"""
+    existing = set(existing)
+    newest = max((name for name in existing if name != 'p_future'), default=None)
+    days = []
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        # Partitions can only be split off the top, so never add one below the newest
+        if partition_name(day) not in existing and (newest is None or partition_name(day) > newest):
+            days.append(day)
+    return days
+
+
+def carry_forward(points: Iterable[Tuple[int, date, int]]) -> List[Dict[str, Any]]:
+    """
+    Sum per-video daily values into a channel total
+
+    Args:
+        points: (video_id, day, view_count) rows ordered by day
+
+    Returns:
+        List of {'day', 'view_count', 'videos'} where each video contributes its
+        latest known view count, including on days it was not crawled
+    """
+    latest: Dict[int, int] = {}
+    total = 0
+    curve = []
+    for video_id, day, view_count in points:
+        total += view_count - latest.get(video_id, 0)
+        latest[video_id] = view_count
+        if curve and curve[-1]['day'] == day:
+            curve[-1]['view_count'] = total
+            curve[-1]['videos'] = len(latest)
+        else:
+            curve.append({'day': day, 'view_count': total, 'videos': len(latest)})
+    return curve
+
+
+class VideoStatsRepository:
+    """Repository for view-count snapshots, rollups and growth-curve queries"""
+
+    @staticmethod
+    @retry_on_disconnect
+    def create_tables(days_ahead: int = 7):
+        """Create the snapshot and rollup tables and the upcoming day partitions"""
+        create_snapshots_query = """
+        CREATE TABLE IF NOT EXISTS video_stats_snapshots (
+            video_id BIGINT UNSIGNED NOT NULL,
+            captured_at DATETIME NOT NULL,
+            view_count BIGINT UNSIGNED NOT NULL,
+            PRIMARY KEY (video_id, captured_at)
+        ) ENGINE=InnoDB
+        PARTITION BY RANGE (TO_DAYS(captured_at)) (
+            PARTITION p_future VALUES LESS THAN MAXVALUE
+        );
+        """
+        create_rollups_query = """
+        CREATE TABLE IF NOT EXISTS video_stats_rollups (
+            video_id BIGINT UNSIGNED NOT NULL,
+            granularity ENUM('hour', 'day') NOT NULL,
+            bucket_start DATETIME NOT NULL,
+            min_views BIGINT UNSIGNED NOT NULL,
+            max_views BIGINT UNSIGNED NOT NULL,
+            samples INT UNSIGNED NOT NULL,
+            PRIMARY KEY (video_id, bucket_start, granularity)
+        ) ENGINE=InnoDB;
+        """
+
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(create_snapshots_query)
+                cursor.execute(create_rollups_query)
+                logger.info("Video stats tables created or already exist")
+        except Error as e:
+            logger.error(f"Error creating video stats tables: {e}")
+            raise
+        VideoStatsRepository.ensure_partitions(days_ahead)
+        return True
+
+    @staticmethod
+    def _partition_names(cursor) -> List[str]:
+        cursor.execute("""
+        SELECT PARTITION_NAME AS name FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'video_stats_snapshots'
+            AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+        """)
+        return [row['name'] for row in cursor.fetchall()]
+
+    @staticmethod
+    @retry_on_disconnect
+    def ensure_partitions(days_ahead: int = 7) -> int:
+        """
+        Split day partitions for today through today + days_ahead off p_future
+
+        Run daily (the downsampling job does) so new rows never pile up in p_future.
+
+        Returns:
+            int: Number of partitions added
+        """
+        try:
+            with get_db_cursor() as cursor:
+                days = missing_partitions(VideoStatsRepository._partition_names(cursor), date.today(), days_ahead)
+                if not days:
+                    return 0
+                partitions = ', '.join(
+                    f"PARTITION {partition_name(day)} VALUES LESS THAN (TO_DAYS('{day + timedelta(days=1):%Y-%m-%d}'))"
+                    for day in days
+                )
+                cursor.execute(f"""
+                ALTER TABLE video_stats_snapshots REORGANIZE PARTITION p_future INTO (
+                    {partitions}, PARTITION p_future VALUES LESS THAN MAXVALUE
+                )
+                """)
+                logger.info(f"Added {len(days)} video stats partitions")
+                return len(days)
+        except Error as e:
+            logger.error(f"Error adding video stats partitions: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def record_snapshots(videos: List[Dict[str, Any]], captured_at: Optional[datetime] = None) -> int:
+        """
+        Append view-count snapshots for a batch of videos
+
+        Returns:
+            int: Number of snapshot rows written
+        """
+        try:
+            with get_db_cursor() as cursor:
+                return append_snapshots(cursor, videos, captured_at)
+        except Error as e:
+            logger.error(f"Error appending {len(videos)} video snapshots: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def rollup_hourly(older_than_days: int = 7) -> int:
+        """
+        Roll raw snapshots into hourly aggregates and drop their day partitions
+
+        Each day partition is aggregated and dropped as a unit; the aggregates
+        overwrite existing rows, so re-running after a failure is safe.
+
+        Returns:
+            int: Number of day partitions rolled up
+        """
+        cutoff = partition_name(date.today() - timedelta(days=older_than_days))
+        rolled = 0
+        try:
+            with get_db_cursor() as cursor:
+                names = [name for name in VideoStatsRepository._partition_names(cursor)
+                         if name != 'p_future' and name < cutoff]
+            for name in names:
+                with get_db_cursor() as cursor:
+                    cursor.execute(f"""
+                    INSERT INTO video_stats_rollups (video_id, granularity, bucket_start, min_views, max_views, samples)
+                    SELECT video_id, 'hour', DATE_FORMAT(captured_at, '%Y-%m-%d %H:00:00'),
+                        MIN(view_count), MAX(view_count), COUNT(*)
+                    FROM video_stats_snapshots PARTITION ({name})
+                    GROUP BY video_id, DATE_FORMAT(captured_at, '%Y-%m-%d %H:00:00')
+                    ON DUPLICATE KEY UPDATE
+                        min_views = VALUES(min_views),
+                        max_views = VALUES(max_views),
+                        samples = VALUES(samples)
+                    """)
+                with get_db_cursor() as cursor:
+                    cursor.execute(f"ALTER TABLE video_stats_snapshots DROP PARTITION {name}")
+                rolled += 1
+                logger.info(f"Rolled up video stats partition {name} into hourly aggregates")
+            return rolled
+        except Error as e:
+            logger.error(f"Error rolling up video stats into hourly aggregates: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def rollup_daily(older_than_days: int = 90) -> int:
+        """
+        Merge hourly aggregates older than the cutoff into daily aggregates
+
+        One day is processed per transaction, so each day is either fully
+        merged or left untouched.
+
+        Returns:
+            int: Number of days merged
+        """
+        cutoff = datetime.combine(date.today() - timedelta(days=older_than_days), datetime.min.time())
+        merged = 0
+        try:
+            while True:
+                with get_db_cursor() as cursor:
+                    cursor.execute(
+                        "SELECT MIN(bucket_start) AS oldest FROM video_stats_rollups "
+                        "WHERE granularity = 'hour' AND bucket_start < %s",
+                        (cutoff,)
+                    )
+                    oldest = cursor.fetchone()['oldest']
+                    if oldest is None:
+                        return merged
+                    day_start = datetime.combine(oldest.date(), datetime.min.time())
+                    day_end = day_start + timedelta(days=1)
+
+                    cursor.execute("""
+                    INSERT INTO video_stats_rollups (video_id, granularity, bucket_start, min_views, max_views, samples)
+                    SELECT video_id, 'day', %s, MIN(min_views), MAX(max_views), SUM(samples)
+                    FROM video_stats_rollups
+                    WHERE granularity = 'hour' AND bucket_start >= %s AND bucket_start < %s
+                    GROUP BY video_id
+                    ON DUPLICATE KEY UPDATE
+                        min_views = LEAST(min_views, VALUES(min_views)),
+                        max_views = GREATEST(max_views, VALUES(max_views)),
+                        samples = samples + VALUES(samples)
+                    """, (day_start, day_start, day_end))
+                    cursor.execute(
+                        "DELETE FROM video_stats_rollups "
+                        "WHERE granularity = 'hour' AND bucket_start >= %s AND bucket_start < %s",
+                        (day_start, day_end)
+                    )
+                merged += 1
+                logger.info(f"Merged hourly video stats for {day_start:%Y-%m-%d} into a daily aggregate")
+        except Error as e:
+            logger.error(f"Error rolling up video stats into daily aggregates: {e}")
+            raise
+
+    @staticmethod
+    def downsample(hourly_after_days: int = 7, daily_after_days: int = 90, days_ahead: int = 7) -> Dict[str, int]:
+        """
+        Run the full maintenance cycle: add upcoming partitions, then roll up old data
+
+        Returns:
+            Dict with counts of partitions added, partitions rolled up and days merged
+        """
+        return {
+            'partitions_added': VideoStatsRepository.ensure_partitions(days_ahead),
+            'partitions_rolled_up': VideoStatsRepository.rollup_hourly(hourly_after_days),
+            'days_merged': VideoStatsRepository.rollup_daily(daily_after_days),
+        }
+
+    @staticmethod
+    @retry_on_disconnect
+    def get_video_growth(video_id: str, since: Optional[datetime] = None,
+                         until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Get the view-count history of a video
+
+        Args:
+            video_id: Video ID
+            since: Earliest point to return (inclusive)
+            until: Latest point to return (exclusive)
+
+        Returns:
+            List of {'time', 'view_count'} ordered by time: raw snapshots for
+            recent data, hourly/daily maxima for older data
+        """
+        packed = pack_video_id(video_id)
+        if packed is None:
+            return []
+        since, until = since or MIN_TIME, until or MAX_TIME
+
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(
+                    GROWTH_POINTS_QUERY.format(ids='%s') + " ORDER BY point_time",
+                    (packed, since, until, packed, since, until)
+                )
+                return [{'time': row['point_time'], 'view_count': row['view_count']} for row in cursor.fetchall()]
+        except Error as e:
+            logger.error(f"Error retrieving growth curve for video {video_id}: {e}")
+            raise
+
+    @staticmethod
+    @retry_on_disconnect
+    def get_channel_growth(channel_id: str, since: Optional[datetime] = None,
+                           until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Get the daily total view count of a channel's videos
+
+        Args:
+            channel_id: Channel ID
+            since: Earliest day to return (inclusive)
+            until: Latest day to return (exclusive)
+
+        Returns:
+            List of {'day', 'view_count', 'videos'} ordered by day
+        """
+        since, until = since or MIN_TIME, until or MAX_TIME
+
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute("SELECT video_id FROM videos WHERE channel_id = %s", (channel_id,))
+                packed_ids = [packed for packed in (pack_video_id(row['video_id']) for row in cursor.fetchall())
+                              if packed is not None]
+
+                points = []
+                for start in range(0, len(packed_ids), CHANNEL_LOOKUP_BATCH_SIZE):
+                    chunk = packed_ids[start:start + CHANNEL_LOOKUP_BATCH_SIZE]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    cursor.execute(f"""
+                    SELECT video_id, DATE(point_time) AS day, MAX(view_count) AS view_count
+                    FROM ({GROWTH_POINTS_QUERY.format(ids=placeholders)}) AS points
+                    GROUP BY video_id, DATE(point_time)
+                    """, (*chunk, since, until, *chunk, since, until))
+                    points.extend((row['video_id'], row['day'], row['view_count']) for row in cursor.fetchall())
+
+            points.sort(key=lambda point: point[1])
+            return carry_forward(points)
+        except Error as e:
+            logger.error(f"Error retrieving growth curve for channel {channel_id}: {e}")
+            raise
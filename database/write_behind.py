@@ -0,0 +1,259 @@
+"""
+Write-behind buffer for video and transcript upserts
+
+Producers enqueue records and return immediately; a background thread
+coalesces them by video_id (last write wins) and flushes with multi-row
+upserts once enough records are pending or the flush interval has passed.
+Records of a failed flush stay pending and are retried with exponential
+backoff; only records that failed max_retries flushes are dropped.
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from database.db_manager import commit_outcome_unknown, db_manager, logger
+from database.storage import get_video_repository, get_transcript_repository
+
+_STOP = object()
+
+# Upper bound of the backoff between retries of a failed flush (seconds)
+MAX_RETRY_DELAY = 30.0
+
+
+class WriteBehindBuffer:
+    """
+    Background writer that batches video and transcript upserts.
+
+    The queue is bounded: when the flusher falls behind, enqueue calls block
+    (up to put_timeout seconds) instead of letting memory grow without limit.
+    close() - also called from close_database() - drains and flushes
+    everything still pending.
+
+    Args:
+        max_queue_size: Maximum number of queued, not yet coalesced records
+        flush_size: Flush once this many distinct records are pending
+        flush_interval: Flush pending records at least this often (seconds)
+        put_timeout: Seconds an enqueue may block on a full queue (None = forever)
+        max_retries: Failed flushes a record goes through before it is dropped
+        retry_delay: Backoff after the first failed flush, doubled per consecutive failure
+    """
+
+    def __init__(self, max_queue_size: int = 10000, flush_size: int = 500,
+                 flush_interval: float = 2.0, put_timeout: Optional[float] = None,
+                 max_retries: int = 5, retry_delay: float = 1.0):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        # Producers and the flusher thread both update stats
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'enqueued': 0,
+            'coalesced': 0,
+            'flushes': 0,
+            'videos_written': 0,
+            'transcripts_written': 0,
+            'retried': 0,
+            'failed': 0,
+        }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def get_stats(self) -> Dict[str, int]:
+        """Consistent snapshot of the counters"""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def start(self):
+        """Start the flusher thread (done automatically on first enqueue)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='db-write-behind', daemon=True)
+            self._thread.start()
+            db_manager.register_shutdown_hook(self.close)
+
+    def _put(self, kind: str, key: str, record: Dict[str, Any]):
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        self._queue.put((kind, key, record), timeout=self.put_timeout)
+        self._count('enqueued')
+
+    def enqueue_video(self, video: Dict[str, Any]):
+        """Queue a video dict (same shape as VideoRepository.upsert_video) for upsert"""
+        self._put('video', video['video_id'], video)
+
+    def enqueue_videos(self, videos: List[Dict[str, Any]]):
+        for video in videos:
+            self.enqueue_video(video)
+
+    def enqueue_transcript(self, video_id: str, transcript_raw: Optional[Any] = None,
+                           status: str = 'fetched', error_message: Optional[str] = None):
+        """Queue a transcript (same arguments as TranscriptRepository.upsert_transcript) for upsert"""
+        self._put('transcript', video_id, {
+            'video_id': video_id,
+            'transcript_raw': transcript_raw,
+            'status': status,
+            'error_message': error_message,
+        })
+
+    def _run(self):
+        videos: Dict[str, Dict[str, Any]] = {}
+        transcripts: Dict[str, Dict[str, Any]] = {}
+        # (kind, video_id) -> failed flushes so far, for records still pending
+        attempts: Dict[tuple, int] = {}
+        consecutive_failures = 0
+        last_flush = time.monotonic()
+        retry_at = 0.0
+
+        while True:
+            now = time.monotonic()
+            if now < retry_at and len(videos) + len(transcripts) >= self.flush_size:
+                # Backing off with a full batch: stop draining the queue so producers feel the backpressure
+                time.sleep(retry_at - now)
+                item = None
+            else:
+                timeout = max(0.0, self.flush_interval - (now - last_flush), retry_at - now)
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+            if item is _STOP:
+                self._drain(videos, transcripts, attempts)
+                return
+
+            if item is not None:
+                kind, key, record = item
+                pending = videos if kind == 'video' else transcripts
+                if key in pending:
+                    self._count('coalesced')
+                pending[key] = record
+
+            now = time.monotonic()
+            due = now - last_flush >= self.flush_interval
+            if now < retry_at:
+                continue
+            if len(videos) + len(transcripts) >= self.flush_size or (due and (videos or transcripts)):
+                videos, transcripts = self._flush(videos, transcripts, attempts)
+                last_flush = time.monotonic()
+                if videos or transcripts:
+                    consecutive_failures += 1
+                    retry_at = last_flush + self._backoff(consecutive_failures)
+                else:
+                    consecutive_failures = 0
+                    retry_at = 0.0
+            elif due:
+                last_flush = now
+
+    def _backoff(self, consecutive_failures: int) -> float:
+        return min(self.retry_delay * 2 ** (consecutive_failures - 1), MAX_RETRY_DELAY)
+
+    def _flush(self, videos: Dict[str, Dict[str, Any]], transcripts: Dict[str, Dict[str, Any]],
+               attempts: Dict[tuple, int]):
+        """
+        Write pending records
+
+        Returns:
+            Tuple of (videos, transcripts) still pending: those of a failed upsert
+            that have retries left
+        """
+        if not videos and not transcripts:
+            return {}, {}
+        self._count('flushes')
+
+        # Videos first: transcripts reference them through a foreign key
+        if videos:
+            try:
+                self._count('videos_written', get_video_repository().upsert_videos_batch(list(videos.values())))
+                videos = self._written('video', videos, attempts)
+            except Exception as e:
+                logger.error(f"Write-behind flush of {len(videos)} videos failed: {e}")
+                videos = self._failed('video', videos, attempts, retry=not commit_outcome_unknown(e))
+        if transcripts:
+            try:
+                self._count('transcripts_written', get_transcript_repository().upsert_transcripts_batch(list(transcripts.values())))
+                transcripts = self._written('transcript', transcripts, attempts)
+            except Exception as e:
+                logger.error(f"Write-behind flush of {len(transcripts)} transcripts failed: {e}")
+                transcripts = self._failed('transcript', transcripts, attempts, retry=not commit_outcome_unknown(e))
+        return videos, transcripts
+
+    @staticmethod
+    def _written(kind: str, records: Dict[str, Dict[str, Any]], attempts: Dict[tuple, int]):
+        for key in records:
+            attempts.pop((kind, key), None)
+        return {}
+
+    def _failed(self, kind: str, records: Dict[str, Dict[str, Any]], attempts: Dict[tuple, int],
+                retry: bool = True):
+        """
+        Keep records with retries left pending; drop (and count) the rest.
+
+        retry=False drops them all: the connection dropped during COMMIT, so the
+        batch may already be applied and writing it again would double its
+        channel_stats deltas and change events.
+        """
+        pending = {}
+        for key, record in records.items():
+            failures = attempts.get((kind, key), 0) + 1
+            if not retry or failures >= self.max_retries:
+                attempts.pop((kind, key), None)
+                self._count('failed')
+                logger.error(f"Dropping {kind} {key} after {failures} failed write-behind flushes")
+            else:
+                attempts[(kind, key)] = failures
+                pending[key] = record
+        if pending:
+            self._count('retried', len(pending))
+        return pending
+
+    def _drain(self, videos: Dict[str, Dict[str, Any]], transcripts: Dict[str, Dict[str, Any]],
+               attempts: Dict[tuple, int]):
+        """Final flush on close, retrying (with backoff) until every record is written or dropped"""
+        consecutive_failures = 0
+        while videos or transcripts:
+            videos, transcripts = self._flush(videos, transcripts, attempts)
+            if videos or transcripts:
+                consecutive_failures += 1
+                time.sleep(self._backoff(consecutive_failures))
+
+    def close(self):
+        """Flush everything still queued and stop the flusher thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join()
+        logger.info(f"Write-behind buffer closed: {self.get_stats()}")
+
+
+_write_behind: Optional[WriteBehindBuffer] = None
+
+
+def write_behind_enabled() -> bool:
+    """True when DB_WRITE_BEHIND=true: producers should enqueue instead of writing directly"""
+    return os.getenv('DB_WRITE_BEHIND', 'false').lower() == 'true'
+
+
+def get_write_behind() -> WriteBehindBuffer:
+    """Return the process-wide write-behind buffer, configured from the environment"""
+    global _write_behind
+    if _write_behind is None:
+        _write_behind = WriteBehindBuffer(
+            max_queue_size=int(os.getenv('DB_WRITE_BEHIND_QUEUE_SIZE', 10000)),
+            flush_size=int(os.getenv('DB_WRITE_BEHIND_FLUSH_SIZE', 500)),
+            flush_interval=float(os.getenv('DB_WRITE_BEHIND_FLUSH_INTERVAL', 2.0)),
+        )
+    return _write_behind
@@ -0,0 +1,53 @@
+"""
+Maintain the view-count history tables.
+
+Adds upcoming day partitions to video_stats_snapshots, rolls raw snapshots
+older than --hourly-after-days into hourly aggregates (dropping their day
+partitions) and merges hourly aggregates older than --daily-after-days into
+daily ones. Run it once a day, e.g. from cron.
+
+Usage examples:
+  python downsample_stats.py --create-table
+  python downsample_stats.py --hourly-after-days 3 --daily-after-days 30
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path so this script can run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import db_manager
+from database.video_stats import VideoStatsRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Partition and downsample video view-count snapshots')
+    parser.add_argument('--hourly-after-days', type=int, default=7, help='Roll raw snapshots older than this into hourly aggregates (default 7)')
+    parser.add_argument('--daily-after-days', type=int, default=90, help='Merge hourly aggregates older than this into daily ones (default 90)')
+    parser.add_argument('--days-ahead', type=int, default=7, help='Day partitions to keep ready ahead of today (default 7)')
+    parser.add_argument('--create-table', action='store_true', help='Create the snapshot and rollup tables if missing')
+
+    args = parser.parse_args()
+
+    print('Initializing MySQL connection...')
+    db_manager.initialize()
+
+    try:
+        if args.create_table:
+            VideoStatsRepository.create_tables(args.days_ahead)
+
+        stats = VideoStatsRepository.downsample(
+            hourly_after_days=args.hourly_after_days,
+            daily_after_days=args.daily_after_days,
+            days_ahead=args.days_ahead,
+        )
+        print(f"Added {stats['partitions_added']} partitions, rolled up {stats['partitions_rolled_up']} "
+              f"day partitions, merged {stats['days_merged']} days into daily aggregates")
+    finally:
+        db_manager.cleanup()
+
+
+if __name__ == '__main__':
+    main()
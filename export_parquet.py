@@ -0,0 +1,54 @@
+"""
+Export videos and transcripts to partitioned Parquet files.
+
+Streams rows changed since the previous run (the watermark kept in
+<output>/_export_state.json) into <output>/<table>/<partition>/part-*.parquet.
+Transcripts are written as one row per segment. Requires pyarrow.
+
+Usage examples:
+  python export_parquet.py --output exports
+  python export_parquet.py --output exports --partition-by channel --tables videos
+  python export_parquet.py --output exports --full
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path so this script can run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import db_manager
+from database.parquet_export import export, PARTITION_BY
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally export videos and transcripts to Parquet')
+    parser.add_argument('--output', required=True, help='Output directory (also holds the export watermark)')
+    parser.add_argument('--tables', nargs='+', choices=['videos', 'transcripts'], default=['videos', 'transcripts'], help='Tables to export (default both)')
+    parser.add_argument('--partition-by', choices=PARTITION_BY, default='month', help='Partition by channel or published month (default month)')
+    parser.add_argument('--full', action='store_true', help='Ignore the watermark and export everything')
+    parser.add_argument('--page-size', type=int, default=None, help='Source rows per query (default 5000 videos / 200 transcripts)')
+    parser.add_argument('--row-group-size', type=int, default=50000, help='Rows per Parquet row group (default 50000)')
+    parser.add_argument('--max-buffered-rows', type=int, default=200000, help='Upper bound on rows held in memory (default 200000)')
+
+    args = parser.parse_args()
+
+    print('Initializing MySQL connection...')
+    db_manager.initialize()
+
+    try:
+        results = export(
+            args.output, tables=args.tables, partition_by=args.partition_by, full=args.full,
+            page_size=args.page_size, row_group_size=args.row_group_size,
+            max_buffered_rows=args.max_buffered_rows
+        )
+        for table, stats in results.items():
+            print(f"{table}: {stats['source_rows']} rows since {stats['since']} -> "
+                  f"{stats['rows']} rows in {len(stats['files'])} files")
+    finally:
+        db_manager.cleanup()
+
+
+if __name__ == '__main__':
+    main()
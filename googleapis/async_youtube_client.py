@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import aiohttp
+from config_manager import ConfigManager
+from youtube_client import VIDEO_PARTS, VIDEO_FIELDS
+from tenacity import (
+    retry,
+    stop_after_attempt,
+    wait_exponential,
+    retry_if_exception,
+    after_log
+)
+
+API_BASE_URL = 'https://www.googleapis.com/youtube/v3'
+
+# videos.list and channels.list accept at most 50 comma-separated IDs per request
+MAX_IDS_PER_REQUEST = 50
+
+# Every list call below costs one quota unit, regardless of parts requested
+LIST_QUOTA_COST = 1
+
+
+class YouTubeApiError(Exception):
+    """Non-2xx response from the YouTube Data API."""
+
+    def __init__(self, status, content):
+        super().__init__(f"YouTube API returned HTTP {status}: {content}")
+        self.status = status
+        self.content = content
+
+
+# Network failures and timeouts are transient too: the request never got an answer
+TRANSIENT_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+def _is_retryable(exception):
+    """YouTubeClient's condition (5xx server errors, 429 rate limits) plus transient network errors."""
+    if isinstance(exception, YouTubeApiError):
+        return exception.status >= 500 or exception.status == 429
+    return isinstance(exception, TRANSIENT_ERRORS)
+
+
+class AsyncYouTubeClient:
+    """
+    asyncio client for videos.list, channels.list and playlistItems.list.
+
+    All requests share one aiohttp session. At most `concurrency` requests are
+    in flight at once; large ID sets are split into 50-ID requests and fetched
+    concurrently. `on_quota(method, units)` is called for every request sent,
+    and the running total is kept in `quota_used`.
+
+    Usage:
+        async with AsyncYouTubeClient(concurrency=20) as client:
+            videos = await client.get_videos(video_ids)
+    """
+
+    def __init__(self, concurrency=10, on_quota=None, session=None):
+        self.config = ConfigManager()
+        self.api_key = self.config.API_KEY
+        self.concurrency = concurrency
+        self.on_quota = on_quota
+        self.quota_used = 0
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.logger = self._setup_logging()
+
+    def _setup_logging(self):
+        logger = logging.getLogger('async_youtube_client')
+        if not logger.handlers: # Prevent adding multiple handlers
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+        return logger
+
+    async def __aenter__(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _record_quota(self, method):
+        self.quota_used += LIST_QUOTA_COST
+        if self.on_quota is not None:
+            self.on_quota(method, LIST_QUOTA_COST)
+
+    @retry(
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        stop=stop_after_attempt(5),
+        retry=retry_if_exception(_is_retryable),
+        after=after_log(logging.getLogger('async_youtube_client'), logging.WARNING),
+        reraise=True # Callers handle the last error itself, not tenacity's RetryError
+    )
+    async def _get(self, resource, params):
+        params = dict(params, key=self.api_key)
+        async with self._semaphore:
+            self._record_quota(f"{resource}.list")
+            async with self._session.get(f"{API_BASE_URL}/{resource}", params=params) as response:
+                if response.status >= 400:
+                    content = await response.text()
+                    self.logger.error(f"HTTP error {response.status} for {resource}.list: {content}")
+                    raise YouTubeApiError(response.status, content)
+                return await response.json()
+
+    async def _list_by_ids(self, resource, ids, part, fields=None):
+        """Fetch items for many IDs with one request per 50 IDs, all in flight concurrently."""
+        ids = list(ids)
+        chunks = [ids[i:i + MAX_IDS_PER_REQUEST] for i in range(0, len(ids), MAX_IDS_PER_REQUEST)]
+        base_params = {'part': part}
+        if fields:
+            base_params['fields'] = fields
+        responses = await asyncio.gather(*(
+            self._get(resource, dict(base_params, id=','.join(chunk))) for chunk in chunks
+        ))
+
+        items_by_id = {}
+        for response in responses:
+            for item in response.get('items', []):
+                items_by_id[item['id']] = item
+        return items_by_id
+
+    async def get_videos(self, video_ids, part=VIDEO_PARTS, fields=VIDEO_FIELDS):
+        """Return {video_id: item} for the IDs that exist; missing videos are omitted."""
+        return await self._list_by_ids('videos', video_ids, part, fields)
+
+    async def get_channels(self, channel_ids, part='snippet,contentDetails,statistics', fields=None):
+        """Return {channel_id: item} for the IDs that exist; missing channels are omitted."""
+        return await self._list_by_ids('channels', channel_ids, part, fields)
+
+    async def get_playlist_items(self, playlist_id, part='contentDetails', fields=None):
+        """Return all items of a playlist, following nextPageToken."""
+        items = []
+        params = {'part': part, 'playlistId': playlist_id, 'maxResults': MAX_IDS_PER_REQUEST}
+        if fields:
+            # nextPageToken must survive the mask for pagination to work
+            params['fields'] = f"nextPageToken,{fields}"
+        while True:
+            response = await self._get('playlistItems', params)
+            items.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items
+            params = dict(params, pageToken=page_token)
+
+    async def get_playlists_items(self, playlist_ids, part='contentDetails', fields=None):
+        """Return {playlist_id: items} with the playlists paged through concurrently."""
+        playlist_ids = list(playlist_ids)
+        results = await asyncio.gather(*(
+            self.get_playlist_items(playlist_id, part, fields) for playlist_id in playlist_ids
+        ))
+        return dict(zip(playlist_ids, results))
+
+# Example usage
+if __name__ == '__main__':
+    print("AsyncYouTubeClient defined for concurrent videos/channels/playlistItems list requests.")
@@ -1,5 +1,8 @@
 import os
-from google.colab import userdata # Keep for direct Colab execution, but prefer os.environ
+try:
+    from google.colab import userdata # Keep for direct Colab execution, but prefer os.environ
+except ImportError: # Outside Colab (e.g. main.py from a shell) settings come from the environment only
+    userdata = None
 
 class ConfigManager:
     _instance = None
@@ -13,7 +16,7 @@ class ConfigManager:
     def _load_config(self):
         # Helper to get config, prioritizing environment variables
         def get_config_value(key):
-            return os.environ.get(key) or userdata.get(key)
+            return os.environ.get(key) or (userdata.get(key) if userdata is not None else None)
 
         # YouTube API Credentials
         self.API_KEY = get_config_value('API_KEY')
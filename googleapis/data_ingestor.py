@@ -1,15 +1,21 @@
 import time
+import asyncio
 import datetime
 import json
 import logging
-from tqdm.notebook import tqdm
+from tqdm.auto import tqdm # Notebook widget in Colab/Jupyter, text bar from main.py
 import sys
 import mysql.connector # Import explicitly for error handling
 from googleapiclient.errors import HttpError # Import for specific YouTube API error handling
 
 from config_manager import ConfigManager
-from youtube_client import YouTubeClient, YouTubeVideoParser
+from youtube_client import YouTubeClient, YouTubeVideoParser, NOT_MODIFIED
+from async_youtube_client import AsyncYouTubeClient, YouTubeApiError, TRANSIENT_ERRORS
 from db_connector import DBConnector
+from database import get_db_cursor
+
+# Number of IDs read from the file and checked against youtube_videos per query
+VIDEO_ID_CHUNK_SIZE = 500
 
 class DataIngestor:
     def __init__(self):
@@ -25,6 +31,21 @@ INSERT IGNORE INTO youtube_videos (
 ) VALUES (
     %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
 );
+"""
+
+        # Keyset page over the primary key: each page is a short query, so no cursor stays
+        # open (and no result set is buffered) while the API calls of a page run
+        self.select_stats_etags_sql = """
+SELECT video_id, stats_etag FROM youtube_videos
+WHERE video_id > %s
+ORDER BY video_id
+LIMIT %s;
+"""
+
+        self.update_statistics_sql = """
+UPDATE youtube_videos
+SET view_count = %s, like_count = %s, comment_count = %s, stats_etag = %s
+WHERE video_id = %s;
 """
 
     def _setup_logging(self):
@@ -58,28 +79,97 @@ INSERT IGNORE INTO youtube_videos (
 
         return logger
 
-    def _read_video_ids_from_file(self):
-        video_ids = []
+    def _read_video_id_chunks(self, chunk_size=VIDEO_ID_CHUNK_SIZE):
+        """
+        Lazily yield lists of non-blank video IDs from the IDs file, unique within a chunk.
+
+        Memory stays bounded by the chunk: an ID repeated in a later chunk is not
+        tracked here but filtered out as already stored, since callers write a
+        chunk before reading the next one.
+        """
         file_path = self.config.VIDEO_IDS_FILE_PATH
+        read_count = 0
+        chunk = {}
         try:
             with open(file_path, 'r') as f:
                 for line in f:
                     video_id = line.strip()
-                    if video_id:
-                        video_ids.append(video_id)
-            self.logger.info(f"Successfully read {len(video_ids)} video IDs from {file_path}")
+                    if not video_id or video_id in chunk:
+                        continue
+                    chunk[video_id] = None
+                    if len(chunk) >= chunk_size:
+                        read_count += len(chunk)
+                        yield list(chunk)
+                        chunk = {}
+            if chunk:
+                read_count += len(chunk)
+                yield list(chunk)
+            self.logger.info(f"Successfully read {read_count} video IDs from {file_path}")
         except FileNotFoundError:
             self.logger.error(f"Error: The file '{file_path}' was not found.")
         except Exception as e:
             self.logger.error(f"An error occurred while reading the file: {e}")
-        return video_ids
 
-    def ingest_data(self):
-        video_ids = self._read_video_ids_from_file()
-        if not video_ids:
-            self.logger.error("No video IDs to process. Exiting.")
-            return
+    def _filter_stored_video_ids(self, video_ids):
+        """Return the IDs from video_ids that are not yet in youtube_videos, in one query."""
+        placeholders = ', '.join(['%s'] * len(video_ids))
+        select_sql = f"SELECT video_id FROM youtube_videos WHERE video_id IN ({placeholders});"
+        with get_db_cursor(dictionary=False) as cursor:
+            cursor.execute(select_sql, tuple(video_ids))
+            stored = {row[0] for row in cursor.fetchall()}
+        return [video_id for video_id in video_ids if video_id not in stored]
+
+    def _iter_new_video_ids(self, counts):
+        """Stream IDs from the file that are neither duplicates nor already stored."""
+        for chunk in self._read_video_id_chunks():
+            new_ids = self._filter_stored_video_ids(chunk)
+            counts['read'] += len(chunk)
+            counts['already_stored'] += len(chunk) - len(new_ids)
+            yield from new_ids
+
+    def _iter_stats_etags(self, page_size=VIDEO_ID_CHUNK_SIZE):
+        """Stream (video_id, stats_etag) of every stored video in primary-key order, a page at a time."""
+        last_id = ''
+        while True:
+            with get_db_cursor(dictionary=False) as cursor:
+                cursor.execute(self.select_stats_etags_sql, (last_id, page_size))
+                rows = cursor.fetchall()
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
 
+    def _build_video_row(self, video_id, parsed_data):
+        """Prepare a youtube_videos row (insert_video_sql parameter order) from a ParsedVideo."""
+        video_id_val = video_id
+        channel_id_val = parsed_data.channelId
+        published_at_val = None
+        if parsed_data.publishedAt:
+            try:
+                # Convert ISO 8601 string to datetime object
+                published_at_val = datetime.datetime.fromisoformat(parsed_data.publishedAt.replace('Z', '+00:00'))
+            except ValueError:
+                self.logger.warning(f"Could not parse publishedAt for {video_id}: {parsed_data.publishedAt}")
+
+        title_val = parsed_data.title
+        description_val = parsed_data.description
+        tags_val = json.dumps(parsed_data.tags) # Convert tags list to JSON string
+        category_id_val = parsed_data.categoryId
+        default_language_val = parsed_data.defaultLanguage
+        duration_val = parsed_data.duration
+        caption_val = 1 if parsed_data.caption == 'true' else 0
+
+        view_count_val = int(parsed_data.viewCount) if parsed_data.viewCount else None
+        like_count_val = int(parsed_data.likeCount) if parsed_data.likeCount else None
+        comment_count_val = int(parsed_data.commentCount) if parsed_data.commentCount else None
+
+        return (
+            video_id_val, channel_id_val, published_at_val, title_val, description_val, tags_val,
+            category_id_val, default_language_val, duration_val, caption_val,
+            view_count_val, like_count_val, comment_count_val
+        )
+
+    def ingest_data(self):
         processed_count = 0
         inserted_count = 0
         error_count = 0
@@ -93,11 +183,10 @@ INSERT IGNORE INTO youtube_videos (
         self.logger.info("Ensuring database table exists...")
         self.db_connector.create_table()
 
-        cursor = None # Explicitly initialize cursor
+        id_counts = {'read': 0, 'already_stored': 0}
         try:
-            cursor = self.db_connector.mysql_conn.cursor()
-            self.logger.info(f"Processing {len(video_ids)} video IDs...")
-            for video_id in tqdm(video_ids, desc="Processing Videos"):
+            self.logger.info("Processing new video IDs...")
+            for video_id in tqdm(self._iter_new_video_ids(id_counts), desc="Processing Videos"):
                 processed_count += 1
                 try:
                     raw_video_data = self.youtube_client.get_video_data(video_id)
@@ -118,37 +207,10 @@ INSERT IGNORE INTO youtube_videos (
                         error_count += 1
                         continue
 
-                    # Prepare data for MySQL insertion
-                    video_id_val = video_id
-                    channel_id_val = parsed_data.get('channelId')
-                    published_at_val = None
-                    if parsed_data.get('publishedAt'):
-                        try:
-                            # Convert ISO 8601 string to datetime object
-                            published_at_val = datetime.datetime.fromisoformat(parsed_data['publishedAt'].replace('Z', '+00:00'))
-                        except ValueError:
-                            self.logger.warning(f"Could not parse publishedAt for {video_id}: {parsed_data['publishedAt']}")
-
-                    title_val = parsed_data.get('title')
-                    description_val = parsed_data.get('description')
-                    tags_val = json.dumps(parsed_data.get('tags', [])) # Convert tags list to JSON string
-                    category_id_val = parsed_data.get('categoryId')
-                    default_language_val = parsed_data.get('defaultLanguage')
-                    duration_val = parsed_data.get('duration')
-                    caption_val = 1 if parsed_data.get('caption') == 'true' else 0
-
-                    view_count_val = int(parsed_data['viewCount']) if parsed_data.get('viewCount') else None
-                    like_count_val = int(parsed_data['likeCount']) if parsed_data.get('likeCount') else None
-                    comment_count_val = int(parsed_data['commentCount']) if parsed_data.get('commentCount') else None
-
-                    video_data_tuple = (
-                        video_id_val, channel_id_val, published_at_val, title_val, description_val, tags_val,
-                        category_id_val, default_language_val, duration_val, caption_val,
-                        view_count_val, like_count_val, comment_count_val
-                    )
-
-                    cursor.execute(self.insert_video_sql, video_data_tuple)
-                    self.db_connector.mysql_conn.commit()
+                    video_data_tuple = self._build_video_row(video_id, parsed_data)
+
+                    with get_db_cursor(dictionary=False) as cursor:
+                        cursor.execute(self.insert_video_sql, video_data_tuple)
                     self.logger.info(f"Successfully inserted video ID: {video_id}")
                     inserted_count += 1
 
@@ -169,18 +231,165 @@ INSERT IGNORE INTO youtube_videos (
         except Exception as final_e:
             self.logger.critical(f"An unexpected critical error occurred during video processing loop: {final_e}")
         finally:
-            if cursor:
-                cursor.close()
             self.db_connector.close_connection()
 
         self.logger.info("\n--- Processing Summary ---")
-        self.logger.info(f"Total video IDs from file: {len(video_ids)}")
+        self.logger.info(f"Video IDs read from file: {id_counts['read']}")
+        self.logger.info(f"Already stored (skipped without API calls): {id_counts['already_stored']}")
         self.logger.info(f"Total processed attempts: {processed_count}")
         self.logger.info(f"Successfully inserted (or already existed): {inserted_count}")
         self.logger.info(f"Errors encountered: {error_count}")
         self.logger.info("Check 'inserted_video_ids.log' for successful insertions.")
         self.logger.info("Check 'error_log.log' for detailed error information.")
 
+    async def ingest_data_async(self, concurrency=10):
+        """
+        Ingest new video IDs with the asyncio Data API client.
+
+        Each chunk of new IDs is fetched with up to `concurrency` 50-ID videos.list
+        requests in flight, then written with one multi-row insert.
+        """
+        inserted_count = 0
+        missing_count = 0
+        error_count = 0
+
+        self.logger.info("Attempting to establish database connection...")
+        if not self.db_connector.establish_connection():
+            self.logger.critical("Failed to establish database connection after multiple retries. Aborting data ingestion.")
+            return
+
+        self.logger.info("Ensuring database table exists...")
+        self.db_connector.create_table()
+
+        id_counts = {'read': 0, 'already_stored': 0}
+        quota = {'units': 0}
+
+        def record_quota(method, units):
+            quota['units'] += units
+
+        try:
+            async with AsyncYouTubeClient(concurrency=concurrency, on_quota=record_quota) as client:
+                for chunk in self._read_video_id_chunks():
+                    new_ids = await asyncio.to_thread(self._filter_stored_video_ids, chunk)
+                    id_counts['read'] += len(chunk)
+                    id_counts['already_stored'] += len(chunk) - len(new_ids)
+                    if not new_ids:
+                        continue
+
+                    try:
+                        items = await client.get_videos(new_ids)
+                    except YouTubeApiError as api_err:
+                        self.logger.error(f"YouTube API error for a chunk of {len(new_ids)} video IDs: {api_err}")
+                        error_count += len(new_ids)
+                        continue
+                    except TRANSIENT_ERRORS as net_err:
+                        # Still failing after the client's retries; skip the chunk, keep the run going
+                        self.logger.error(f"Network error for a chunk of {len(new_ids)} video IDs: {net_err!r}")
+                        error_count += len(new_ids)
+                        continue
+
+                    rows = []
+                    for video_id in new_ids:
+                        parsed_data = YouTubeVideoParser(items.get(video_id)).parse_data()
+                        if parsed_data is None:
+                            self.logger.warning(f"No video found with ID: {video_id}")
+                            missing_count += 1
+                            continue
+                        rows.append(self._build_video_row(video_id, parsed_data))
+
+                    if rows:
+                        try:
+                            await asyncio.to_thread(self._insert_video_rows, rows)
+                            inserted_count += len(rows)
+                            self.logger.info(f"Successfully inserted {len(rows)} video IDs")
+                        except mysql.connector.Error as db_err:
+                            self.logger.error(f"Database error inserting {len(rows)} videos: {db_err}")
+                            error_count += len(rows)
+
+        except Exception as final_e:
+            self.logger.critical(f"An unexpected critical error occurred during async ingestion: {final_e}")
+        finally:
+            self.db_connector.close_connection()
+
+        self.logger.info("\n--- Processing Summary ---")
+        self.logger.info(f"Video IDs read from file: {id_counts['read']}")
+        self.logger.info(f"Already stored (skipped without API calls): {id_counts['already_stored']}")
+        self.logger.info(f"Successfully inserted (or already existed): {inserted_count}")
+        self.logger.info(f"Not found: {missing_count}")
+        self.logger.info(f"Errors encountered: {error_count}")
+        self.logger.info(f"Quota units used: {quota['units']}")
+
+    def _insert_video_rows(self, rows):
+        with get_db_cursor(dictionary=False) as cursor:
+            cursor.executemany(self.insert_video_sql, rows)
+
+    def refresh_statistics(self):
+        """
+        Re-pull view/like/comment counts for every stored video.
+
+        Each request carries the ETag from the previous refresh, so videos whose
+        statistics did not change come back as 304 and are neither parsed nor written.
+        """
+        unchanged_count = 0
+        updated_count = 0
+        missing_count = 0
+        error_count = 0
+
+        self.logger.info("Attempting to establish database connection...")
+        if not self.db_connector.establish_connection():
+            self.logger.critical("Failed to establish database connection after multiple retries. Aborting statistics refresh.")
+            return
+
+        self.db_connector.create_table()
+
+        try:
+            self.logger.info("Refreshing statistics of stored videos...")
+
+            for video_id, stats_etag in tqdm(self._iter_stats_etags(), desc="Refreshing Statistics"):
+                try:
+                    result = self.youtube_client.get_video_statistics(video_id, stats_etag)
+                    time.sleep(0.2)  # Introduce a small delay for rate limiting
+
+                    if result is NOT_MODIFIED:
+                        unchanged_count += 1
+                        continue
+                    if result is None:
+                        missing_count += 1
+                        continue
+
+                    new_etag, item = result
+                    statistics = item.get('statistics') or {}
+                    view_count_val = int(statistics['viewCount']) if statistics.get('viewCount') else None
+                    like_count_val = int(statistics['likeCount']) if statistics.get('likeCount') else None
+                    comment_count_val = int(statistics['commentCount']) if statistics.get('commentCount') else None
+
+                    with get_db_cursor(dictionary=False) as cursor:
+                        cursor.execute(self.update_statistics_sql, (
+                            view_count_val, like_count_val, comment_count_val, new_etag, video_id
+                        ))
+                    updated_count += 1
+
+                except mysql.connector.Error as db_err:
+                    self.logger.error(f"Database error refreshing video ID {video_id}: {db_err}")
+                    error_count += 1
+                except HttpError as http_err:
+                    self.logger.error(f"YouTube API HTTP error refreshing video ID {video_id}: {http_err} - Details: {http_err.content.decode('utf-8')}")
+                    error_count += 1
+                except Exception as e:
+                    self.logger.error(f"Unexpected error refreshing video ID {video_id}: {e}")
+                    error_count += 1
+
+        except Exception as final_e:
+            self.logger.critical(f"An unexpected critical error occurred during statistics refresh: {final_e}")
+        finally:
+            self.db_connector.close_connection()
+
+        self.logger.info("\n--- Statistics Refresh Summary ---")
+        self.logger.info(f"Unchanged (304 Not Modified): {unchanged_count}")
+        self.logger.info(f"Updated: {updated_count}")
+        self.logger.info(f"No longer available: {missing_count}")
+        self.logger.info(f"Errors encountered: {error_count}")
+
 # Example usage
 if __name__ == '__main__':
     ingestor = DataIngestor()
@@ -1,5 +1,5 @@
 import mysql.connector
-from sshtunnel import SSHTunnelForwarder, BaseSSHTunnelForwarderError
+from sshtunnel import BaseSSHTunnelForwarderError
 import warnings
 import paramiko
 from config_manager import ConfigManager # Import ConfigManager
@@ -12,14 +12,24 @@ from tenacity import (
     after_log
 )
 
+from database import get_db_manager, get_db_cursor
+
 # Suppress Paramiko UserWarning about missing cryptography library
 warnings.filterwarnings('ignore', category=UserWarning, module='paramiko')
 
 class DBConnector:
+    """
+    Data API ingestion access to MySQL through the shared DatabaseManager.
+
+    The SSH tunnel and connection pool are owned by database.db_manager, so
+    browse scraping, transcripts and Data API ingestion running in one process
+    share a single tunnel and draw connections from the same pool.
+    """
+
     def __init__(self):
         self.config = ConfigManager()
-        self.ssh_tunnel = None
-        self.mysql_conn = None
+        self.db_manager = get_db_manager()
+        self._owns_database = False
         self.logger = self._setup_logging()
 
         self.create_table_sql = """
@@ -37,6 +47,7 @@ CREATE TABLE IF NOT EXISTS youtube_videos (
     view_count BIGINT,
     like_count BIGINT,
     comment_count BIGINT,
+    stats_etag VARCHAR(64), -- ETag of the last statistics response, for conditional refreshes
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
@@ -52,13 +63,24 @@ CREATE TABLE IF NOT EXISTS youtube_videos (
             logger.setLevel(logging.INFO)
         return logger
 
-    # Helper for retry condition
-    def _is_connection_error(self, exception):
-        return isinstance(exception, (
-            mysql.connector.Error, 
-            paramiko.SSHException, 
-            BaseSSHTunnelForwarderError
-        ))
+    def _config_settings(self):
+        """Colab/ConfigManager values for the settings the environment left unset."""
+        manager, config = self.db_manager, self.config
+        settings = {}
+        if not manager.ssh_host and config.SSH_HOST:
+            settings.update(
+                use_ssh=True,
+                ssh_host=config.SSH_HOST,
+                ssh_user=manager.ssh_user or config.SSH_USERNAME,
+                ssh_key_path=manager.ssh_key_path or config.SSH_PRIVATEKEY_PATH,
+                remote_db_host=config.REMOTE_MYSQL_HOST,
+                remote_db_port=config.REMOTE_MYSQL_PORT,
+                local_bind_port=config.LOCAL_PORT,
+            )
+        settings['db_user'] = manager.db_user or 'adminuser'
+        settings['db_password'] = manager.db_password or config.DATABASE_PASSWORD
+        settings['db_name'] = manager.db_name or config.DATABASE_NAME
+        return settings
 
     @retry(
         wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -67,78 +89,58 @@ CREATE TABLE IF NOT EXISTS youtube_videos (
         after=after_log(logging.getLogger('db_connector'), logging.WARNING)
     )
     def establish_connection(self):
-        self.close_connection() # Ensure previous connections are closed before retrying
-        try:
-            # Establish SSH tunnel
-            self.logger.info("Attempting to establish SSH tunnel...")
-            self.ssh_tunnel = SSHTunnelForwarder(
-                (self.config.SSH_HOST, 22),
-                ssh_username=self.config.SSH_USERNAME,
-                ssh_pkey=self.config.SSH_PRIVATEKEY_PATH,
-                remote_bind_address=(self.config.REMOTE_MYSQL_HOST, self.config.REMOTE_MYSQL_PORT),
-                local_bind_address=('0.0.0.0', self.config.LOCAL_PORT)
-            )
-            self.ssh_tunnel.start()
-            self.logger.info(f"SSH tunnel established on local port {self.ssh_tunnel.local_bind_port}")
+        if self.db_manager.is_initialized:
+            self.logger.info("Reusing the shared database connection pool.")
+            return True
 
-            # Connect to MySQL
-            self.logger.info("Attempting to connect to MySQL database...")
-            self.mysql_conn = mysql.connector.connect(
-                host='localhost',
-                port=self.ssh_tunnel.local_bind_port,
-                user='adminuser',
-                password=self.config.DATABASE_PASSWORD,
-                database=self.config.DATABASE_NAME
-            )
-            if self.mysql_conn.is_connected():
-                self.logger.info("Successfully connected to MySQL database.")
-                return True
-            else:
-                self.logger.error("Failed to connect to MySQL database after SSH tunnel.")
-                self.close_connection() # Close partially established connections
-                return False
+        try:
+            self.logger.info("Initializing shared database manager (SSH tunnel and connection pool)...")
+            self.db_manager.initialize(self._config_settings())
+            self._owns_database = True
+            self.logger.info("Successfully connected to MySQL database.")
+            return True
 
         except (mysql.connector.Error, paramiko.SSHException, BaseSSHTunnelForwarderError) as e:
             self.logger.error(f"Connection error during establish_connection: {e}")
-            self.close_connection()
             raise # Re-raise to trigger retry
         except Exception as e:
             self.logger.critical(f"An unexpected critical error occurred during connection establishment: {e}")
-            self.close_connection()
             return False
 
     def create_table(self):
-        if self.mysql_conn and self.mysql_conn.is_connected():
-            try:
-                cursor = self.mysql_conn.cursor()
+        if not self.db_manager.is_initialized:
+            self.logger.warning("Cannot create table: MySQL connection is not active.")
+            return False
+        try:
+            with get_db_cursor(dictionary=False) as cursor:
                 self.logger.info("Executing CREATE TABLE statement...")
                 cursor.execute(self.create_table_sql)
-                self.mysql_conn.commit()
-                cursor.close()
-                self.logger.info("Table 'youtube_videos' ensured.")
-                return True
-            except mysql.connector.Error as err:
-                if err.errno == 1050: # Table already exists
-                    self.logger.info("Table 'youtube_videos' already exists. Skipping creation.")
-                else:
-                    self.logger.error(f"Error creating table: {err}")
-                return False
-            except Exception as e:
-                self.logger.error(f"An unexpected error occurred during table creation: {e}")
-                return False
-        else:
-            self.logger.warning("Cannot create table: MySQL connection is not active.")
-        return False
+                self._ensure_stats_etag_column(cursor)
+            self.logger.info("Table 'youtube_videos' ensured.")
+            return True
+        except mysql.connector.Error as err:
+            self.logger.error(f"Error creating table: {err}")
+            return False
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during table creation: {e}")
+            return False
+
+    def _ensure_stats_etag_column(self, cursor):
+        # Tables created before conditional refreshes existed lack the column
+        try:
+            cursor.execute("ALTER TABLE youtube_videos ADD COLUMN stats_etag VARCHAR(64)")
+            self.logger.info("Added 'stats_etag' column to 'youtube_videos'.")
+        except mysql.connector.Error as err:
+            if err.errno != 1060: # Duplicate column name
+                raise
 
     def close_connection(self):
-        if self.mysql_conn and self.mysql_conn.is_connected():
-            self.mysql_conn.close()
-            self.mysql_conn = None
-            self.logger.info("MySQL connection closed.")
-        if self.ssh_tunnel and self.ssh_tunnel.is_active:
-            self.ssh_tunnel.stop()
-            self.ssh_tunnel = None
-            self.logger.info("SSH tunnel stopped.")
+        # Only tear down the shared tunnel/pool if this connector brought it up;
+        # other workloads in the same process may still be using it.
+        if self._owns_database:
+            self.db_manager.cleanup()
+            self._owns_database = False
+            self.logger.info("Shared database manager closed.")
 
 # Example usage
 if __name__ == '__main__':
@@ -1,7 +1,31 @@
+import argparse
+import asyncio
+import os
+import sys
+
+# Entry point (also imported by the Colab notebook): make the repository's shared
+# database package importable when running from googleapis/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from data_ingestor import DataIngestor
 
 if __name__ == '__main__':
-    print("Starting data ingestion process...")
+    parser = argparse.ArgumentParser(description='Ingest YouTube Data API video details into MySQL')
+    parser.add_argument('--refresh-stats', action='store_true', help='Refresh statistics of stored videos instead of ingesting new IDs')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='Ingest with the asyncio client, many requests in flight')
+    parser.add_argument('--concurrency', type=int, default=10, help='Maximum concurrent API requests with --async (default 10)')
+    args = parser.parse_args()
+
     ingestor = DataIngestor()
-    ingestor.ingest_data()
-    print("Data ingestion process finished.")
+    if args.refresh_stats:
+        print("Starting statistics refresh...")
+        ingestor.refresh_statistics()
+        print("Statistics refresh finished.")
+    elif args.use_async:
+        print("Starting async data ingestion process...")
+        asyncio.run(ingestor.ingest_data_async(concurrency=args.concurrency))
+        print("Data ingestion process finished.")
+    else:
+        print("Starting data ingestion process...")
+        ingestor.ingest_data()
+        print("Data ingestion process finished.")
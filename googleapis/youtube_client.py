@@ -2,15 +2,40 @@ import googleapiclient.discovery
 from googleapiclient.errors import HttpError # Import HttpError
 from config_manager import ConfigManager
 import logging
+from typing import List, NamedTuple, Optional
 from tenacity import ( # Import tenacity components
     retry,
     stop_after_attempt,
     wait_exponential,
-    retry_if_exception_type,
     retry_if_exception,
     after_log
 )
 
+# Only the parts and fields that DataIngestor persists are requested; the fields
+# mask keeps the response (and the JSON we have to parse) as small as possible.
+VIDEO_PARTS = "snippet,contentDetails,statistics"
+VIDEO_FIELDS = (
+    "items(id,"
+    "snippet(channelId,publishedAt,title,description,tags,categoryId,defaultLanguage),"
+    "contentDetails(duration,caption),"
+    "statistics(viewCount,likeCount,commentCount))"
+)
+
+# Statistics refreshes only need the counters. The response ETag is requested so
+# the next refresh can be sent as a conditional (If-None-Match) request.
+STATISTICS_PARTS = "statistics"
+STATISTICS_FIELDS = "etag,items(id,statistics(viewCount,likeCount,commentCount))"
+
+# Returned by get_video_statistics when the API answers 304 Not Modified
+NOT_MODIFIED = object()
+
+
+def _is_5xx_or_429(exception):
+    """Retry condition: an HttpError that is a 5xx server error or a 429 rate limit error."""
+    return isinstance(exception, HttpError) and \
+           (exception.resp.status >= 500 or exception.resp.status == 429)
+
+
 class YouTubeClient:
     def __init__(self):
         self.config = ConfigManager()
@@ -30,21 +55,17 @@ class YouTubeClient:
             logger.setLevel(logging.INFO)
         return logger
 
-    def _is_5xx_or_429(self, exception):
-        """Helper to determine if an HttpError is a 5xx server error or 429 rate limit error."""
-        return isinstance(exception, HttpError) and \
-               (exception.resp.status >= 500 or exception.resp.status == 429)
-
     @retry(
         wait=wait_exponential(multiplier=1, min=1, max=10),
         stop=stop_after_attempt(5),
-        retry=retry_if_exception_type(HttpError) & retry_if_exception(_is_5xx_or_429),
+        retry=retry_if_exception(_is_5xx_or_429),
         after=after_log(logging.getLogger('youtube_client'), logging.WARNING)
     )
     def get_video_data(self, video_id):
         try:
             request = self.youtube.videos().list(
-                part="snippet,contentDetails,statistics,topicDetails,status,player,recordingDetails,liveStreamingDetails,localizations",
+                part=VIDEO_PARTS,
+                fields=VIDEO_FIELDS,
                 id=video_id
             )
             response = request.execute()
@@ -62,29 +83,87 @@ class YouTubeClient:
             self.logger.error(f"An unexpected error occurred for video ID {video_id}: {e}")
             return None
 
+    @retry(
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        stop=stop_after_attempt(5),
+        retry=retry_if_exception(_is_5xx_or_429),
+        after=after_log(logging.getLogger('youtube_client'), logging.WARNING)
+    )
+    def get_video_statistics(self, video_id, etag=None):
+        """
+        Fetch statistics for a video, conditionally on a previously stored ETag.
+
+        Returns NOT_MODIFIED when the API answers 304 for the given ETag,
+        None when the video no longer exists, otherwise a tuple of
+        (response_etag, video_item).
+        """
+        try:
+            request = self.youtube.videos().list(
+                part=STATISTICS_PARTS,
+                fields=STATISTICS_FIELDS,
+                id=video_id
+            )
+            if etag:
+                request.headers['If-None-Match'] = etag
+            response = request.execute()
+
+            if response['items']:
+                return response.get('etag'), response['items'][0]
+            else:
+                self.logger.warning(f"No video found with ID: {video_id}")
+                return None
+
+        except HttpError as e:
+            if e.resp.status == 304:
+                return NOT_MODIFIED
+            self.logger.error(f"HTTP error for video ID {video_id}: {e} - Details: {e.content.decode('utf-8')}")
+            raise # Re-raise to trigger retry
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred for video ID {video_id}: {e}")
+            return None
+
+class ParsedVideo(NamedTuple):
+    """Slim record holding only the video fields that are persisted."""
+    channelId: Optional[str]
+    publishedAt: Optional[str]
+    title: Optional[str]
+    description: Optional[str]
+    tags: List[str]
+    categoryId: Optional[str]
+    defaultLanguage: Optional[str]
+    duration: Optional[str]
+    caption: Optional[str]
+    viewCount: Optional[str]
+    likeCount: Optional[str]
+    commentCount: Optional[str]
+
+
 class YouTubeVideoParser:
     def __init__(self, video_data):
         self.video_data = video_data
 
     def parse_data(self):
         if not self.video_data:
-            return {}
-
-        parsed_info = {
-            'channelId': self.video_data.get('snippet', {}).get('channelId'),
-            'publishedAt': self.video_data.get('snippet', {}).get('publishedAt'),
-            'title': self.video_data.get('snippet', {}).get('title'),
-            'description': self.video_data.get('snippet', {}).get('description'),
-            'tags': self.video_data.get('snippet', {}).get('tags', []), # Default to empty list if no tags
-            'categoryId': self.video_data.get('snippet', {}).get('categoryId'),
-            'defaultLanguage': self.video_data.get('snippet', {}).get('defaultLanguage'),
-            'duration': self.video_data.get('contentDetails', {}).get('duration'),
-            'caption': self.video_data.get('contentDetails', {}).get('caption'),
-            'viewCount': self.video_data.get('statistics', {}).get('viewCount'),
-            'likeCount': self.video_data.get('statistics', {}).get('likeCount'),
-            'commentCount': self.video_data.get('statistics', {}).get('commentCount')
-        }
-        return parsed_info
+            return None
+
+        snippet = self.video_data.get('snippet') or {}
+        content_details = self.video_data.get('contentDetails') or {}
+        statistics = self.video_data.get('statistics') or {}
+
+        return ParsedVideo(
+            channelId=snippet.get('channelId'),
+            publishedAt=snippet.get('publishedAt'),
+            title=snippet.get('title'),
+            description=snippet.get('description'),
+            tags=snippet.get('tags', []), # Default to empty list if no tags
+            categoryId=snippet.get('categoryId'),
+            defaultLanguage=snippet.get('defaultLanguage'),
+            duration=content_details.get('duration'),
+            caption=content_details.get('caption'),
+            viewCount=statistics.get('viewCount'),
+            likeCount=statistics.get('likeCount'),
+            commentCount=statistics.get('commentCount')
+        )
 
 # Example usage
 if __name__ == '__main__':
@@ -0,0 +1,51 @@
+"""
+Apply retention and compaction to the change_events outbox.
+
+Deletes events older than --retention-days and keeps only the latest
+view_count_changed event per video among events older than
+--compact-after-minutes. Run it periodically, e.g. hourly from cron.
+
+Usage examples:
+  python maintain_change_log.py --create-table
+  python maintain_change_log.py --retention-days 14 --compact-after-minutes 30
+  python maintain_change_log.py --consumer search-indexer
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path so this script can run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import db_manager
+from database.change_log import ChangeLogRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Purge and compact the change-data-capture outbox')
+    parser.add_argument('--retention-days', type=int, default=7, help='Delete events older than this (default 7)')
+    parser.add_argument('--compact-after-minutes', type=int, default=60, help='Compact view count events older than this (default 60)')
+    parser.add_argument('--create-table', action='store_true', help='Create the change log tables if missing')
+    parser.add_argument('--consumer', default=None, help='Print the committed position of this consumer')
+
+    args = parser.parse_args()
+
+    print('Initializing MySQL connection...')
+    db_manager.initialize()
+
+    try:
+        if args.create_table:
+            ChangeLogRepository.create_tables()
+
+        compacted = ChangeLogRepository.compact(args.compact_after_minutes)
+        purged = ChangeLogRepository.purge(args.retention_days)
+        print(f"Compacted {compacted} view count events, purged {purged} expired events")
+        if args.consumer:
+            print(f"{args.consumer}: last_seq={ChangeLogRepository.get_position(args.consumer)}")
+    finally:
+        db_manager.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Apply versioned schema migrations (database/migrations.py) to the MySQL database.
+
+Index changes run as online DDL (ALGORITHM=INPLACE, LOCK=NONE) where the server
+supports it, so crawlers can keep writing while they are applied.
+
+Usage examples:
+  python migrate_schema.py --status
+  python migrate_schema.py
+  python migrate_schema.py --target 2
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path so this script can run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import db_manager
+from database.migrations import MigrationRunner
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply pending schema migrations')
+    parser.add_argument('--status', action='store_true', help='List applied and pending migrations without applying')
+    parser.add_argument('--target', type=int, default=None, help='Apply migrations up to this version (default: latest)')
+
+    args = parser.parse_args()
+
+    print('Initializing MySQL connection...')
+    db_manager.initialize()
+
+    try:
+        pending = MigrationRunner.get_pending(args.target)
+        if args.status:
+            print(f'Applied versions: {MigrationRunner.get_applied_versions()}')
+            for migration in pending:
+                print(f'Pending: {migration.version} {migration.name}')
+            return
+
+        applied = 0
+        for migration in pending:
+            print(f'Applying {migration.version} {migration.name}...')
+            if MigrationRunner.apply(migration):
+                applied += 1
+            else:
+                print(f'Deferred {migration.version}: its tables do not exist yet')
+        print(f'Applied {applied} migrations')
+    finally:
+        db_manager.cleanup()
+
+
+if __name__ == '__main__':
+    main()
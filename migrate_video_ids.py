@@ -0,0 +1,54 @@
+"""
+Migrate the videos and transcripts tables to compact BINARY(8) video IDs.
+
+Step 1 copies the tables online (crawlers can keep running) and prints a
+watermark. Step 2, run after stopping all writers, copies the last changes and
+swaps the tables in; then restart everything with DB_VIDEO_ID_FORMAT=binary.
+The original tables are kept as videos_varchar_old / transcripts_varchar_old
+(and change_events_varchar_old when the change log outbox exists).
+
+Usage examples:
+  python migrate_video_ids.py --chunk-size 5000 --pause 0.1
+  python migrate_video_ids.py --swap --since "2024-05-01 12:00:00"
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path so this script can run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import db_manager
+from database.video_id_migration import copy_to_binary, swap_tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate video_id columns from VARCHAR(20) to BINARY(8)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per copy statement (default 5000)')
+    parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between chunks (default 0)')
+    parser.add_argument('--swap', action='store_true', help='Final catch-up and table swap (stop all writers first)')
+    parser.add_argument('--since', default=None, help='Watermark printed by the copy step (required with --swap)')
+
+    args = parser.parse_args()
+    if args.swap and not args.since:
+        parser.error('--swap requires --since (printed by the copy step)')
+
+    print('Initializing MySQL connection...')
+    db_manager.initialize()
+
+    try:
+        if args.swap:
+            copied = swap_tables(args.since)
+            print(f'Swapped tables after copying {copied} final rows. Restart writers with DB_VIDEO_ID_FORMAT=binary')
+        else:
+            stats = copy_to_binary(chunk_size=args.chunk_size, pause=args.pause)
+            print(f"Copied {stats['videos']} videos and {stats['transcripts']} transcripts "
+                  f"({stats['catch_up']} catch-up rows, {stats['non_canonical']} non-canonical IDs left behind)")
+            print(f"Next, with writers stopped: python migrate_video_ids.py --swap --since \"{stats['since']}\"")
+    finally:
+        db_manager.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Recompute the channel_stats aggregates from the videos table.
+
+With DB_CHANNEL_STATS=true, video writes keep channel_stats up to date
+incrementally. Run this once after enabling it, and again to repair the table
+after writes that bypassed the repositories (manual SQL). Crawlers can keep
+running: their video writes wait while the rebuild reads the videos table.
+
+Usage examples:
+  python rebuild_channel_stats.py --create-table
+  python rebuild_channel_stats.py --channel UCnwxzpFzZNtLH8NgTeAROFA
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path so this script can run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import db_manager
+from database.channel_stats import ChannelStatsRepository, ALL_CHANNELS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild materialized per-channel video aggregates')
+    parser.add_argument('--create-table', action='store_true', help='Create the channel_stats table if missing')
+    parser.add_argument('--channel', default=None, help='Print the stats of this channel after rebuilding')
+
+    args = parser.parse_args()
+
+    print('Initializing MySQL connection...')
+    db_manager.initialize()
+
+    try:
+        if args.create_table:
+            ChannelStatsRepository.create_table()
+
+        channels = ChannelStatsRepository.rebuild()
+        totals = ChannelStatsRepository.get_channel_stats(ALL_CHANNELS)
+        print(f"Rebuilt stats for {channels} channels ({totals['video_count']} videos)")
+        if args.channel:
+            print(ChannelStatsRepository.get_channel_stats(args.channel))
+    finally:
+        db_manager.cleanup()
+
+
+if __name__ == '__main__':
+    main()
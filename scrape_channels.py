@@ -18,7 +18,11 @@ from typing import List
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from api.videos import get_videos
-from database import init_database, close_database, VideoRepository
+from database import (
+    init_database, close_database, VideoRepository, get_write_behind, write_behind_enabled,
+    VideoStatsRepository, snapshots_enabled, apply_migrations, get_storage_backend,
+    ChannelStatsRepository, channel_stats_enabled
+)
 
 
 def parse_channel_file(file_path: str) -> List[str]:
@@ -67,6 +71,12 @@ def main():
     if args.create_table:
         print('Ensuring videos table exists...')
         VideoRepository.create_table()
+        if get_storage_backend() == 'mysql':
+            apply_migrations()
+            if snapshots_enabled():
+                VideoStatsRepository.create_tables()
+            if channel_stats_enabled():
+                ChannelStatsRepository.create_table()
 
     total_channels = 0
     total_videos_fetched = 0
@@ -94,9 +104,15 @@ def main():
                 elif args.save_to_db is True:
                     # We fetched with save_to_db=False above, so upsert here and count results
                     try:
-                        count = VideoRepository.upsert_videos_batch(videos) if videos else 0
-                        total_videos_saved += count
-                        print(f'Upserted {count} videos')
+                        if write_behind_enabled():
+                            get_write_behind().enqueue_videos(videos)
+                            total_videos_saved += len(videos)
+                            print(f'Queued {len(videos)} videos for upsert')
+                        else:
+                            stats = VideoRepository.upsert_videos_diff(videos) if videos else {'new': 0, 'changed': 0, 'unchanged': 0}
+                            total_videos_saved += sum(stats.values())
+                            print(f"Upserted {len(videos)} videos: {stats['new']} new, {stats['changed']} changed, "
+                                  f"{stats['unchanged']} unchanged")
                     except Exception as e:
                         print(f'Error upserting videos for {channel}: {e}')
                 else:
@@ -12,57 +12,189 @@ Usage examples:
 import argparse
 import json
 import logging
-from typing import List
+import os
+from typing import Any, Dict, List, Optional
 
+import requests
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import (  # type: ignore
     TranscriptsDisabled,
     NoTranscriptFound,
+    RequestBlocked,
+    YouTubeRequestFailed,
 )
 
-from database import init_database, close_database, TranscriptRepository
+from api.proxy_pool import get_proxy_pool
+
+from database import init_database, close_database, TranscriptRepository, get_write_behind, write_behind_enabled
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Languages tried when none are given (same default as YouTubeTranscriptApi.fetch)
+DEFAULT_LANGUAGES = ['en']
 
-def fetch_transcript_for_video(video_id: str, languages: List[str] = None) -> dict:
-    """Fetch transcript for a single video id and return a result dictionary."""
-    try:
-        api = YouTubeTranscriptApi()
-        # Using instance.fetch(video_id) returns a FetchedTranscript object
-        fetched = api.fetch(video_id) if languages is None else api.fetch(video_id, languages=languages)
-
-        # Most useful for downstream storage is the raw snippet list:
-        # fetched.to_raw_data() returns a list of dicts: [{text, start, duration}, ...]
-        if hasattr(fetched, 'to_raw_data'):
-            raw_list = fetched.to_raw_data()
-        else:
-            # Fallback: build raw list from snippets attribute
-            snippets = getattr(fetched, 'snippets', [])
-            raw_list = []
-            for s in snippets:
-                text = getattr(s, 'text', None) or (s.get('text') if isinstance(s, dict) else '')
-                start = getattr(s, 'start', None) or (s.get('start') if isinstance(s, dict) else None)
-                duration = getattr(s, 'duration', None) or (s.get('duration') if isinstance(s, dict) else None)
-                raw_list.append({'text': text, 'start': start, 'duration': duration})
-
-        return {
-            'status': 'fetched',
-            'raw': raw_list,
-            'error': None
+# Cached transcript listings older than this are listed again, since captions get added later
+LANGUAGE_CACHE_MAX_AGE_HOURS = float(os.getenv('TRANSCRIPT_LANGUAGES_MAX_AGE_HOURS', 168))
+
+
+def describe_transcripts(transcript_list) -> List[Dict[str, Any]]:
+    """Serializable summary of a TranscriptList, as cached in transcript_languages"""
+    return [
+        {
+            'language_code': t.language_code,
+            'language': t.language,
+            'is_generated': t.is_generated,
+            'is_translatable': getattr(t, 'is_translatable', False),
         }
+        for t in transcript_list
+    ]
+
+
+def disabled_listing(error: str) -> List[Dict[str, Any]]:
+    """Listing cached for a video whose transcripts are disabled, keeping the library's message"""
+    return [{'transcripts_disabled': True, 'error': error}]
+
+
+def disabled_error(available: List[Dict[str, Any]]) -> Optional[str]:
+    """The cached TranscriptsDisabled message, or None for a regular listing"""
+    for item in available:
+        if item.get('transcripts_disabled'):
+            return item['error']
+    return None
+
+
+def select_language(available: List[Dict[str, Any]], languages: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Best listed transcript: first preferred language that exists, manual before generated"""
+    for code in languages or DEFAULT_LANGUAGES:
+        for is_generated in (False, True):
+            for item in available:
+                if item['language_code'] == code and item['is_generated'] == is_generated:
+                    return item
+    return None
+
+
+def _no_match(video_id: str, languages: Optional[List[str]], available: List[Dict[str, Any]]) -> dict:
+    listed = ', '.join(f"{item['language_code']}{' (generated)' if item['is_generated'] else ''}" for item in available)
+    error = f"No transcript in {languages or DEFAULT_LANGUAGES} for {video_id}; available: {listed or 'none'}"
+    logger.info(error)
+    return {'status': 'empty', 'raw': None, 'error': error}
 
+
+def _list_and_fetch(api, video_id: str, languages: Optional[List[str]], language_cache) -> dict:
+    """List the video's transcripts once and fetch the best match; library errors propagate"""
+    try:
+        transcript_list = list(api.list(video_id))
     except TranscriptsDisabled as e:
-        logger.warning(f"Transcripts disabled for {video_id}: {e}")
-        return {'status': 'failed', 'raw': None, 'error': str(e)}
-    except NoTranscriptFound as e:
-        logger.info(f"No transcripts found for {video_id}: {e}")
-        return {'status': 'empty', 'raw': None, 'error': str(e)}
-    except Exception as e:  # broad catch for network/other API errors
-        logger.error(f"Error fetching transcript for {video_id}: {e}")
-        return {'status': 'failed', 'raw': None, 'error': str(e)}
+        _cache_languages(language_cache, video_id, disabled_listing(str(e)))
+        raise
+    available = describe_transcripts(transcript_list)
+    _cache_languages(language_cache, video_id, available)
+
+    choice = select_language(available, languages)
+    if choice is None:
+        return _no_match(video_id, languages, available)
+    transcript = next(
+        t for t in transcript_list
+        if t.language_code == choice['language_code'] and t.is_generated == choice['is_generated']
+    )
+    # Transcript.fetch() returns a FetchedTranscript object
+    fetched = transcript.fetch()
+
+    # Most useful for downstream storage is the raw snippet list:
+    # fetched.to_raw_data() returns a list of dicts: [{text, start, duration}, ...]
+    if hasattr(fetched, 'to_raw_data'):
+        raw_list = fetched.to_raw_data()
+    else:
+        # Fallback: build raw list from snippets attribute
+        snippets = getattr(fetched, 'snippets', [])
+        raw_list = []
+        for s in snippets:
+            text = getattr(s, 'text', None) or (s.get('text') if isinstance(s, dict) else '')
+            start = getattr(s, 'start', None) or (s.get('start') if isinstance(s, dict) else None)
+            duration = getattr(s, 'duration', None) or (s.get('duration') if isinstance(s, dict) else None)
+            raw_list.append({'text': text, 'start': start, 'duration': duration})
+
+    return {
+        'status': 'fetched',
+        'raw': raw_list,
+        'error': None,
+        'language': choice['language_code'],
+        'is_generated': choice['is_generated'],
+    }
+
+
+def fetch_transcript_for_video(video_id: str, languages: List[str] = None, language_cache=None) -> dict:
+    """Fetch transcript for a single video id and return a result dictionary.
+
+    The video's transcripts are listed once and the best match for `languages`
+    is fetched directly. With a language_cache (a TranscriptRepository), the
+    listing is stored, and a request for a language the cached listing lacks
+    returns 'empty' without any network call. A video with transcripts
+    disabled is cached as such and answered from the cache with the same
+    'failed' result as the live listing.
+
+    Requests go through the shared proxy pool. Listing and fetch stick to one
+    endpoint; a blocked endpoint cools down and the video is retried elsewhere.
+    """
+    if language_cache is not None:
+        try:
+            cached = language_cache.get_transcript_languages(video_id, LANGUAGE_CACHE_MAX_AGE_HOURS)
+        except Exception as e:  # the cache is an optimization; fall back to listing
+            logger.warning(f"Transcript language cache unavailable for {video_id}: {e}")
+            cached = None
+        if cached == []:
+            # Written by older versions for disabled transcripts, without the error; list again
+            cached = None
+        if cached is not None:
+            disabled = disabled_error(cached)
+            if disabled is not None:
+                logger.warning(f"Transcripts disabled for {video_id} (cached): {disabled}")
+                return {'status': 'failed', 'raw': None, 'error': disabled}
+            if select_language(cached, languages) is None:
+                return _no_match(video_id, languages, cached)
+
+    pool = get_proxy_pool()
+    attempts = min(len(pool.endpoints), 3)
+    for attempt in range(1, attempts + 1):
+        endpoint = pool.acquire(sticky_key=video_id)
+        try:
+            result = _list_and_fetch(YouTubeTranscriptApi(http_client=endpoint.session), video_id, languages, language_cache)
+            pool.report(endpoint)
+            return result
+        except RequestBlocked as e:
+            # Also raised for IpBlocked; YouTube answered with a 429 or a captcha page
+            pool.report(endpoint, 429)
+            if attempt < attempts:
+                continue
+            logger.warning(f"Transcript requests blocked for {video_id}: {e}")
+            return {'status': 'failed', 'raw': None, 'error': str(e)}
+        except TranscriptsDisabled as e:
+            pool.report(endpoint)
+            logger.warning(f"Transcripts disabled for {video_id}: {e}")
+            return {'status': 'failed', 'raw': None, 'error': str(e)}
+        except NoTranscriptFound as e:
+            pool.report(endpoint)
+            logger.info(f"No transcripts found for {video_id}: {e}")
+            return {'status': 'empty', 'raw': None, 'error': str(e)}
+        except (YouTubeRequestFailed, requests.RequestException) as e:
+            pool.report(endpoint, error=e)
+            logger.error(f"Error fetching transcript for {video_id}: {e}")
+            return {'status': 'failed', 'raw': None, 'error': str(e)}
+        except Exception as e:  # broad catch for other API errors; the endpoint itself worked
+            pool.report(endpoint)
+            logger.error(f"Error fetching transcript for {video_id}: {e}")
+            return {'status': 'failed', 'raw': None, 'error': str(e)}
+
+
+def _cache_languages(language_cache, video_id: str, available: List[Dict[str, Any]]):
+    if language_cache is None:
+        return
+    try:
+        language_cache.save_transcript_languages(video_id, available)
+    except Exception as e:
+        logger.warning(f"Could not cache transcript languages for {video_id}: {e}")
 
 
 def process_batch(limit: int = 50, offset: int = 0, languages: List[str] = None) -> dict:
@@ -71,11 +203,13 @@ def process_batch(limit: int = 50, offset: int = 0, languages: List[str] = None)
     logger.info(f"Found {len(video_ids)} videos without transcripts (limit={limit}, offset={offset})")
 
     stats = {'processed': 0, 'fetched': 0, 'empty': 0, 'failed': 0}
+    # With DB_WRITE_BEHIND=true, writes are batched in the background and flushed by close_database()
+    save = get_write_behind().enqueue_transcript if write_behind_enabled() else TranscriptRepository.upsert_transcript
 
     for vid in video_ids:
         stats['processed'] += 1
-        result = fetch_transcript_for_video(vid, languages)
-        TranscriptRepository.upsert_transcript(
+        result = fetch_transcript_for_video(vid, languages, language_cache=TranscriptRepository)
+        save(
             video_id=vid,
             transcript_raw=result.get('raw'),
             status=result.get('status'),
@@ -114,7 +248,7 @@ def main():
 
         if args.video_id:
             logger.info(f"Fetching transcript for single video: {args.video_id}")
-            res = fetch_transcript_for_video(args.video_id, languages)
+            res = fetch_transcript_for_video(args.video_id, languages, language_cache=TranscriptRepository)
             TranscriptRepository.upsert_transcript(
                 video_id=args.video_id,
                 transcript_raw=res.get('raw'),
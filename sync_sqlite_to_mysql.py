@@ -0,0 +1,57 @@
+"""
+Push rows accumulated in the embedded SQLite backend to MySQL in bulk.
+
+Crawls run with DB_BACKEND=sqlite write to a local SQLite file (SQLITE_PATH).
+This command sends every row written since the last sync to the MySQL database
+configured in .env (over the SSH tunnel if enabled).
+
+Usage examples:
+  python sync_sqlite_to_mysql.py --create-table
+  python sync_sqlite_to_mysql.py --sqlite-path crawl.sqlite3 --batch-size 1000
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path so this script can run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import db_manager
+from database.video_repository import VideoRepository
+from database.transcript_repository import TranscriptRepository
+from database import sqlite_backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync the embedded SQLite backend to MySQL')
+    parser.add_argument('--sqlite-path', default=None, help='SQLite file to read (default: SQLITE_PATH or youtube_crawler.sqlite3)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk upsert (default 500)')
+    parser.add_argument('--create-table', action='store_true', help='Create the MySQL videos and transcripts tables if missing')
+
+    args = parser.parse_args()
+
+    if args.sqlite_path:
+        sqlite_backend.sqlite_db = sqlite_backend.SQLiteDatabase(args.sqlite_path)
+
+    if not os.path.exists(sqlite_backend.sqlite_db.path):
+        print(f"SQLite file not found: {sqlite_backend.sqlite_db.path}")
+        raise SystemExit(1)
+
+    print('Initializing MySQL connection...')
+    db_manager.initialize()
+
+    try:
+        if args.create_table:
+            VideoRepository.create_table()
+            TranscriptRepository.create_table()
+
+        stats = sqlite_backend.sync_to_mysql(batch_size=args.batch_size)
+        print(f"Synced {stats['videos']} videos and {stats['transcripts']} transcripts")
+    finally:
+        db_manager.cleanup()
+        sqlite_backend.sqlite_db.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('async_repositories', os.path.join(os.path.dirname(__file__), '..', 'database', 'async_repositories.py'))
+async_repositories = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(async_repositories)
+
+# The package re-exports the manager instance under the module's name, so fetch the module itself
+async_db = importlib.import_module('database.async_db_manager')
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.results = []
+
+    async def execute(self, query, params=None):
+        self.connection.pool.statements.append((' '.join(query.split()), params))
+        self.results = self.connection.pool.respond(query, params)
+
+    async def executemany(self, query, rows):
+        self.connection.pool.statements.append((' '.join(query.split()), list(rows)))
+
+    async def fetchone(self):
+        return self.results[0] if self.results else None
+
+    async def fetchall(self):
+        return self.results
+
+    async def fetchmany(self, size):
+        batch, self.results = self.results[:size], self.results[size:]
+        return batch
+
+    async def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+    async def commit(self):
+        self.pool.commits += 1
+
+    async def rollback(self):
+        self.pool.rollbacks += 1
+
+
+class FakeAcquire:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return FakeConnection(self.pool)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakePool:
+    """Records statements; respond(query, params) supplies rows for SELECTs"""
+
+    def __init__(self, **config):
+        self.config = config
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+        self.respond = lambda query, params: []
+
+    def acquire(self):
+        return FakeAcquire(self)
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+class FakeManager:
+    use_ssh = False
+    db_user = 'user'
+    db_password = 'secret'
+    db_name = 'yt'
+    pool_size = 3
+    pool_max_age = 3600
+    generation = 0
+
+    def get_connection_target(self):
+        return '127.0.0.1', 3306
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    pools = []
+
+    async def create_pool(**config):
+        pools.append(FakePool(**config))
+        return pools[-1]
+
+    fake_aiomysql = types.SimpleNamespace(create_pool=create_pool, DictCursor=object, Cursor=object, Error=Exception)
+    monkeypatch.setattr(async_db, 'aiomysql', fake_aiomysql)
+    monkeypatch.setattr(async_repositories, 'aiomysql', fake_aiomysql)
+    manager = FakeManager()
+    monkeypatch.setattr(async_db, 'async_db_manager', async_db.AsyncDatabaseManager(manager))
+    return types.SimpleNamespace(pools=pools, manager=manager)
+
+
+def test_async_repositories_expose_coroutine_batch_methods():
+    expected = {
+        'AsyncVideoRepository': ('upsert_video', 'upsert_videos_batch', 'get_video'),
+        'AsyncTranscriptRepository': ('upsert_transcript', 'upsert_transcripts_batch', 'get_transcript', 'get_videos_without_transcripts'),
+    }
+    for class_name, methods in expected.items():
+        cls = getattr(async_repositories, class_name)
+        for method_name in methods:
+            assert asyncio.iscoroutinefunction(getattr(cls, method_name)), f"{class_name}.{method_name} is not async"
+
+
+def test_empty_batches_do_not_touch_the_database():
+    assert asyncio.run(async_repositories.AsyncVideoRepository.upsert_videos_batch([])) == 0
+    assert asyncio.run(async_repositories.AsyncTranscriptRepository.upsert_transcripts_batch([])) == 0
+
+
+def test_batch_upsert_issues_one_multi_row_statement_and_commits(fake_db):
+    videos = [
+        {'video_id': f'vid{i}', 'channel_id': 'UC1', 'published_time': None, 'view_count': i,
+         'published_time_raw': None, 'view_count_raw': None}
+        for i in range(3)
+    ]
+
+    async def run():
+        await async_db.init_async_database()
+        return await async_repositories.AsyncVideoRepository.upsert_videos_batch(videos)
+
+    assert asyncio.run(run()) == 3
+    pool = fake_db.pools[0]
+    assert pool.config['maxsize'] == 3 and pool.config['db'] == 'yt'
+    [(query, rows)] = pool.statements
+    assert query.startswith('INSERT INTO videos') and 'ON DUPLICATE KEY UPDATE' in query
+    assert [row['video_id'] for row in rows] == ['vid0', 'vid1', 'vid2']
+    assert pool.commits == 1
+
+
+def test_reads_decode_rows(fake_db):
+    async def run():
+        await async_db.init_async_database()
+        fake_db.pools[0].respond = lambda query, params: [{'video_id': 'abc'}, {'video_id': 'def'}]
+        return await async_repositories.AsyncTranscriptRepository.get_videos_without_transcripts(limit=2)
+
+    assert asyncio.run(run()) == ['abc', 'def']
+    assert fake_db.pools[0].statements[0][1] == (2, 0)
+
+
+def test_pool_is_rebuilt_after_a_tunnel_reconnect(fake_db):
+    async def run():
+        await async_db.init_async_database()
+        async with async_db.get_async_db_cursor() as cursor:
+            await cursor.execute("SELECT 1")
+        # The tunnel supervisor reconnected
+        fake_db.manager.generation += 1
+        async with async_db.get_async_db_cursor() as cursor:
+            await cursor.execute("SELECT 2")
+        async with async_db.get_async_db_cursor() as cursor:
+            await cursor.execute("SELECT 3")
+        await async_db.async_db_manager.cleanup()
+
+    asyncio.run(run())
+    old, new = fake_db.pools
+    assert old.closed and [query for query, _ in old.statements] == ['SELECT 1']
+    assert [query for query, _ in new.statements] == ['SELECT 2', 'SELECT 3']
+
+
+def test_batch_upsert_applies_channel_deltas_when_enabled(fake_db, monkeypatch):
+    monkeypatch.setattr(async_repositories, 'channel_stats_enabled', lambda: True)
+    stored = {'video_id': 'vid0', 'channel_id': 'UC1', 'published_time': None, 'view_count': 5,
+              'published_time_raw': None, 'view_count_raw': None}
+    videos = [dict(stored, view_count=8), dict(stored, video_id='vid1', view_count=2)]
+
+    async def run():
+        await async_db.init_async_database()
+        fake_db.pools[0].respond = lambda query, params: [dict(stored)] if query.lstrip().startswith('SELECT') else []
+        return await async_repositories.AsyncVideoRepository.upsert_videos_batch(videos)
+
+    assert asyncio.run(run()) == 2
+    pool = fake_db.pools[0]
+    (lookup, _), (upsert, rows), (delta, deltas) = pool.statements
+    assert lookup.endswith('FOR UPDATE')
+    assert [row['video_id'] for row in rows] == ['vid1', 'vid0']
+    assert delta.startswith('INSERT INTO channel_stats')
+    assert deltas == [('*', 1, 5, None), ('UC1', 1, 5, None)]
+    assert pool.commits == 1
+
+
+def test_async_writes_append_change_events_when_enabled(fake_db, monkeypatch):
+    monkeypatch.setattr(async_repositories, 'change_log_enabled', lambda: True)
+    video = {'video_id': 'vid0', 'channel_id': 'UC1', 'published_time': None, 'view_count': 5,
+             'published_time_raw': None, 'view_count_raw': None}
+
+    async def run():
+        await async_db.init_async_database()
+        await async_repositories.AsyncVideoRepository.upsert_video(video)
+        await async_repositories.AsyncTranscriptRepository.upsert_transcripts_batch([
+            {'video_id': 'vid0', 'transcript_raw': [{'text': 'hi'}]},
+            {'video_id': 'vid1', 'status': 'failed', 'error_message': 'disabled'},
+        ])
+
+    asyncio.run(run())
+    events = [rows for query, rows in fake_db.pools[0].statements if query.startswith('INSERT INTO change_events')]
+    assert [[(row[0], row[1]) for row in rows] for rows in events] == [
+        [('video_inserted', 'vid0')], [('transcript_fetched', 'vid0')]
+    ]
+
+
+def test_async_transcripts_are_deduplicated_and_resolved(fake_db, monkeypatch):
+    monkeypatch.setattr(async_repositories, 'transcript_dedup_enabled', lambda: True)
+    payload = [{'text': 'hi'}]
+    serialized = async_repositories.transcript_params('vid0', payload)['transcript_raw']
+    stored_hash = importlib.import_module('database.transcript_payloads').payload_hash(serialized)
+
+    def respond(query, params):
+        if 'FROM transcripts WHERE video_id IN' in query:
+            # vid0 is already stored with the same payload
+            return [{'video_id': 'vid0', 'payload_hash': stored_hash, 'status': 'fetched'}]
+        if 'SELECT * FROM transcripts' in query:
+            return [{'video_id': 'vid0', 'transcript_raw': None, 'payload_hash': bytearray(stored_hash), 'status': 'fetched'}]
+        if 'FROM transcript_payloads' in query and 'FOR SHARE' not in query:
+            return [{'payload_hash': stored_hash, 'transcript_raw': serialized}]
+        return []
+
+    async def run():
+        await async_db.init_async_database()
+        fake_db.pools[0].respond = respond
+        count = await async_repositories.AsyncTranscriptRepository.upsert_transcripts_batch([
+            {'video_id': 'vid0', 'transcript_raw': payload},
+            {'video_id': 'vid1', 'transcript_raw': [{'text': 'new'}]},
+        ])
+        return count, await async_repositories.AsyncTranscriptRepository.get_transcript('vid0')
+
+    count, row = asyncio.run(run())
+    assert count == 2
+    assert row['transcript_raw'] == serialized
+    writes = {query.split(' (')[0]: rows for query, rows in fake_db.pools[0].statements if query.startswith('INSERT')}
+    # Only vid1 is written, with its payload stored once in transcript_payloads
+    assert [row['video_id'] for row in writes['INSERT INTO transcripts']] == ['vid1']
+    assert writes['INSERT INTO transcripts'][0]['transcript_raw'] is None
+    assert len(writes['INSERT IGNORE INTO transcript_payloads']) == 1
+
+
+def test_async_get_transcript_reads_archived_rows(fake_db, monkeypatch):
+    monkeypatch.setattr(async_repositories, 'load_archived', lambda row: dict(row, transcript_raw='[]', status='fetched'))
+
+    async def run():
+        await async_db.init_async_database()
+        fake_db.pools[0].respond = lambda query, params: [{'video_id': 'vid0', 'transcript_raw': None, 'status': 'archived'}]
+        return await async_repositories.AsyncTranscriptRepository.get_transcript('vid0')
+
+    assert asyncio.run(run()) == {'video_id': 'vid0', 'transcript_raw': '[]', 'status': 'fetched'}
+
+
+def test_async_writes_invalidate_cached_rows_after_commit(fake_db, monkeypatch):
+    cache = importlib.import_module('database.cache')
+    invalidated = []
+
+    class RecordingCache:
+        def __init__(self, name):
+            self.name = name
+
+        def invalidate(self, key):
+            invalidated.append((self.name, key, fake_db.pools[0].commits))
+
+        def invalidate_many(self, keys):
+            for key in keys:
+                self.invalidate(key)
+
+    monkeypatch.setattr(async_repositories, 'video_cache', RecordingCache('videos'))
+    monkeypatch.setattr(async_repositories, 'transcript_cache', RecordingCache('transcripts'))
+    video = {'video_id': 'vid0', 'channel_id': 'UC1', 'published_time': None, 'view_count': 5,
+             'published_time_raw': None, 'view_count_raw': None}
+
+    async def run():
+        await async_db.init_async_database()
+        await async_repositories.AsyncVideoRepository.upsert_videos_batch([video])
+        await async_repositories.AsyncTranscriptRepository.upsert_transcript('vid0', [{'text': 'hi'}])
+
+    asyncio.run(run())
+    # Each entry is dropped once its own transaction has committed
+    assert invalidated == [('videos', 'vid0', 1), ('transcripts', 'vid0', 2)]
+
+
+@pytest.mark.parametrize('diff_path', [False, True])
+def test_async_video_writes_append_snapshots(fake_db, monkeypatch, diff_path):
+    monkeypatch.setattr(async_repositories, 'snapshots_enabled', lambda: True)
+    monkeypatch.setattr(async_repositories, 'channel_stats_enabled', lambda: diff_path)
+    stored = {'video_id': 'dQw4w9WgXcQ', 'channel_id': 'UC1', 'published_time': None, 'view_count': 5,
+              'published_time_raw': None, 'view_count_raw': None}
+    videos = [stored, dict(stored, video_id='9bZkp7q19f0', view_count=None)]
+
+    async def run():
+        await async_db.init_async_database()
+        # The stored row is unchanged, so the diff path writes no video but still snapshots it
+        fake_db.pools[0].respond = lambda query, params: [dict(stored)] if query.lstrip().startswith('SELECT') else []
+        return await async_repositories.AsyncVideoRepository.upsert_videos_batch(videos)
+
+    assert asyncio.run(run()) == 2
+    pool = fake_db.pools[0]
+    [(_, rows)] = [(query, rows) for query, rows in pool.statements if 'video_stats_snapshots' in query]
+    # Videos without a view count are not snapshotted
+    pack_video_id = importlib.import_module('database.video_ids').pack_video_id
+    assert [(row[0], row[2]) for row in rows] == [(pack_video_id('dQw4w9WgXcQ'), 5)]
+    assert pool.commits == 1
+
+
+def test_async_batch_upsert_filters_through_the_known_video_index(fake_db, monkeypatch):
+    known_videos = importlib.import_module('database.known_videos')
+    index = known_videos.KnownVideoIndex()
+    monkeypatch.setattr(async_repositories, 'known_videos_enabled', lambda: True)
+    monkeypatch.setattr(async_repositories, 'get_known_videos', lambda: index)
+    stored = {'video_id': 'dQw4w9WgXcQ', 'channel_id': 'UC1', 'published_time': None, 'view_count': 5,
+              'published_time_raw': None, 'view_count_raw': None}
+    videos = [stored, dict(stored, video_id='9bZkp7q19f0')]
+
+    async def run():
+        await async_db.init_async_database()
+        # The index loads through the aiomysql pool
+        fake_db.pools[0].respond = lambda query, params: (
+            [{'video_id': 'dQw4w9WgXcQ', 'view_count': 5, 'updated_at': 1}] if query.startswith('SELECT') else []
+        )
+        return await async_repositories.AsyncVideoRepository.upsert_videos_batch(videos)
+
+    assert asyncio.run(run()) == 2
+    [(_, rows)] = [(query, rows) for query, rows in fake_db.pools[0].statements if query.startswith('INSERT INTO videos')]
+    assert [row['video_id'] for row in rows] == ['9bZkp7q19f0']
+    assert len(index) == 2 and index.is_unchanged(videos[1])
@@ -0,0 +1,106 @@
+import os
+import sys
+import asyncio
+import importlib.util
+
+import aiohttp
+import pytest
+from tenacity import wait_none
+
+
+# googleapis modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'googleapis'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('async_youtube_client', os.path.join(os.path.dirname(__file__), '..', 'googleapis', 'async_youtube_client.py'))
+async_youtube_client = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(async_youtube_client)
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def text(self):
+        return str(self.body)
+
+    async def json(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Answers GETs with `respond(params)`: a (status, body) pair, or an exception to raise"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+
+    def get(self, url, params=None):
+        self.requests.append((url, params))
+        outcome = self.respond(params)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(*outcome)
+
+
+@pytest.fixture(autouse=True)
+def no_retry_wait(monkeypatch):
+    monkeypatch.setattr(async_youtube_client.AsyncYouTubeClient._get.retry, 'wait', wait_none())
+
+
+def items_for(params):
+    return {'items': [{'id': video_id} for video_id in params['id'].split(',')]}
+
+
+def test_ids_are_split_into_50_id_requests_and_each_costs_one_unit():
+    session = FakeSession(lambda params: (200, items_for(params)))
+    charged = []
+    client = async_youtube_client.AsyncYouTubeClient(on_quota=lambda method, units: charged.append((method, units)), session=session)
+    video_ids = [f'video{i:03d}' for i in range(120)]
+
+    items = asyncio.run(client.get_videos(video_ids))
+
+    assert sorted(items) == video_ids
+    assert sorted(len(params['id'].split(',')) for _, params in session.requests) == [20, 50, 50]
+    assert all(params['fields'] == async_youtube_client.VIDEO_FIELDS for _, params in session.requests)
+    assert charged == [('videos.list', 1)] * 3 and client.quota_used == 3
+
+
+def test_network_errors_and_server_errors_are_retried_and_every_attempt_is_charged():
+    outcomes = [aiohttp.ClientConnectionError('reset'), (503, 'backend error')]
+
+    def respond(params):
+        return outcomes.pop(0) if outcomes else (200, items_for(params))
+
+    session = FakeSession(respond)
+    client = async_youtube_client.AsyncYouTubeClient(session=session)
+
+    assert list(asyncio.run(client.get_videos(['a']))) == ['a']
+    assert len(session.requests) == 3
+    assert client.quota_used == 3
+
+
+def test_client_errors_are_raised_without_retrying():
+    session = FakeSession(lambda params: (403, 'quotaExceeded'))
+    client = async_youtube_client.AsyncYouTubeClient(session=session)
+
+    with pytest.raises(async_youtube_client.YouTubeApiError) as excinfo:
+        asyncio.run(client.get_videos(['a']))
+    assert excinfo.value.status == 403
+    assert len(session.requests) == 1
+
+
+def test_playlist_items_follow_page_tokens_through_the_fields_mask():
+    pages = {None: {'items': [{'id': 1}], 'nextPageToken': 'p2'}, 'p2': {'items': [{'id': 2}]}}
+    session = FakeSession(lambda params: (200, pages[params.get('pageToken')]))
+    client = async_youtube_client.AsyncYouTubeClient(session=session)
+
+    assert asyncio.run(client.get_playlist_items('PL1', fields='items(id)')) == [{'id': 1}, {'id': 2}]
+    assert session.requests[0][1]['fields'] == 'nextPageToken,items(id)'
@@ -0,0 +1,44 @@
+import os
+import time
+import importlib.util
+
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('cache', os.path.join(os.path.dirname(__file__), '..', 'database', 'cache.py'))
+cache = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cache)
+
+
+def test_lru_evicts_least_recently_used():
+    lru = cache.LRUCache(max_size=2, ttl=0)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)
+
+    assert lru.get('b') is cache.MISSING
+    assert lru.get('a') == 1
+    assert lru.get('c') == 3
+    stats = lru.get_stats()
+    assert stats['evictions'] == 1
+    assert (stats['hits'], stats['misses']) == (3, 1)
+
+
+def test_entries_expire_and_can_cache_none():
+    lru = cache.LRUCache(max_size=10, ttl=0.01)
+    lru.set('absent', None)
+    assert lru.get('absent') is None
+    time.sleep(0.02)
+    assert lru.get('absent') is cache.MISSING
+
+
+def test_invalidate_and_disabled_cache():
+    lru = cache.LRUCache(max_size=10)
+    lru.set('a', 1)
+    lru.invalidate_many(['a'])
+    assert lru.get('a') is cache.MISSING
+
+    disabled = cache.LRUCache(max_size=0)
+    disabled.set('a', 1)
+    assert disabled.get('a') is cache.MISSING
+    assert disabled.get_stats()['misses'] == 0
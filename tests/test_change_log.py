@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import importlib.util
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('change_log', os.path.join(os.path.dirname(__file__), '..', 'database', 'change_log.py'))
+change_log = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(change_log)
+
+
+def test_video_events_classify_inserts_and_view_count_changes():
+    before = {
+        'a': {'video_id': 'a', 'channel_id': 'UC1', 'view_count': 10},
+        'b': {'video_id': 'b', 'channel_id': 'UC1', 'view_count': 20},
+    }
+    written = [
+        {'video_id': 'a', 'channel_id': 'UC1', 'view_count': 15},
+        {'video_id': 'b', 'channel_id': 'UC1', 'view_count': 20, 'view_count_raw': '20 views'},
+        {'video_id': 'c', 'channel_id': 'UC2', 'view_count': 1, 'published_time': None},
+    ]
+    events = change_log.video_events(before, written)
+    assert events == [
+        (change_log.VIEW_COUNT_CHANGED, 'a', 'UC1', {'old': 10, 'new': 15}),
+        (change_log.VIDEO_INSERTED, 'c', 'UC2', {'channel_id': 'UC2', 'published_time': None, 'view_count': 1}),
+    ]
+
+
+def test_append_events_serializes_payloads():
+    class FakeCursor:
+        def executemany(self, query, rows):
+            self.rows = rows
+
+    cursor = FakeCursor()
+    change_log.append_events(cursor, [change_log.transcript_event('dQw4w9WgXcQ', [{'text': 'hi'}])])
+    event_type, video_id, channel_id, payload = cursor.rows[0]
+    assert (event_type, video_id, channel_id) == (change_log.TRANSCRIPT_FETCHED, 'dQw4w9WgXcQ', None)
+    assert json.loads(payload) == {'segments': 1}
+
+
+def test_contiguous_prefix_holds_back_unsettled_gaps():
+    rows = [
+        {'seq': 11, 'settled': False},
+        {'seq': 13, 'settled': False},
+        {'seq': 14, 'settled': False},
+    ]
+    # seq 12 may still commit, so reading stops before 13
+    assert [row['seq'] for row in change_log.contiguous_prefix(rows, 10)] == [11]
+    # An old gap (rolled back or purged) is skipped
+    rows[1]['settled'] = True
+    assert [row['seq'] for row in change_log.contiguous_prefix(rows, 10)] == [11, 13, 14]
+    assert change_log.contiguous_prefix([{'seq': 3, 'settled': False}], 0) == []
+
+
+def test_delete_video_appends_a_deleted_event(monkeypatch):
+    video_repository = importlib.import_module('database.video_repository')
+    stored = {'video_id': 'dQw4w9WgXcQ', 'channel_id': 'UC1', 'published_time': None, 'view_count': 7,
+              'published_time_raw': None, 'view_count_raw': None}
+    executed = []
+
+    class Cursor:
+        rowcount = 0
+
+        def execute(self, query, params=()):
+            self.rows = [dict(stored)] if query.startswith('SELECT') else []
+            self.rowcount = 1
+            executed.append(query)
+
+        def fetchall(self):
+            return self.rows
+
+        def executemany(self, query, rows):
+            executed.append((query, rows))
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(video_repository, 'get_db_cursor', Cursor)
+    monkeypatch.setattr(video_repository, 'change_log_enabled', lambda: True)
+
+    assert video_repository.VideoRepository.delete_video('dQw4w9WgXcQ') is True
+    assert executed[0].endswith('FOR UPDATE') and executed[1].startswith('DELETE')
+    _, [(event_type, video_id, channel_id, payload)] = executed[2]
+    assert (event_type, channel_id, json.loads(payload)) == (
+        change_log.VIDEO_DELETED, 'UC1', {'channel_id': 'UC1', 'view_count': 7}
+    )
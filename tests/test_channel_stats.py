@@ -0,0 +1,101 @@
+import os
+import sys
+import importlib.util
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('channel_stats', os.path.join(os.path.dirname(__file__), '..', 'database', 'channel_stats.py'))
+channel_stats = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(channel_stats)
+
+
+def test_deltas_cover_new_changed_moved_and_deleted_videos():
+    before = {
+        'changed': {'channel_id': 'UCA', 'view_count': 10},
+        'moved': {'channel_id': 'UCA', 'view_count': 5},
+        'deleted': {'channel_id': 'UCB', 'view_count': 7},
+    }
+    after = {
+        'new': {'channel_id': 'UCB', 'view_count': 3, 'published_time': '2024-05-02 00:00:00'},
+        'changed': {'channel_id': 'UCA', 'view_count': 15, 'published_time': '2024-01-01 00:00:00'},
+        'moved': {'channel_id': 'UCB', 'view_count': 5, 'published_time': '2024-05-01 00:00:00'},
+        'deleted': None,
+    }
+
+    deltas = channel_stats.compute_channel_deltas(before, after)
+
+    assert deltas['UCA'] == [-1, 0, '2024-01-01 00:00:00']
+    assert deltas['UCB'] == [1, 1, '2024-05-02 00:00:00']
+    assert deltas[channel_stats.ALL_CHANNELS] == [0, 1, '2024-05-02 00:00:00']
+
+
+def test_deltas_are_applied_in_channel_order():
+    class Cursor:
+        def executemany(self, query, rows):
+            self.rows = rows
+
+    cursor = Cursor()
+    channel_stats.apply_channel_deltas(cursor, {'UCB': [1, 2, None], 'UCA': [1, 3, None]})
+    assert [row[0] for row in cursor.rows] == ['UCA', 'UCB']
+
+
+def test_rebuild_reads_videos_before_touching_channel_stats(monkeypatch):
+    class Cursor:
+        rowcount = 2
+
+        def __init__(self):
+            self.queries = []
+
+        def execute(self, query, params=()):
+            self.queries.append(' '.join(query.split()))
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    cursor = Cursor()
+    monkeypatch.setattr(channel_stats, 'get_db_cursor', lambda: cursor)
+
+    assert channel_stats.ChannelStatsRepository.rebuild() == 2
+    # Same lock order as writers: videos first, then channel_stats
+    aggregate = next(i for i, query in enumerate(cursor.queries) if 'FROM videos' in query)
+    delete = cursor.queries.index('DELETE FROM channel_stats')
+    assert cursor.queries[aggregate].startswith('INSERT INTO channel_stats_staging')
+    assert aggregate < delete
+    assert not any('FROM videos' in query for query in cursor.queries[delete:])
+
+
+def test_update_and_delete_report_their_own_rowcount(monkeypatch):
+    video_repository = importlib.import_module('database.video_repository')
+    stored = {'video_id': 'dQw4w9WgXcQ', 'channel_id': 'UCA', 'published_time': None, 'view_count': 1,
+              'published_time_raw': None, 'view_count_raw': None}
+
+    class Cursor:
+        rowcount = 0
+
+        def execute(self, query, params=()):
+            self.rows = [dict(stored)] if query.startswith('SELECT') else []
+            self.rowcount = 1
+
+        def fetchall(self):
+            return self.rows
+
+        def executemany(self, query, rows):
+            # channel_stats upserts report 2 per updated row; an unchanged row reports 0
+            self.rowcount = 0
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(video_repository, 'get_db_cursor', Cursor)
+    monkeypatch.setattr(video_repository, 'channel_stats_enabled', lambda: True)
+
+    assert video_repository.VideoRepository.update_video('dQw4w9WgXcQ', dict(stored, view_count=2)) is True
+    assert video_repository.VideoRepository.delete_video('dQw4w9WgXcQ') is True
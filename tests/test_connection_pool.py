@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+import importlib.util
+
+import pytest
+
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('connection_pool', os.path.join(os.path.dirname(__file__), '..', 'database', 'connection_pool.py'))
+connection_pool = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(connection_pool)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.in_transaction = False
+
+    def is_connected(self):
+        return self.alive
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory():
+        cnx = FakeConnection()
+        created.append(cnx)
+        return cnx
+
+    return connection_pool.BlockingConnectionPool(factory, **kwargs), created
+
+
+def test_get_connection_waits_for_release():
+    pool, _ = make_pool(pool_size=1, acquire_timeout=2)
+    first = pool.get_connection()
+
+    threading.Timer(0.1, first.close).start()
+    second = pool.get_connection()
+
+    assert second.is_connected()
+    assert pool.get_stats()['max_wait_seconds'] > 0
+    second.close()
+
+
+def test_get_connection_times_out_when_exhausted():
+    pool, _ = make_pool(pool_size=1, acquire_timeout=0.05)
+    held = pool.get_connection()
+
+    with pytest.raises(connection_pool.PoolError):
+        pool.get_connection()
+
+    assert pool.get_stats()['timeouts'] == 1
+    held.close()
+
+
+def test_stale_and_expired_connections_are_replaced():
+    pool, created = make_pool(pool_size=1, validate_idle_after=0)
+    cnx = pool.get_connection()
+    cnx.close()
+    created[0].alive = False
+
+    replacement = pool.get_connection()
+    assert created[0].closed
+    assert len(created) == 2
+    replacement.close()
+
+    pool.max_age = 0.01
+    time.sleep(0.02)
+    pool.get_connection().close()
+    stats = pool.get_stats()
+    assert stats['invalidated'] == 1
+    assert stats['recycled'] == 1
+
+
+def test_release_rolls_back_open_transaction():
+    pool, created = make_pool(pool_size=1)
+    cnx = pool.get_connection()
+    created[0].in_transaction = True
+    cnx.close()
+
+    assert created[0].in_transaction is False
+    assert pool.get_stats()['idle'] == 1
+
+
+def test_failed_prefill_closes_the_connections_already_opened():
+    created = []
+
+    def factory():
+        if len(created) == 2:
+            raise OSError('connection refused')
+        cnx = FakeConnection()
+        created.append(cnx)
+        return cnx
+
+    with pytest.raises(OSError):
+        connection_pool.BlockingConnectionPool(factory, pool_size=3)
+    assert [cnx.closed for cnx in created] == [True, True]
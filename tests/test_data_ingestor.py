@@ -0,0 +1,200 @@
+import os
+import asyncio
+import sys
+import logging
+import importlib.util
+from types import SimpleNamespace
+
+import pytest
+
+
+# googleapis modules import each other as top-level modules, and the database package from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'googleapis'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('data_ingestor', os.path.join(os.path.dirname(__file__), '..', 'googleapis', 'data_ingestor.py'))
+data_ingestor = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(data_ingestor)
+
+
+class FakeYoutubeVideos:
+    """youtube_videos table: {video_id: stats_etag}, answering the queries DataIngestor issues"""
+
+    def __init__(self, stored=None):
+        self.stored = dict(stored or {})
+        self.executed = []
+        self._rows = []
+
+    def execute(self, query, params=None):
+        query = ' '.join(query.split())
+        self.executed.append((query, params))
+        if query.startswith('SELECT video_id, stats_etag'):
+            after, limit = params
+            self._rows = sorted((video_id, etag) for video_id, etag in self.stored.items() if video_id > after)[:limit]
+        elif query.startswith('SELECT video_id FROM youtube_videos WHERE video_id IN'):
+            self._rows = [(video_id,) for video_id in params if video_id in self.stored]
+        elif query.startswith('INSERT IGNORE INTO youtube_videos'):
+            self.stored.setdefault(params[0], None)
+        elif query.startswith('UPDATE youtube_videos'):
+            self.stored[params[4]] = params[3]
+
+    def executemany(self, query, rows):
+        for row in rows:
+            self.execute(query, row)
+
+    def fetchall(self):
+        return self._rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeDBConnector:
+    def establish_connection(self):
+        return True
+
+    def create_table(self):
+        return True
+
+    def close_connection(self):
+        pass
+
+
+@pytest.fixture
+def make_ingestor(monkeypatch, tmp_path):
+    def make(youtube_client=None, stored=None, video_ids=()):
+        table = FakeYoutubeVideos(stored)
+        monkeypatch.setattr(data_ingestor, 'get_db_cursor', lambda dictionary=True: table)
+        monkeypatch.setattr(data_ingestor, 'YouTubeClient', lambda: youtube_client)
+        monkeypatch.setattr(data_ingestor, 'DBConnector', FakeDBConnector)
+        monkeypatch.setattr(data_ingestor.DataIngestor, '_setup_logging', lambda self: logging.getLogger('test_data_ingestor'))
+        monkeypatch.setattr(data_ingestor.time, 'sleep', lambda seconds: None)
+
+        ids_file = tmp_path / 'videoids.txt'
+        ids_file.write_text(''.join(f'{video_id}\n' for video_id in video_ids))
+        ingestor = data_ingestor.DataIngestor()
+        ingestor.config = SimpleNamespace(VIDEO_IDS_FILE_PATH=str(ids_file))
+        return ingestor, table
+    return make
+
+
+def test_video_id_chunks_are_deduplicated_within_the_chunk(make_ingestor):
+    ingestor, _ = make_ingestor(video_ids=['a', '', 'a', 'b', 'c', 'b', '  '])
+
+    assert list(ingestor._read_video_id_chunks(chunk_size=2)) == [['a', 'b'], ['c', 'b']]
+
+
+def test_ids_repeated_in_a_later_chunk_are_filtered_as_stored(make_ingestor, monkeypatch):
+    fetched = []
+
+    class Client:
+        def get_video_data(self, video_id):
+            fetched.append(video_id)
+            return {'snippet': {'channelId': 'UC1', 'title': video_id}}
+
+    ingestor, table = make_ingestor(Client(), stored={'old': None}, video_ids=['a', 'old', 'b', 'a', 'c', 'b'])
+    read_chunks = ingestor._read_video_id_chunks
+    monkeypatch.setattr(ingestor, '_read_video_id_chunks', lambda: read_chunks(chunk_size=2))
+
+    ingestor.ingest_data()
+
+    assert fetched == ['a', 'b', 'c']
+    assert set(table.stored) == {'old', 'a', 'b', 'c'}
+
+
+def test_statistics_refresh_pages_through_stored_videos_by_primary_key(make_ingestor, monkeypatch):
+    requested = []
+
+    class Client:
+        def get_video_statistics(self, video_id, etag=None):
+            requested.append(video_id)
+            return f'etag-{video_id}', {'statistics': {'viewCount': '7'}}
+
+    stored = {f'video{i}': None for i in range(5)}
+    ingestor, table = make_ingestor(Client(), stored=stored)
+    stats_etags = ingestor._iter_stats_etags
+    monkeypatch.setattr(ingestor, '_iter_stats_etags', lambda: stats_etags(page_size=2))
+
+    ingestor.refresh_statistics()
+
+    assert requested == sorted(stored)
+    assert table.stored['video3'] == 'etag-video3'
+    page_params = [params for query, params in table.executed if query.startswith('SELECT video_id, stats_etag')]
+    assert page_params == [('', 2), ('video1', 2), ('video3', 2)]
+
+
+def test_statistics_refresh_skips_unchanged_videos(make_ingestor):
+    etags = []
+
+    class Client:
+        def get_video_statistics(self, video_id, etag=None):
+            etags.append(etag)
+            if video_id == 'same':
+                return data_ingestor.NOT_MODIFIED
+            if video_id == 'gone':
+                return None
+            return '"e2"', {'statistics': {'viewCount': '12', 'likeCount': '3'}}
+
+    ingestor, table = make_ingestor(Client(), stored={'changed': '"e1"', 'gone': '"e0"', 'same': '"e3"'})
+
+    ingestor.refresh_statistics()
+
+    assert etags == ['"e1"', '"e0"', '"e3"']
+    updates = [params for query, params in table.executed if query.startswith('UPDATE youtube_videos')]
+    assert updates == [(12, 3, None, '"e2"', 'changed')]
+
+
+def test_stored_ids_are_filtered_with_one_query_per_chunk(make_ingestor):
+    ingestor, table = make_ingestor(stored={'b': None, 'd': None}, video_ids=['a', 'b', 'c', 'd', 'e'])
+    counts = {'read': 0, 'already_stored': 0}
+    read_chunks = ingestor._read_video_id_chunks
+    ingestor._read_video_id_chunks = lambda: read_chunks(chunk_size=3)
+
+    assert list(ingestor._iter_new_video_ids(counts)) == ['a', 'c', 'e']
+    assert counts == {'read': 5, 'already_stored': 2}
+    lookups = [params for query, params in table.executed if 'WHERE video_id IN' in query]
+    assert lookups == [('a', 'b', 'c'), ('d', 'e')]
+
+
+def test_missing_ids_file_yields_nothing(make_ingestor):
+    ingestor, _ = make_ingestor()
+    ingestor.config.VIDEO_IDS_FILE_PATH += '.missing'
+
+    assert list(ingestor._read_video_id_chunks()) == []
+
+
+def test_async_ingestion_skips_a_failed_chunk_and_keeps_going(make_ingestor, monkeypatch):
+    requested = []
+
+    class Client:
+        def __init__(self, concurrency=10, on_quota=None):
+            self.on_quota = on_quota
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def get_videos(self, video_ids):
+            requested.append(list(video_ids))
+            self.on_quota('videos.list', 1)
+            if 'a' in video_ids:
+                # Still failing after the client's own retries
+                raise data_ingestor.TRANSIENT_ERRORS[0]('connection reset')
+            return {video_id: {'snippet': {'channelId': 'UC1'}} for video_id in video_ids if video_id != 'd'}
+
+    monkeypatch.setattr(data_ingestor, 'AsyncYouTubeClient', Client)
+    ingestor, table = make_ingestor(video_ids=['a', 'b', 'c', 'd'])
+    read_chunks = ingestor._read_video_id_chunks
+    ingestor._read_video_id_chunks = lambda: read_chunks(chunk_size=2)
+
+    asyncio.run(ingestor.ingest_data_async())
+
+    assert requested == [['a', 'b'], ['c', 'd']]
+    # The failed chunk is not written; the next one is, minus the video the API did not return
+    assert set(table.stored) == {'c'}
@@ -0,0 +1,241 @@
+import os
+import threading
+import importlib.util
+
+import pytest
+from mysql.connector.errors import OperationalError, ProgrammingError
+
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('db_manager', os.path.join(os.path.dirname(__file__), '..', 'database', 'db_manager.py'))
+db_manager = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(db_manager)
+
+
+def test_retry_on_disconnect_reconnects_and_retries_once(monkeypatch):
+    reconnects = []
+    monkeypatch.setattr(db_manager.db_manager, 'reconnect', lambda generation=None: reconnects.append(generation))
+    calls = []
+
+    @db_manager.retry_on_disconnect
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OperationalError(msg='Lost connection to MySQL server during query', errno=2013)
+        return 'ok'
+
+    assert flaky() == 'ok'
+    assert len(calls) == 2
+    assert reconnects == [db_manager.db_manager.generation]
+
+
+def test_commit_time_disconnect_is_not_retried_for_non_idempotent_writes(monkeypatch):
+    monkeypatch.setattr(db_manager.db_manager, 'reconnect', lambda generation=None: None)
+
+    class FakeConnection:
+        def __init__(self):
+            self.rolled_back = False
+
+        def cursor(self, dictionary=True):
+            return FakeCursor()
+
+        def commit(self):
+            raise OperationalError(msg='Lost connection to MySQL server during query', errno=2013)
+
+        def rollback(self):
+            self.rolled_back = True
+
+        def close(self):
+            pass
+
+    class FakeCursor:
+        def execute(self, query, params=None):
+            pass
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(db_manager.db_manager, '_checkout_connection', lambda: FakeConnection())
+    calls = {'write': 0, 'read': 0}
+
+    @db_manager.retry_on_disconnect(idempotent=False)
+    def apply_delta():
+        calls['write'] += 1
+        with db_manager.db_manager.get_cursor() as cursor:
+            cursor.execute("UPDATE channel_stats SET video_count = video_count + 1")
+
+    @db_manager.retry_on_disconnect
+    def read():
+        calls['read'] += 1
+        with db_manager.db_manager.get_cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+    with pytest.raises(OperationalError) as excinfo:
+        apply_delta()
+    assert db_manager.commit_outcome_unknown(excinfo.value)
+    assert calls['write'] == 1
+
+    # Idempotent calls are still retried once
+    with pytest.raises(OperationalError):
+        read()
+    assert calls['read'] == 2
+
+
+def test_disconnect_before_commit_is_retried_for_non_idempotent_writes(monkeypatch):
+    monkeypatch.setattr(db_manager.db_manager, 'reconnect', lambda generation=None: None)
+    calls = []
+
+    @db_manager.retry_on_disconnect(idempotent=False)
+    def apply_delta():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OperationalError(msg='Lost connection to MySQL server during query', errno=2013)
+        return 'ok'
+
+    assert apply_delta() == 'ok'
+    assert len(calls) == 2
+
+
+def test_retry_on_disconnect_ignores_query_errors(monkeypatch):
+    monkeypatch.setattr(db_manager.db_manager, 'reconnect', lambda generation=None: pytest.fail('unexpected reconnect'))
+
+    @db_manager.retry_on_disconnect
+    def bad_query():
+        raise ProgrammingError(msg='syntax error', errno=1064)
+
+    with pytest.raises(ProgrammingError):
+        bad_query()
+
+
+class FakeConnection:
+    def __init__(self, pool_number):
+        self.pool_number = pool_number
+        self.closed = False
+        self.in_transaction = False
+        self.commits = 0
+
+    def cursor(self, dictionary=True):
+        return FakeCursor(self)
+
+    def is_connected(self):
+        return not self.closed
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def close(self):
+        pass
+
+
+def test_reconnect_swaps_in_a_new_pool_while_cursors_are_in_use(monkeypatch):
+    manager = db_manager.DatabaseManager()
+    monkeypatch.setattr(manager, 'use_ssh', False)
+    monkeypatch.setattr(manager, 'pool_size', 2)
+    pools_built = []
+    release_build = threading.Event()
+
+    def connect(**config):
+        if len(pools_built) > 1:
+            # Hold the rebuild open so the old pool is exercised mid-reconnect
+            assert release_build.wait(5)
+        return FakeConnection(len(pools_built))
+
+    original_build = manager._build_connection_pool
+
+    def build():
+        pools_built.append(1)
+        return original_build()
+
+    monkeypatch.setattr(db_manager.mysql.connector, 'connect', connect)
+    monkeypatch.setattr(manager, '_build_connection_pool', build)
+    manager.initialize()
+    generation = manager.generation
+    try:
+        with manager.get_cursor() as in_flight:
+            reconnect = threading.Thread(target=manager.reconnect)
+            reconnect.start()
+            # Callers keep getting connections from the old pool during the rebuild
+            with manager.get_cursor() as cursor:
+                assert cursor.connection.pool_number == 1
+            release_build.set()
+            reconnect.join(5)
+            # The cursor checked out before the swap still commits on its connection
+            old_connection = in_flight.connection
+
+        assert old_connection.commits == 1 and old_connection.closed
+        with manager.get_cursor() as cursor:
+            assert cursor.connection.pool_number == 2
+        assert manager.generation == generation + 1
+    finally:
+        manager.cleanup()
+
+
+def test_failed_rebuild_keeps_the_old_pool(monkeypatch):
+    manager = db_manager.DatabaseManager()
+    monkeypatch.setattr(manager, 'use_ssh', False)
+    monkeypatch.setattr(manager, 'pool_size', 1)
+    monkeypatch.setattr(db_manager.mysql.connector, 'connect', lambda **config: FakeConnection(1))
+    manager.initialize()
+    try:
+        pool = manager._connection_pool
+        def build():
+            raise OperationalError(msg="Can't connect to MySQL server", errno=2003)
+
+        monkeypatch.setattr(manager, '_build_connection_pool', build)
+        with pytest.raises(OperationalError):
+            manager.reconnect()
+        assert manager._connection_pool is pool
+        with manager.get_cursor() as cursor:
+            assert cursor.connection.pool_number == 1
+    finally:
+        manager.cleanup()
+
+
+def test_reconnect_without_a_sync_pool_only_moves_the_generation(monkeypatch):
+    # Async-only processes never initialize the sync pool; the async pool follows the generation
+    manager = db_manager.DatabaseManager()
+    monkeypatch.setattr(manager, 'use_ssh', False)
+    monkeypatch.setattr(manager, '_build_connection_pool', lambda: pytest.fail('unexpected sync pool'))
+    generation = manager.generation
+    manager.reconnect()
+    assert manager.generation == generation + 1 and manager._connection_pool is None
+
+
+def test_cleanup_runs_shutdown_hooks_once(monkeypatch):
+    manager = db_manager.db_manager
+    monkeypatch.setattr(manager, 'use_ssh', False)
+    monkeypatch.setattr(manager, '_connection_pool', None)
+    calls = []
+    manager.register_shutdown_hook(lambda: calls.append(1))
+
+    manager.cleanup()
+    manager.cleanup()
+
+    assert calls == [1]
+
+
+def test_initialize_applies_explicit_settings(monkeypatch):
+    manager = db_manager.db_manager
+    for name in ('use_ssh', 'db_name', 'db_user', '_active'):
+        monkeypatch.setattr(manager, name, getattr(manager, name))
+    monkeypatch.setattr(manager, '_connection_pool', None)
+    monkeypatch.setattr(manager, 'create_connection_pool', lambda: setattr(manager, '_connection_pool', object()))
+
+    with pytest.raises(ValueError):
+        manager.initialize({'_connection_pool': None})
+    assert not manager.is_initialized
+
+    manager.initialize({'use_ssh': False, 'db_name': 'crawler', 'db_user': 'ingest'})
+    assert manager.is_initialized
+    assert (manager.db_name, manager.db_user) == ('crawler', 'ingest')
@@ -0,0 +1,64 @@
+import os
+import sys
+import logging
+import importlib.util
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('instrumentation', os.path.join(os.path.dirname(__file__), '..', 'database', 'instrumentation.py'))
+instrumentation = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(instrumentation)
+
+
+def test_fingerprint_collapses_values_in_lists_and_rows():
+    fingerprint = instrumentation.fingerprint
+    assert fingerprint("SELECT *  FROM videos\n WHERE video_id IN (%s, %s, %s) LIMIT 10") == \
+        "SELECT * FROM videos WHERE video_id IN (...) LIMIT ?"
+    assert fingerprint("INSERT INTO t (a, b) VALUES ('x', 1), ('y', 2), ('z', 3)") == \
+        "INSERT INTO t (a, b) VALUES (?, ?), ..."
+    assert fingerprint("UPDATE videos SET view_count = %(view_count)s WHERE video_id = %(video_id)s -- hot") == \
+        "UPDATE videos SET view_count = ? WHERE video_id = ?"
+
+
+class FakeCursor:
+    rowcount = 3
+
+    def execute(self, operation, params=()):
+        self.last = operation
+
+
+class FakeConnection:
+    def cursor(self):
+        return FakeCursor()
+
+    def commit(self):
+        pass
+
+
+def test_instrumented_connection_records_statements_commits_and_slow_queries(caplog):
+    stats = instrumentation.QueryStats(enabled=True, slow_query_ms=0.000001)
+    connection = instrumentation.InstrumentedConnection(FakeConnection(), stats)
+
+    cursor = connection.cursor()
+    with caplog.at_level(logging.WARNING, logger='database.slow_queries'):
+        cursor.execute("SELECT * FROM videos WHERE video_id = %s", ('a',))
+        cursor.execute("SELECT * FROM videos WHERE video_id = %s", ('b',))
+    connection.commit()
+
+    report = stats.get_stats()
+    summary = report['statements']["SELECT * FROM videos WHERE video_id = ?"]
+    assert (summary['count'], summary['rows']) == (2, 6)
+    assert report['commit']['count'] == 1
+    assert cursor.last.startswith('SELECT')
+    assert len([r for r in caplog.records if r.name == 'database.slow_queries']) == 2
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = instrumentation.LatencyHistogram()
+    for elapsed in [0.05, 0.3, 3, 3, 40, 40, 40, 40, 40, 20000]:
+        histogram.record(elapsed)
+    assert histogram.percentile(0.5) == 50
+    assert histogram.percentile(0.99) == 20000
+    assert histogram.summary()['count'] == 10
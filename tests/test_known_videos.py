@@ -0,0 +1,150 @@
+import os
+import sys
+import importlib.util
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('known_videos', os.path.join(os.path.dirname(__file__), '..', 'database', 'known_videos.py'))
+known_videos = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(known_videos)
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def execute(self, query, params=()):
+        self.queries.append((query, params))
+        self.pending = list(self.rows)
+
+    def fetchmany(self, size):
+        batch, self.pending = self.pending[:size], self.pending[size:]
+        return batch
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def video(video_id, view_count, updated_at=1):
+    return {'video_id': video_id, 'channel_id': 'UC1', 'view_count': view_count,
+            'view_count_raw': f'{view_count} views', 'updated_at': updated_at}
+
+
+def test_index_skips_only_unchanged_videos(monkeypatch):
+    rows = [video('dQw4w9WgXcQ', 10), video('9bZkp7q19f0', 20, updated_at=5), video('kJQP7kiw5Fk', 30)]
+    cursor = FakeCursor(rows)
+    monkeypatch.setattr(known_videos, 'get_db_cursor', lambda: cursor)
+    monkeypatch.setattr(known_videos, 'LOAD_BATCH_SIZE', 2)
+
+    index = known_videos.KnownVideoIndex()
+    index.load()
+    assert len(index) == 3
+
+    crawled = [video('dQw4w9WgXcQ', 10), video('9bZkp7q19f0', 21), video('JGwWNGJdvx8', 1), video('not-an-id', 1)]
+    changed = index.filter_changed(crawled)
+    assert [v['video_id'] for v in changed] == ['9bZkp7q19f0', 'JGwWNGJdvx8', 'not-an-id']
+    assert index.stats == {'skipped': 1, 'passed': 3}
+
+    index.record(changed)
+    assert len(index) == 4
+    assert index.filter_changed(crawled) == [crawled[-1]]
+
+    # Refresh only asks for rows updated since the newest updated_at seen
+    cursor.rows = [video('kJQP7kiw5Fk', 31, updated_at=6)]
+    index.refresh()
+    assert cursor.queries[-1][1] == (5,)
+    assert not index.is_unchanged(video('kJQP7kiw5Fk', 30))
+    assert index.is_unchanged(video('kJQP7kiw5Fk', 31))
+
+
+def test_forgotten_videos_are_no_longer_skipped(monkeypatch):
+    cursor = FakeCursor([video('dQw4w9WgXcQ', 10)])
+    monkeypatch.setattr(known_videos, 'get_db_cursor', lambda: cursor)
+
+    index = known_videos.KnownVideoIndex()
+    index.load()
+    index.forget(['dQw4w9WgXcQ'])
+    assert len(index) == 0
+    assert index.filter_changed([video('dQw4w9WgXcQ', 10)]) == [video('dQw4w9WgXcQ', 10)]
+
+
+def test_writes_during_a_load_survive_the_swap(monkeypatch):
+    index = known_videos.KnownVideoIndex()
+
+    class RecordingCursor(FakeCursor):
+        def fetchmany(self, size):
+            batch = super().fetchmany(size)
+            if batch:
+                # Another thread writes newer state while the snapshot is being read
+                index.record([video('dQw4w9WgXcQ', 11)])
+                index.record([video('9bZkp7q19f0', 1)])
+            return batch
+
+    cursor = RecordingCursor([video('dQw4w9WgXcQ', 10)])
+    monkeypatch.setattr(known_videos, 'get_db_cursor', lambda: cursor)
+    index.load()
+
+    assert len(index) == 2
+    assert index.is_unchanged(video('dQw4w9WgXcQ', 11))
+    assert index.is_unchanged(video('9bZkp7q19f0', 1))
+
+
+def test_memory_stays_near_eight_bytes_per_video():
+    index = known_videos.KnownVideoIndex()
+    index.record({'video_id': known_videos.unpack_video_id(n * 0x9E3779B97F4A7C15 % 2 ** 64), 'view_count': n}
+                 for n in range(200000))
+    assert len(index) == 200000
+    # Fixed overhead: the bucket table and the per-bucket arrays
+    assert index.memory_bytes() < 200000 * 8 + 70000 * 72
+
+
+def test_diff_upsert_skips_videos_the_index_knows(monkeypatch):
+    video_repository = importlib.import_module('database.video_repository')
+
+    class DiffCursor(FakeCursor):
+        def fetchall(self):
+            return []
+
+        def executemany(self, query, rows):
+            self.queries.append((query, list(rows)))
+
+    index = known_videos.KnownVideoIndex()
+    index.record([video('dQw4w9WgXcQ', 10)])
+    index._last_refresh = float('inf')
+    cursor = DiffCursor([])
+    monkeypatch.setattr(video_repository, 'get_db_cursor', lambda: cursor)
+    monkeypatch.setattr(video_repository, 'known_videos_enabled', lambda: True)
+    monkeypatch.setattr(video_repository, 'get_known_videos', lambda: index)
+
+    counts = video_repository.VideoRepository.upsert_videos_diff(
+        [video('dQw4w9WgXcQ', 10), video('9bZkp7q19f0', 5)]
+    )
+
+    assert counts == {'new': 1, 'changed': 0, 'unchanged': 1}
+    lookup, upsert = cursor.queries
+    assert len(lookup[1]) == 1
+    assert [row['video_id'] for row in upsert[1]] == [video_repository.encode_video_id('9bZkp7q19f0')]
+    assert index.is_unchanged(video('9bZkp7q19f0', 5))
+
+
+def test_periodic_reload_drops_videos_deleted_elsewhere(monkeypatch):
+    cursor = FakeCursor([video('dQw4w9WgXcQ', 10), video('9bZkp7q19f0', 5)])
+    monkeypatch.setattr(known_videos, 'get_db_cursor', lambda: cursor)
+
+    index = known_videos.KnownVideoIndex(reload_every=2)
+    index.load()
+    # Another process deletes a video: incremental refreshes cannot see it
+    cursor.rows = [video('dQw4w9WgXcQ', 10)]
+    index.refresh()
+    index.refresh()
+    assert len(index) == 2
+    index.refresh()
+    assert len(index) == 1
+    assert cursor.queries[-1] == ("SELECT video_id, view_count, updated_at FROM videos", ())
+    assert not index.is_unchanged(video('9bZkp7q19f0', 5))
@@ -0,0 +1,146 @@
+import os
+import sys
+import importlib.util
+
+import pytest
+from mysql.connector import Error
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('migrations', os.path.join(os.path.dirname(__file__), '..', 'database', 'migrations.py'))
+migrations = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(migrations)
+
+
+class FakeCursor:
+    """Records statements; fails statements containing a configured fragment with an errno"""
+
+    def __init__(self, failures=None, tables=None):
+        self.failures = failures or {}
+        self.tables = tables
+        self.executed = []
+        self.applied = []
+        self._rows = []
+
+    def execute(self, query, params=None):
+        if 'information_schema.TABLES' in query:
+            self._rows = [{'name': table} for table in params if self.tables is None or table in self.tables]
+            return
+        for fragment, errno in self.failures.items():
+            if fragment in query:
+                raise Error(msg=f'failed: {fragment}', errno=errno)
+        self.executed.append(query)
+        if query.startswith('INSERT INTO schema_migrations'):
+            self.applied.append(params[0])
+        self._rows = [{'version': version} for version in self.applied]
+
+    def fetchall(self):
+        return self._rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_apply_all_runs_pending_in_order_and_records_versions(monkeypatch):
+    cursor = FakeCursor()
+    cursor.applied = [1]
+    monkeypatch.setattr(migrations, 'get_db_cursor', lambda: cursor)
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [
+        migrations.Migration(3, 'third', ['ALTER TABLE c ADD INDEX i (x)']),
+        migrations.Migration(1, 'first', ['ALTER TABLE a ADD INDEX i (x)']),
+        migrations.Migration(2, 'second', ['ALTER TABLE b ADD INDEX i (x)']),
+    ])
+
+    assert migrations.apply_migrations(target=2) == [2]
+    assert migrations.apply_migrations() == [3]
+    assert cursor.applied == [1, 2, 3]
+    assert not any('TABLE a' in query for query in cursor.executed)
+
+
+def test_existing_indexes_are_skipped_and_unsupported_online_ddl_falls_back(monkeypatch):
+    online = f"ALTER TABLE videos ADD INDEX idx_b (b), {migrations.ONLINE_DDL}"
+    cursor = FakeCursor(failures={'idx_a': 1061, migrations.ONLINE_DDL: 1846})
+    monkeypatch.setattr(migrations, 'get_db_cursor', lambda: cursor)
+
+    migrations.MigrationRunner.apply(migrations.Migration(7, 'indexes', [
+        f"ALTER TABLE videos ADD INDEX idx_a (a), {migrations.ONLINE_DDL}",
+        online,
+    ]))
+
+    assert 'ALTER TABLE videos ADD INDEX idx_b (b)' in cursor.executed
+    assert cursor.applied == [7]
+
+
+def test_migration_on_a_missing_table_stays_pending(monkeypatch):
+    cursor = FakeCursor(tables={'videos'})
+    monkeypatch.setattr(migrations, 'get_db_cursor', lambda: cursor)
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [
+        migrations.Migration(1, 'videos', ['ALTER TABLE videos ADD INDEX i (x)'], ('videos',)),
+        migrations.Migration(2, 'transcripts', ['ALTER TABLE transcripts ADD INDEX i (x)'], ('transcripts',)),
+    ])
+
+    assert migrations.apply_migrations() == [1]
+    assert not any('transcripts' in query for query in cursor.executed)
+
+    # Once the table exists the migration runs
+    cursor.tables = {'videos', 'transcripts'}
+    assert migrations.apply_migrations() == [2]
+    assert cursor.applied == [1, 2]
+
+
+def test_missing_table_errors_are_not_swallowed(monkeypatch):
+    cursor = FakeCursor(failures={'ADD INDEX': 1146})
+    monkeypatch.setattr(migrations, 'get_db_cursor', lambda: cursor)
+
+    with pytest.raises(Error):
+        migrations.MigrationRunner.apply(migrations.Migration(8, 'typo', ['ALTER TABLE vidoes ADD INDEX i (x)']))
+    assert cursor.applied == []
+
+
+def test_language_cache_column_type_is_read_when_the_migration_runs(monkeypatch):
+    cursor = FakeCursor()
+    monkeypatch.setattr(migrations, 'get_db_cursor', lambda: cursor)
+    monkeypatch.setattr(migrations, 'video_id_column_type', lambda: 'BINARY(8)')
+    migration = next(m for m in migrations.MIGRATIONS if m.name == 'transcript_language_cache')
+
+    migrations.MigrationRunner.apply(migration)
+
+    assert 'video_id BINARY(8) PRIMARY KEY' in cursor.executed[0]
+
+
+def test_binary_swap_migrates_the_change_log_outbox(monkeypatch):
+    video_id_migration = importlib.import_module('database.video_id_migration')
+    executed = []
+
+    class Cursor:
+        rowcount = 1
+
+        def execute(self, query, params=None):
+            executed.append((' '.join(query.split()), params))
+
+        def fetchall(self):
+            return [('change_events',)]
+
+        def fetchone(self):
+            # MAX(seq): the copy step reached seq 10 and two events were appended since
+            return {'seq': 10 if 'change_events_bin' in executed[-1][0] else 12}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(video_id_migration, 'get_db_cursor', Cursor)
+
+    video_id_migration.swap_tables('2024-05-01 12:00:00')
+    queries = [query for query, _ in executed]
+    tail = next(params for query, params in executed if query.startswith('INSERT IGNORE INTO change_events_bin'))
+    assert tail == (10, 5010)
+    rename = next(query for query in queries if query.startswith('RENAME TABLE'))
+    assert 'change_events TO change_events_varchar_old' in rename and 'change_events_bin TO change_events' in rename
@@ -0,0 +1,103 @@
+import os
+import sys
+import importlib.util
+from contextlib import contextmanager
+from datetime import datetime
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('parquet_export', os.path.join(os.path.dirname(__file__), '..', 'database', 'parquet_export.py'))
+parquet_export = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(parquet_export)
+
+
+def test_flatten_transcript_and_partition_paths():
+    row = {
+        'video_id': 'dQw4w9WgXcQ', 'channel_id': 'UC/x', 'published_time': datetime(2024, 5, 3),
+        'transcript_raw': '[{"text": "hi", "start": 0.0, "duration": 1.5}, {"text": "there", "start": 1.5, "duration": 2.0}]',
+        'fetched_at': datetime(2024, 5, 4), 'updated_at': datetime(2024, 5, 4),
+    }
+    segments = parquet_export.flatten_transcript(row)
+    assert [(s['segment_index'], s['text'], s['start']) for s in segments] == [(0, 'hi', 0.0), (1, 'there', 1.5)]
+    assert parquet_export.flatten_transcript(dict(row, transcript_raw='null')) == []
+
+    assert parquet_export.partition_path(row, 'month') == 'month=2024-05'
+    assert parquet_export.partition_path(row, 'channel') == 'channel_id=UC_x'
+    assert parquet_export.partition_path(dict(row, published_time=None), 'month') == 'month=unknown'
+
+
+def test_iter_pages_resumes_after_last_key(monkeypatch):
+    rows = [
+        {'video_id': f'vid{i}', 'updated_at': datetime(2024, 5, 1, 0, 0, i // 2)}
+        for i in range(5)
+    ]
+    calls = []
+
+    class FakeCursor:
+        def execute(self, query, params):
+            calls.append(params)
+            until, updated, _, video_id, limit = params
+            self.rows = [
+                dict(row) for row in rows
+                if (row['updated_at'], row['video_id']) > (updated, video_id) and row['updated_at'] < until
+            ][:limit]
+
+        def fetchall(self):
+            return self.rows
+
+    @contextmanager
+    def fake_cursor():
+        yield FakeCursor()
+
+    monkeypatch.setattr(parquet_export, 'get_db_cursor', fake_cursor)
+
+    until = datetime(2024, 5, 1, 0, 0, 2)
+    pages = list(parquet_export.iter_pages('query', parquet_export.EPOCH, until, 2))
+    assert [[row['video_id'] for row in page] for page in pages] == [['vid0', 'vid1'], ['vid2', 'vid3']]
+    assert calls[1][1:4] == (rows[1]['updated_at'], rows[1]['updated_at'], 'vid1')
+
+
+def test_transcript_pages_hydrate_archived_and_deduplicated_rows(tmp_path, monkeypatch):
+    transcript_archive = importlib.import_module('database.transcript_archive')
+    archive = transcript_archive.TranscriptArchive(str(tmp_path))
+    fetched_at = datetime(2024, 1, 2)
+    archive.write_shard([{
+        'video_id': 'dQw4w9WgXcQ', 'transcript_raw': '[{"text": "cold", "start": 0.0, "duration": 1.0}]',
+        'status': 'fetched', 'error_message': None,
+        'fetched_at': fetched_at, 'created_at': fetched_at, 'updated_at': fetched_at,
+    }])
+    monkeypatch.setattr(transcript_archive, 'get_transcript_archive', lambda: archive)
+
+    queried = []
+
+    class FakeCursor:
+        def execute(self, query, params):
+            queried.append(params)
+
+        def fetchall(self):
+            return [{'video_id': '9bZkp7q19f0', 'transcript_raw': '[{"text": "shared"}]'}]
+
+    @contextmanager
+    def fake_cursor():
+        yield FakeCursor()
+
+    monkeypatch.setattr(parquet_export, 'get_db_cursor', fake_cursor)
+
+    page = [
+        {'video_id': 'dQw4w9WgXcQ', 'channel_id': 'UC1', 'published_time': None, 'transcript_raw': None,
+         'status': 'archived', 'fetched_at': None, 'updated_at': datetime(2024, 6, 1)},
+        {'video_id': '9bZkp7q19f0', 'channel_id': 'UC1', 'published_time': None, 'transcript_raw': None,
+         'status': 'fetched', 'fetched_at': fetched_at, 'updated_at': datetime(2024, 6, 1)},
+    ]
+    parquet_export.resolve_deduplicated(page)
+    parquet_export.resolve_archived(page)
+
+    # Only the deduplicated row is looked up in transcript_payloads
+    assert len(queried) == 1 and len(queried[0]) == 1
+    archived, deduplicated = (parquet_export.flatten_transcript(row) for row in page)
+    assert [s['text'] for s in archived] == ['cold'] and archived[0]['fetched_at'] == fetched_at
+    assert [s['text'] for s in deduplicated] == ['shared']
+    assert "'archived'" in parquet_export.TRANSCRIPTS_PAGE_QUERY
+    archive.close()
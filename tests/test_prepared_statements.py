@@ -0,0 +1,107 @@
+import os
+import importlib.util
+
+
+# Dynamically import the modules to ensure tests run from repo root
+def load(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(os.path.dirname(__file__), '..', 'database', f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+prepared_statements = load('prepared_statements')
+connection_pool = load('connection_pool')
+
+
+class FakeCursor:
+    def __init__(self, prepared):
+        self.prepared = prepared
+        self.executed = []
+        self.closed = False
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, operation, params=()):
+        self.executed.append((operation, params))
+        self.description = [('video_id',)] if operation.startswith('SELECT') else None
+        self.rowcount = 1
+
+    def executemany(self, operation, seq_params):
+        self.executed.append((operation, list(seq_params)))
+        self.description = None
+        self.rowcount = len(self.executed[-1][1])
+
+    def fetchall(self):
+        return [{'video_id': self.executed[-1][1][0]}]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursors = []
+
+    def is_connected(self):
+        return True
+
+    def cursor(self, prepared=False, dictionary=False):
+        cursor = FakeCursor(prepared)
+        self.cursors.append(cursor)
+        return cursor
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_to_positional_orders_names_and_caches():
+    query = "UPDATE videos SET view_count = %(view_count)s WHERE video_id = %(video_id)s"
+    positional, names = prepared_statements.to_positional(query)
+    assert positional == "UPDATE videos SET view_count = %s WHERE video_id = %s"
+    assert names == ('view_count', 'video_id')
+    # Same string object again, so mysql-connector keeps the statement prepared
+    assert prepared_statements.to_positional(query)[0] is positional
+
+
+def test_statements_are_prepared_once_per_connection():
+    cnx = FakeConnection()
+    pool = connection_pool.BlockingConnectionPool(lambda: cnx, pool_size=1, max_prepared=2)
+
+    for video_id in ('a', 'b'):
+        conn = pool.get_connection()
+        cursor = prepared_statements.PreparedStatementCursor(conn)
+        cursor.execute("SELECT * FROM videos WHERE video_id = %(video_id)s", {'video_id': video_id})
+        assert cursor.fetchone() == {'video_id': video_id}
+        assert cursor.fetchone() is None
+        cursor.close()
+        conn.close()
+
+    assert len(cnx.cursors) == 1 and cnx.cursors[0].prepared
+    assert [params for _, params in cnx.cursors[0].executed] == [('a',), ('b',)]
+    assert pool.get_stats()['statements_prepared'] == 1
+
+    # Least recently used statement is closed once max_prepared is exceeded
+    conn = pool.get_connection()
+    cursor = prepared_statements.PreparedStatementCursor(conn)
+    cursor.execute("SELECT 1 FROM transcripts WHERE video_id = %s", ('a',))
+    cursor.execute("SELECT 2 FROM transcripts WHERE video_id = %s", ('a',))
+    assert cnx.cursors[0].closed
+    conn.close()
+
+
+def test_executemany_uses_text_cursor():
+    cnx = FakeConnection()
+    pool = connection_pool.BlockingConnectionPool(lambda: cnx, pool_size=1)
+    conn = pool.get_connection()
+    cursor = prepared_statements.PreparedStatementCursor(conn)
+    cursor.executemany("INSERT INTO videos (video_id) VALUES (%s)", [('a',), ('b',)])
+    assert cursor.rowcount == 2
+    assert not cnx.cursors[0].prepared
+    cursor.close()
+    assert cnx.cursors[0].closed
+    conn.close()
@@ -0,0 +1,116 @@
+import os
+import threading
+import importlib.util
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('proxy_pool', os.path.join(os.path.dirname(__file__), '..', 'api', 'proxy_pool.py'))
+proxy_pool = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(proxy_pool)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_pool(**kwargs):
+    clock = FakeClock()
+    pool = proxy_pool.ProxyPool(['http://a:1', 'http://user:pw@b:2', 'http://c:3'], cooldown=10,
+                                clock=clock, sleep=clock.sleep, **kwargs)
+    return pool, clock
+
+
+def test_throttled_endpoints_cool_down_and_least_recent_failure_wins():
+    pool, clock = make_pool()
+    a, b, c = pool.endpoints
+
+    endpoint = pool.acquire()
+    assert endpoint is a
+    pool.report(a, 429)
+    clock.now += 1
+    endpoint = pool.acquire()
+    pool.report(endpoint, error=ConnectionError('reset'))
+    assert endpoint is b
+    # a is cooling down, b failed most recently
+    endpoint = pool.acquire()
+    assert endpoint is c
+    pool.report(c)
+
+    clock.now += 10
+    # c has never failed; once it is throttled, a (back from cooldown) failed before b did
+    endpoint = pool.acquire()
+    assert endpoint is c
+    pool.report(c, 429)
+    endpoint = pool.acquire()
+    assert endpoint is a
+    pool.report(a, 429)
+    assert pool.get_stats()[0]['cooling_down_for'] == 20.0  # second consecutive 429 doubles the cooldown
+    assert pool.get_stats()[1]['endpoint'] == 'b:2'
+
+
+def test_sticky_keys_stay_until_their_endpoint_cools_down():
+    pool, clock = make_pool()
+    first = pool.acquire(sticky_key='video1')
+    pool.report(first)
+    other = pool.acquire()
+    pool.report(other, error=ConnectionError('reset'))
+    assert pool.acquire(sticky_key='video1') is first
+    pool.report(first, 429)
+    moved = pool.acquire(sticky_key='video1')
+    assert moved is not first
+    pool.report(moved)
+    assert pool.acquire(sticky_key='video1') is moved
+
+
+def test_waits_when_every_endpoint_is_cooling_down():
+    pool, clock = make_pool()
+    for endpoint in pool.endpoints:
+        pool.report(pool.acquire(), 429)
+        clock.now += 1
+    endpoint = pool.acquire()
+    assert clock.slept == [7.0]
+    assert endpoint is pool.endpoints[0]
+
+
+def start_stand_in_proxy(status, body):
+    """Local HTTP server answering every proxied request with a fixed status"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_request_moves_to_another_proxy_after_429():
+    throttled, throttled_url = start_stand_in_proxy(429, b'slow down')
+    healthy, healthy_url = start_stand_in_proxy(200, b'ok')
+    try:
+        pool = proxy_pool.ProxyPool([throttled_url, healthy_url], cooldown=60)
+        response = pool.request('GET', 'http://example.invalid/browse', sticky_key='UC1', timeout=5)
+        assert response.status_code == 200 and response.text == 'ok'
+        stats = pool.get_stats()
+        assert stats[0]['throttled'] == 1 and stats[0]['cooling_down_for'] > 0
+        # The sticky key now points at the healthy proxy
+        assert pool.request('GET', 'http://example.invalid/browse', sticky_key='UC1', timeout=5).text == 'ok'
+        assert pool.get_stats()[1]['requests'] == 2
+    finally:
+        throttled.shutdown()
+        healthy.shutdown()
@@ -23,10 +23,21 @@ def test_fetch_transcript_for_video_monkeypatched(monkeypatch):
         def to_raw_data(self):
             return [{'text': s.text, 'start': s.start, 'duration': s.duration} for s in self._snippets]
 
-    class FakeApi:
-        def fetch(self, video_id, languages=None):
+    class FakeTranscript:
+        language_code = 'en'
+        language = 'English'
+        is_generated = True
+
+        def fetch(self):
             return FakeFetchedTranscript()
 
+    class FakeApi:
+        def __init__(self, http_client=None):
+            self.http_client = http_client
+
+        def list(self, video_id):
+            return [FakeTranscript()]
+
     monkeypatch.setattr(scrape_transcripts, 'YouTubeTranscriptApi', FakeApi)
 
     res = scrape_transcripts.fetch_transcript_for_video('FAKEID')
@@ -35,3 +46,71 @@ def test_fetch_transcript_for_video_monkeypatched(monkeypatch):
     assert res['raw'][0]['text'] == 'hello'
     assert res['raw'][1]['text'] == 'world'
     assert res['error'] is None
+
+
+def test_select_language_prefers_order_then_manual():
+    available = [
+        {'language_code': 'de', 'is_generated': False},
+        {'language_code': 'en', 'is_generated': True},
+        {'language_code': 'en', 'is_generated': False},
+    ]
+    assert scrape_transcripts.select_language(available, ['fr', 'en', 'de']) == {'language_code': 'en', 'is_generated': False}
+    assert scrape_transcripts.select_language(available, ['fr']) is None
+    assert scrape_transcripts.select_language(available)['language_code'] == 'en'
+
+
+def test_cached_listing_answers_missing_language_without_network(monkeypatch):
+    class NoNetworkApi:
+        def __init__(self, http_client=None):
+            pass
+
+        def list(self, video_id):
+            raise AssertionError('network call')
+
+    class FakeCache:
+        saved = None
+
+        def get_transcript_languages(self, video_id, max_age_hours):
+            return [{'language_code': 'de', 'language': 'German', 'is_generated': True, 'is_translatable': False}]
+
+        def save_transcript_languages(self, video_id, languages):
+            self.saved = languages
+
+    monkeypatch.setattr(scrape_transcripts, 'YouTubeTranscriptApi', NoNetworkApi)
+
+    cache = FakeCache()
+    res = scrape_transcripts.fetch_transcript_for_video('FAKEID', ['en'], language_cache=cache)
+    assert res['status'] == 'empty'
+    assert 'de (generated)' in res['error']
+    assert cache.saved is None
+
+
+def test_disabled_transcripts_fail_the_same_way_from_the_cache(monkeypatch):
+    class DisabledApi:
+        calls = 0
+
+        def __init__(self, http_client=None):
+            pass
+
+        def list(self, video_id):
+            DisabledApi.calls += 1
+            raise scrape_transcripts.TranscriptsDisabled(video_id)
+
+    class FakeCache:
+        saved = None
+
+        def get_transcript_languages(self, video_id, max_age_hours):
+            return self.saved
+
+        def save_transcript_languages(self, video_id, languages):
+            self.saved = languages
+
+    monkeypatch.setattr(scrape_transcripts, 'YouTubeTranscriptApi', DisabledApi)
+
+    cache = FakeCache()
+    live = scrape_transcripts.fetch_transcript_for_video('FAKEID', ['en'], language_cache=cache)
+    cached = scrape_transcripts.fetch_transcript_for_video('FAKEID', ['en'], language_cache=cache)
+
+    assert DisabledApi.calls == 1
+    assert live['status'] == 'failed' and live['error']
+    assert cached == live
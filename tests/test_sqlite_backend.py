@@ -0,0 +1,100 @@
+import os
+import importlib.util
+
+import pytest
+
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('sqlite_backend', os.path.join(os.path.dirname(__file__), '..', 'database', 'sqlite_backend.py'))
+sqlite_backend = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sqlite_backend)
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    db = sqlite_backend.SQLiteDatabase(str(tmp_path / 'crawler.sqlite3'))
+    monkeypatch.setattr(sqlite_backend, 'sqlite_db', db)
+    db.initialize()
+    yield db
+    db.cleanup()
+
+
+def make_video(video_id, view_count=10):
+    return {
+        'video_id': video_id,
+        'channel_id': 'UCFOO',
+        'published_time': '2024-01-01 00:00:00',
+        'view_count': view_count,
+        'published_time_raw': '1 year ago',
+        'view_count_raw': f'{view_count} views',
+    }
+
+
+def test_uses_wal_journal(sqlite_db):
+    mode = sqlite_db.get_connection().execute('PRAGMA journal_mode').fetchone()[0]
+    assert mode == 'wal'
+
+
+def test_video_and_transcript_round_trip(sqlite_db):
+    videos = sqlite_backend.SQLiteVideoRepository
+    transcripts = sqlite_backend.SQLiteTranscriptRepository
+
+    assert videos.upsert_videos_batch([make_video('A'), make_video('B')]) == 2
+    videos.upsert_video(make_video('A', view_count=99))
+
+    assert videos.get_video('A')['view_count'] == 99
+    assert videos.get_video_count() == 2
+    assert videos.insert_video(make_video('A')) is False
+
+    transcripts.upsert_transcript('A', [{'text': 'hello', 'start': 0, 'duration': 1}])
+    assert transcripts.get_transcript('A')['status'] == 'fetched'
+    assert transcripts.get_videos_without_transcripts() == ['B']
+
+
+def test_sync_pushes_dirty_rows_once(sqlite_db, monkeypatch):
+    import database.video_repository as video_repository
+    import database.transcript_repository as transcript_repository
+
+    pushed = {'videos': [], 'transcripts': []}
+    monkeypatch.setattr(video_repository.VideoRepository, 'upsert_videos_batch', staticmethod(lambda rows: pushed['videos'].extend(rows) or len(rows)))
+    monkeypatch.setattr(transcript_repository.TranscriptRepository, 'upsert_transcripts_batch', staticmethod(lambda rows: pushed['transcripts'].extend(rows) or len(rows)))
+
+    sqlite_backend.SQLiteVideoRepository.upsert_videos_batch([make_video('A'), make_video('B')])
+    sqlite_backend.SQLiteTranscriptRepository.upsert_transcript('A', [{'text': 'hi'}])
+
+    assert sqlite_backend.sync_to_mysql(batch_size=1) == {'videos': 2, 'transcripts': 1}
+    assert pushed['transcripts'][0]['transcript_raw'] == [{'text': 'hi'}]
+    assert sqlite_backend.sync_to_mysql() == {'videos': 0, 'transcripts': 0}
+
+
+def test_diff_upsert_writes_only_new_and_changed_videos(sqlite_db):
+    videos = sqlite_backend.SQLiteVideoRepository
+    videos.upsert_videos_batch([make_video('vid1'), make_video('vid2')])
+    sqlite_backend._mark_clean('videos', [{'video_id': 'vid1', 'dirty': 1}, {'video_id': 'vid2', 'dirty': 1}])
+
+    stats = videos.upsert_videos_diff([make_video('vid1'), make_video('vid2', 20), make_video('vid3')])
+
+    assert stats == {'new': 1, 'changed': 1, 'unchanged': 1}
+    with sqlite_db.get_cursor() as cursor:
+        cursor.execute("SELECT video_id FROM videos WHERE dirty = 1 ORDER BY video_id")
+        assert [row['video_id'] for row in cursor.fetchall()] == ['vid2', 'vid3']
+
+
+def test_rows_rewritten_during_a_sync_stay_dirty(sqlite_db, monkeypatch):
+    import database.video_repository as video_repository
+
+    pushed = []
+
+    def push(rows):
+        pushed.extend((row['video_id'], row['view_count']) for row in rows)
+        if len(pushed) == 1:
+            # A crawler rewrites the row while it is being pushed
+            sqlite_backend.SQLiteVideoRepository.upsert_video(make_video('A', view_count=50))
+        return len(rows)
+
+    monkeypatch.setattr(video_repository.VideoRepository, 'upsert_videos_batch', staticmethod(push))
+    sqlite_backend.SQLiteVideoRepository.upsert_video(make_video('A'))
+
+    assert sqlite_backend.sync_to_mysql()['videos'] == 2
+    assert pushed == [('A', 10), ('A', 50)]
+    assert sqlite_backend.sync_to_mysql()['videos'] == 0
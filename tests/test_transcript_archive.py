@@ -0,0 +1,91 @@
+import os
+import sys
+import importlib.util
+from datetime import datetime
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('transcript_archive', os.path.join(os.path.dirname(__file__), '..', 'database', 'transcript_archive.py'))
+transcript_archive = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(transcript_archive)
+
+
+def transcript(video_id, text, fetched_at=datetime(2024, 1, 2, 3, 4, 5)):
+    return {
+        'video_id': video_id, 'transcript_raw': f'[{{"text": "{text}", "start": 0.0, "duration": 1.0}}]',
+        'status': 'fetched', 'error_message': None,
+        'fetched_at': fetched_at, 'created_at': fetched_at, 'updated_at': fetched_at,
+    }
+
+
+def test_shards_are_searchable_and_newest_wins(tmp_path):
+    archive = transcript_archive.TranscriptArchive(str(tmp_path))
+    archive.write_shard([transcript(f'video{i:06d}', f'old {i}') for i in range(500)])
+    assert archive.write_shard([]) is None
+
+    record = archive.get('video000123')
+    assert record['transcript_raw'] == '[{"text": "old 123", "start": 0.0, "duration": 1.0}]'
+    assert record['fetched_at'] == datetime(2024, 1, 2, 3, 4, 5)
+    assert archive.get('missing') is None
+
+    # A later shard holding a re-archived transcript takes precedence
+    archive.write_shard([transcript('video000123', 'new')])
+    assert 'new' in archive.get('video000123')['transcript_raw']
+    assert 'old 7' in archive.get('video000007')['transcript_raw']
+    assert sorted(os.listdir(tmp_path)) == ['shard-000001.dat', 'shard-000001.idx', 'shard-000002.dat', 'shard-000002.idx']
+    archive.close()
+
+
+def test_load_archived_fills_stub_rows(tmp_path, monkeypatch):
+    archive = transcript_archive.TranscriptArchive(str(tmp_path))
+    archive.write_shard([transcript('dQw4w9WgXcQ', 'hello')])
+    monkeypatch.setattr(transcript_archive, 'get_transcript_archive', lambda: archive)
+
+    stub = {'video_id': 'dQw4w9WgXcQ', 'transcript_raw': None, 'status': 'archived', 'updated_at': datetime(2024, 6, 1)}
+    row = transcript_archive.load_archived(stub)
+    assert row['status'] == 'fetched' and 'hello' in row['transcript_raw']
+    assert row['updated_at'] == datetime(2024, 6, 1)
+
+    hot = {'video_id': 'x', 'transcript_raw': '[]', 'status': 'fetched'}
+    assert transcript_archive.load_archived(hot) is hot
+    assert transcript_archive.load_archived(None) is None
+    archive.close()
+
+
+def test_deduplicated_transcripts_are_archived_with_their_payload(tmp_path, monkeypatch):
+    executed = []
+    # The candidates query resolves payload_hash rows through transcript_payloads
+    page = [transcript('dedupedVid1', 'shared payload')]
+
+    class Cursor:
+        def execute(self, query, params=None):
+            executed.append((' '.join(query.split()), params))
+
+        def fetchone(self):
+            return {'now': datetime(2024, 6, 1), 'cutoff': datetime(2024, 5, 1)}
+
+        def fetchall(self):
+            rows = list(page)
+            page.clear()
+            return rows
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(transcript_archive, 'get_db_cursor', Cursor)
+    archive = transcript_archive.TranscriptArchive(str(tmp_path))
+
+    assert transcript_archive.archive_transcripts(30, archive=archive) == {'archived': 1, 'shards': 1}
+    assert 'shared payload' in archive.get('dedupedVid1')['transcript_raw']
+    candidates = next(query for query, _ in executed if query.startswith('SELECT t.video_id'))
+    assert 'LEFT JOIN transcript_payloads p ON p.payload_hash = t.payload_hash' in candidates
+    assert 'COALESCE(t.transcript_raw, p.transcript_raw)' in candidates
+    stub = next(query for query, _ in executed if query.startswith('UPDATE transcripts'))
+    # Dropping the hash lets purge_orphaned_payloads() free the payload
+    assert 'payload_hash = NULL' in stub
+    archive.close()
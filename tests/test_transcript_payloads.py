@@ -0,0 +1,71 @@
+import os
+import sys
+import importlib.util
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('transcript_payloads', os.path.join(os.path.dirname(__file__), '..', 'database', 'transcript_payloads.py'))
+transcript_payloads = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(transcript_payloads)
+
+
+class FakeCursor:
+    """Answers the transcripts/transcript_payloads lookups from in-memory tables"""
+
+    def __init__(self, transcripts, payloads):
+        self.transcripts = transcripts
+        self.payloads = payloads
+        self.inserted = []
+
+    def execute(self, query, params):
+        if 'FROM transcripts ' in query:
+            self.rows = [dict(self.transcripts[video_id], video_id=video_id) for video_id in params if video_id in self.transcripts]
+        else:
+            self.rows = [
+                {'payload_hash': bytearray(digest), 'transcript_raw': self.payloads[digest]}
+                for digest in params if digest in self.payloads
+            ]
+
+    def fetchall(self):
+        return self.rows
+
+    def executemany(self, query, rows):
+        self.inserted.extend(rows)
+
+
+def params(video_id, raw, status='fetched'):
+    return {'video_id': video_id, 'transcript_raw': raw, 'status': status, 'error_message': None}
+
+
+def test_dedup_skips_unchanged_and_stores_each_payload_once():
+    shared = '[{"text": "same"}]'
+    shared_hash = transcript_payloads.payload_hash(shared)
+    cursor = FakeCursor(
+        transcripts={'a': {'payload_hash': shared_hash, 'status': 'fetched'}},
+        payloads={shared_hash: shared},
+    )
+    rows = transcript_payloads.dedup_transcript_rows(cursor, [
+        params('a', shared),                   # unchanged: skipped
+        params('b', shared),                   # re-upload with identical payload: payload already stored
+        params('c', '[{"text": "new"}]'),
+        params('d', '[{"text": "new"}]'),      # same new payload: stored once
+        params('e', None, status='error'),
+    ])
+
+    assert [row['video_id'] for row in rows] == ['b', 'c', 'd', 'e']
+    assert all(row['transcript_raw'] is None for row in rows)
+    assert rows[0]['payload_hash'] == shared_hash and rows[3]['payload_hash'] is None
+    new_hash = transcript_payloads.payload_hash('[{"text": "new"}]')
+    assert cursor.inserted == [(new_hash, '[{"text": "new"}]', 17)]
+
+
+def test_resolve_payloads_fills_only_deduplicated_rows():
+    digest = transcript_payloads.payload_hash('[]')
+    cursor = FakeCursor(transcripts={}, payloads={digest: '[]'})
+    deduplicated = {'video_id': 'a', 'transcript_raw': None, 'payload_hash': bytearray(digest)}
+    inline = {'video_id': 'b', 'transcript_raw': '[{"text": "x"}]', 'payload_hash': None}
+    transcript_payloads.resolve_payloads(cursor, [deduplicated, inline, None])
+    assert deduplicated['transcript_raw'] == '[]'
+    assert inline['transcript_raw'] == '[{"text": "x"}]'
@@ -0,0 +1,44 @@
+import os
+import re
+import importlib.util
+
+import pytest
+
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('video_ids', os.path.join(os.path.dirname(__file__), '..', 'database', 'video_ids.py'))
+video_ids = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(video_ids)
+
+
+def test_pack_video_id_round_trips_and_rejects_non_canonical_ids():
+    packed = video_ids.pack_video_id('dQw4w9WgXcQ')
+    assert 0 <= packed < 2 ** 64
+    assert video_ids.unpack_video_id(packed) == 'dQw4w9WgXcQ'
+    assert video_ids.pack_video_id(packed.to_bytes(8, 'big')) == packed
+
+    assert video_ids.pack_video_id('short') is None
+    assert video_ids.pack_video_id('dQw4w9WgXc!') is None
+    # Last character carries non-zero padding bits
+    assert video_ids.pack_video_id('dQw4w9WgXcR') is None
+
+
+def test_sql_regexp_matches_exactly_the_packable_ids():
+    pattern = re.compile(video_ids.CANONICAL_VIDEO_ID_REGEXP)
+    for video_id in ['dQw4w9WgXcQ', '9bZkp7q19f0', 'kJQP7kiw5Fk', 'dQw4w9WgXcR', 'dQw4w9WgXc', 'dQw4w9WgXc!']:
+        assert bool(pattern.match(video_id)) == (video_ids.pack_video_id(video_id) is not None)
+
+
+def test_binary_mode_encodes_params_and_decodes_rows(monkeypatch):
+    video = {'video_id': 'dQw4w9WgXcQ', 'view_count': 1}
+    assert video_ids.encode_video_params(video) is video
+    assert video_ids.video_id_column_type() == 'VARCHAR(20)'
+
+    monkeypatch.setenv('DB_VIDEO_ID_FORMAT', 'binary')
+    params = video_ids.encode_video_params(video)
+    assert params['video_id'] == bytes.fromhex('750c38c3d5a05dc4')
+    assert video['video_id'] == 'dQw4w9WgXcQ'
+    assert video_ids.decode_video_row({'video_id': bytearray(params['video_id'])})['video_id'] == 'dQw4w9WgXcQ'
+    assert video_ids.video_id_column_type() == 'BINARY(8)'
+    with pytest.raises(ValueError):
+        video_ids.encode_video_id('not-an-id')
@@ -0,0 +1,44 @@
+import os
+import sys
+import importlib.util
+from datetime import date, datetime
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('video_stats', os.path.join(os.path.dirname(__file__), '..', 'database', 'video_stats.py'))
+video_stats = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(video_stats)
+
+
+def test_snapshot_rows_pack_ids_and_skip_unusable_videos():
+    captured_at = datetime(2024, 5, 1, 12, 30, 15, 999)
+    rows = video_stats.snapshot_rows([
+        {'video_id': 'dQw4w9WgXcQ', 'view_count': 100},
+        {'video_id': 'not-an-id', 'view_count': 5},
+        {'video_id': '9bZkp7q19f0', 'view_count': None},
+    ], captured_at)
+
+    assert rows == [(video_stats.pack_video_id('dQw4w9WgXcQ'), datetime(2024, 5, 1, 12, 30, 15), 100)]
+
+
+def test_missing_partitions_only_extends_past_newest():
+    existing = ['p20240501', 'p20240502', 'p_future']
+    days = video_stats.missing_partitions(existing, date(2024, 5, 1), 3)
+    assert days == [date(2024, 5, 3), date(2024, 5, 4)]
+    assert video_stats.missing_partitions(['p_future'], date(2024, 5, 1), 0) == [date(2024, 5, 1)]
+
+
+def test_carry_forward_keeps_latest_value_of_uncrawled_videos():
+    points = [
+        (1, date(2024, 5, 1), 100),
+        (2, date(2024, 5, 1), 10),
+        (1, date(2024, 5, 2), 150),
+        (2, date(2024, 5, 3), 30),
+    ]
+    assert video_stats.carry_forward(points) == [
+        {'day': date(2024, 5, 1), 'view_count': 110, 'videos': 2},
+        {'day': date(2024, 5, 2), 'view_count': 160, 'videos': 2},
+        {'day': date(2024, 5, 3), 'view_count': 180, 'videos': 2},
+    ]
@@ -0,0 +1,125 @@
+import os
+import importlib.util
+
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('write_behind', os.path.join(os.path.dirname(__file__), '..', 'database', 'write_behind.py'))
+write_behind = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(write_behind)
+
+
+def test_close_flushes_coalesced_records(monkeypatch):
+    flushed = {'videos': [], 'transcripts': []}
+
+    def fake_upsert_videos(videos):
+        flushed['videos'].append(videos)
+        return len(videos)
+
+    def fake_upsert_transcripts(transcripts):
+        flushed['transcripts'].append(transcripts)
+        return len(transcripts)
+
+    class FakeVideoRepository:
+        upsert_videos_batch = staticmethod(fake_upsert_videos)
+
+    class FakeTranscriptRepository:
+        upsert_transcripts_batch = staticmethod(fake_upsert_transcripts)
+
+    monkeypatch.setattr(write_behind, 'get_video_repository', lambda: FakeVideoRepository)
+    monkeypatch.setattr(write_behind, 'get_transcript_repository', lambda: FakeTranscriptRepository)
+
+    buffer = write_behind.WriteBehindBuffer(flush_size=100, flush_interval=60)
+    buffer.enqueue_video({'video_id': 'A', 'view_count': 1})
+    buffer.enqueue_video({'video_id': 'B', 'view_count': 5})
+    buffer.enqueue_video({'video_id': 'A', 'view_count': 2})
+    buffer.enqueue_transcript('A', [{'text': 'hi'}])
+    buffer.close()
+
+    assert len(flushed['videos']) == 1
+    videos = {v['video_id']: v['view_count'] for v in flushed['videos'][0]}
+    assert videos == {'A': 2, 'B': 5}
+    assert flushed['transcripts'][0][0]['video_id'] == 'A'
+    assert buffer.stats['coalesced'] == 1
+    assert buffer.stats['videos_written'] == 2
+
+
+def test_flushes_when_flush_size_is_reached(monkeypatch):
+    batches = []
+
+    class FakeVideoRepository:
+        upsert_videos_batch = staticmethod(lambda videos: batches.append(len(videos)) or len(videos))
+
+    monkeypatch.setattr(write_behind, 'get_video_repository', lambda: FakeVideoRepository)
+
+    buffer = write_behind.WriteBehindBuffer(flush_size=2, flush_interval=60)
+    for video_id in ('A', 'B', 'C'):
+        buffer.enqueue_video({'video_id': video_id})
+    buffer.close()
+
+    assert batches == [2, 1]
+
+
+def test_failed_flush_is_retried_before_records_are_dropped(monkeypatch):
+    calls = []
+
+    def flaky_upsert(videos):
+        calls.append([video['video_id'] for video in videos])
+        if len(calls) == 1:
+            raise ConnectionError('server went away')
+        return len(videos)
+
+    class FakeVideoRepository:
+        upsert_videos_batch = staticmethod(flaky_upsert)
+
+    monkeypatch.setattr(write_behind, 'get_video_repository', lambda: FakeVideoRepository)
+
+    buffer = write_behind.WriteBehindBuffer(flush_size=1, flush_interval=60, retry_delay=0.01)
+    buffer.enqueue_video({'video_id': 'A'})
+    buffer.close()
+
+    assert calls == [['A'], ['A']]
+    stats = buffer.get_stats()
+    assert stats['videos_written'] == 1 and stats['retried'] == 1 and stats['failed'] == 0
+
+
+def test_records_are_dropped_after_max_retries(monkeypatch):
+    calls = []
+
+    def failing_upsert(videos):
+        calls.append(len(videos))
+        raise ConnectionError('server went away')
+
+    class FakeVideoRepository:
+        upsert_videos_batch = staticmethod(failing_upsert)
+
+    monkeypatch.setattr(write_behind, 'get_video_repository', lambda: FakeVideoRepository)
+
+    buffer = write_behind.WriteBehindBuffer(flush_size=100, flush_interval=60, max_retries=3, retry_delay=0.01)
+    buffer.enqueue_videos([{'video_id': 'A'}, {'video_id': 'B'}])
+    buffer.close()
+
+    assert calls == [2, 2, 2]
+    assert buffer.get_stats()['failed'] == 2
+
+
+def test_flush_interrupted_during_commit_is_not_retried(monkeypatch):
+    from mysql.connector.errors import OperationalError
+    calls = []
+
+    def upsert(videos):
+        calls.append(len(videos))
+        error = OperationalError(msg='Lost connection to MySQL server during query', errno=2013)
+        error.during_commit = True
+        raise error
+
+    class FakeVideoRepository:
+        upsert_videos_batch = staticmethod(upsert)
+
+    monkeypatch.setattr(write_behind, 'get_video_repository', lambda: FakeVideoRepository)
+
+    buffer = write_behind.WriteBehindBuffer(flush_size=1, flush_interval=60, retry_delay=0.01)
+    buffer.enqueue_video({'video_id': 'A'})
+    buffer.close()
+
+    assert calls == [1]
+    assert buffer.get_stats()['failed'] == 1 and buffer.get_stats()['retried'] == 0
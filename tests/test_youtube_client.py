@@ -0,0 +1,121 @@
+import os
+import sys
+import importlib.util
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from tenacity import wait_none
+
+
+# googleapis modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'googleapis'))
+
+# Dynamically import the module to ensure tests run from repo root
+spec = importlib.util.spec_from_file_location('youtube_client', os.path.join(os.path.dirname(__file__), '..', 'googleapis', 'youtube_client.py'))
+youtube_client = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(youtube_client)
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({'status': status}), b'{"error": {}}')
+
+
+class FakeRequest:
+    def __init__(self, outcomes, calls, kwargs):
+        self.outcomes = outcomes
+        self.calls = calls
+        self.kwargs = kwargs
+        self.headers = {}
+
+    def execute(self):
+        self.calls.append((self.kwargs, dict(self.headers)))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class FakeYoutube:
+    """Stands in for the discovery-built service: videos().list(...).execute() replays outcomes"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def videos(self):
+        return self
+
+    def list(self, **kwargs):
+        return FakeRequest(self.outcomes, self.calls, kwargs)
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    def make(*outcomes):
+        service = FakeYoutube(outcomes)
+        monkeypatch.setattr(youtube_client.googleapiclient.discovery, 'build', lambda *args, **kwargs: service)
+        for method in (youtube_client.YouTubeClient.get_video_data, youtube_client.YouTubeClient.get_video_statistics):
+            monkeypatch.setattr(method.retry, 'wait', wait_none())
+        return youtube_client.YouTubeClient(), service
+    return make
+
+
+ITEM = {
+    'id': 'dQw4w9WgXcQ',
+    'snippet': {'channelId': 'UC1', 'publishedAt': '2024-01-02T03:04:05Z', 'title': 'Title', 'tags': ['a', 'b']},
+    'contentDetails': {'duration': 'PT3M33S', 'caption': 'true'},
+    'statistics': {'viewCount': '10', 'likeCount': '2'},
+}
+
+
+def test_video_request_is_field_masked_to_persisted_fields(make_client):
+    client, service = make_client({'items': [ITEM]})
+
+    assert client.get_video_data('dQw4w9WgXcQ') == ITEM
+    kwargs, _ = service.calls[0]
+    assert kwargs == {'part': 'snippet,contentDetails,statistics', 'fields': youtube_client.VIDEO_FIELDS, 'id': 'dQw4w9WgXcQ'}
+    for field in ('channelId', 'publishedAt', 'tags', 'duration', 'caption', 'viewCount', 'commentCount'):
+        assert field in youtube_client.VIDEO_FIELDS
+
+
+def test_parser_builds_a_slim_record_with_defaults_for_missing_parts():
+    parsed = youtube_client.YouTubeVideoParser(ITEM).parse_data()
+
+    assert isinstance(parsed, youtube_client.ParsedVideo)
+    assert (parsed.channelId, parsed.title, parsed.tags) == ('UC1', 'Title', ['a', 'b'])
+    assert (parsed.duration, parsed.caption, parsed.viewCount, parsed.commentCount) == ('PT3M33S', 'true', '10', None)
+
+    bare = youtube_client.YouTubeVideoParser({'id': 'x'}).parse_data()
+    assert bare.tags == [] and bare.channelId is None
+    assert youtube_client.YouTubeVideoParser(None).parse_data() is None
+
+
+def test_server_errors_and_rate_limits_are_retried(make_client):
+    client, service = make_client(http_error(503), http_error(429), {'items': [ITEM]})
+
+    assert client.get_video_data('dQw4w9WgXcQ') == ITEM
+    assert len(service.calls) == 3
+
+
+def test_client_errors_are_not_retried(make_client):
+    client, service = make_client(http_error(403))
+
+    with pytest.raises(HttpError):
+        client.get_video_data('dQw4w9WgXcQ')
+    assert len(service.calls) == 1
+
+
+def test_statistics_request_is_conditional_on_the_stored_etag(make_client):
+    client, service = make_client(http_error(304), {'etag': '"new"', 'items': [ITEM]}, {'items': []})
+
+    assert client.get_video_statistics('dQw4w9WgXcQ', '"old"') is youtube_client.NOT_MODIFIED
+    assert client.get_video_statistics('dQw4w9WgXcQ') == ('"new"', ITEM)
+    assert client.get_video_statistics('gone') is None
+
+    (kwargs, headers), (_, unconditional), _ = service.calls
+    assert kwargs['part'] == 'statistics' and kwargs['fields'] == youtube_client.STATISTICS_FIELDS
+    assert headers == {'If-None-Match': '"old"'}
+    assert unconditional == {}
+    # A 304 is an answer, not a failure to retry
+    assert len(service.calls) == 3